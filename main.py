@@ -1,21 +1,131 @@
 import os
 import sys
 import json
+import re
+import errno
+import mmap
+import struct
+import shutil
+import zlib
+import zipfile
+import time
+import random
+import threading
+import socket
+import ssl
+import ipaddress
+import sqlite3
+import uuid
+import http.server
+import socketserver
+import subprocess
+import functools
+import contextlib
+import math
+from collections import deque, OrderedDict
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor, wait
 import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urlparse, unquote, urljoin, parse_qs, urlencode
 import hashlib
-from PyQt5 import QtWidgets, QtCore, QtGui
+from PyQt5 import QtWidgets, QtCore, QtGui, sip
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QMessageBox, QInputDialog, QFileDialog, QProgressBar,
     QAction, QLabel, QLineEdit, QStyle, QComboBox,
-    QTableWidget, QTableWidgetItem, QHeaderView, QSpacerItem, QSizePolicy
+    QTableWidget, QTableWidgetItem, QHeaderView, QSpacerItem, QSizePolicy,
+    QDockWidget, QListWidget, QListWidgetItem,
+    QDialog, QFormLayout, QSpinBox, QDoubleSpinBox, QDialogButtonBox, QTabWidget
 )
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt, QObject, pyqtSignal, QThread, QMutex
+from PyQt5.QtNetwork import QTcpSocket
+from PyQt5.QtCore import (
+    Qt, QObject, pyqtSignal, QThread, QMutex, QTimer, QRunnable, QThreadPool, QFileSystemWatcher
+)
+
+# HTTP/2 é opcional: requer httpx com suporte a h2 (pip install "httpx[http2]")
+try:
+    import httpx
+    import h2  # noqa: F401
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    httpx = None
+    HTTP2_DISPONIVEL = False
 
 # Caminhos dos arquivos
 DRIVERS_FILE = 'drivers.json'
 DOWNLOADS_DIR = 'downloads'
+CONFIG_FILE = 'config.json'
+PARES_FILE = 'pares_cache.json'
+METADADOS_FILE = 'metadados_cache.json'
+LINKS_FILE = 'links_resolvidos.json'
+HISTORICO_FILE = 'historico.db'
+DAEMON_TOKEN_FILE = 'daemon_token'
+PROGRESSO_FILE = 'progresso_daemon.bin'
+CACHE_DIR = 'cache_drivers'  # Binários importados de pacotes offline
+AGENDA_FILE = 'agenda_fora_pico.json'
+
+# Configurações padrão da aplicação
+DEFAULT_CONFIG = {
+    "extrair_zip": False,
+    "tema": "claro",
+    "http2": False,
+    "dns_ttl": 300,
+    "metadados_ttl": 21600,
+    "metadados_paralelos": 6,
+    # Páginas de produto no lugar do arquivo: regras opcionais por site
+    # ({"pagina": regex da URL da página, "link": regex do link do arquivo}) e, sem regra,
+    # o primeiro link com uma das extensões abaixo
+    "regras_links": [],
+    "extensoes_download": [".exe", ".zip", ".msi", ".rar", ".7z"],
+    "links_ttl": 86400,
+    "daemon_ativo": False,
+    "daemon_porta": 8767,
+    "daemon_ocioso_minutos": 10,
+    "monitor_latencia": False,  # Mede os travamentos do loop de eventos da interface
+    "monitor_intervalo_ms": 10,
+    "monitor_limite_ms": 100,  # Atraso a partir do qual o loop é considerado travado
+    "rastreamento": False,  # Trechos da interface e dos downloads para exportar como Chrome Trace
+    "rastreamento_max_eventos": 200000,
+    "preaquecer_conexoes": True,
+    "downloads_simultaneos": 3,
+    "timeout_conexao": 10,
+    "timeout_leitura": 30,
+    "tentativas_max": 5,
+    "backoff_base": 2.0,
+    "backoff_max": 60.0,
+    "watchdog_bps": 1024,
+    "watchdog_segundos": 30,
+    "reserva_disco_mb": 50,
+    "cota_mb": 0,
+    "pares_ativo": False,
+    "pares_porta": 8765,
+    # Endereço em que o cache escuta. O servidor não tem autenticação: o padrão só atende
+    # esta máquina; para servir a rede local use o IP da interface da loja (ou 0.0.0.0)
+    "pares_endereco": "127.0.0.1",
+    "pares_porta_descoberta": 8766,
+    "pares_descoberta": True,
+    "pares_lista": [],
+    "pacote_paralelos": 4,
+    # Downloads fora de pico rodam só dentro destas janelas, com limite opcional de banda
+    # (KB/s, 0 = sem limite); uma janela com fim antes do início atravessa a meia-noite
+    "janelas_fora_pico": [{"inicio": "22:00", "fim": "06:00", "limite_kbps": 0}],
+    "grupos_fora_pico": [],
+    "catalogo_url": "",
+    "catalogo_versao": 0,
+    "catalogo_etag": "",
+    "catalogo_modificado": ""
+}
+
+# Formato do catálogo remoto.
+# O endpoint recebe GET <url>?desde=<versao> com If-None-Match/If-Modified-Since e responde:
+#   304 - nada mudou desde a última sincronização
+#   200 - {"formato": 1, "versao": N, "adicionados": [...], "alterados": [...], "removidos": ["nome", ...]}
+#         ou {"formato": 1, "versao": N, "completo": true, "drivers": [...]} quando não há delta
+# Um drivers.json estático (lista simples) também é aceito e tratado como catálogo completo.
+CATALOGO_FORMATO = 1
 
 # Garantir que o diretório de downloads exista
 if not os.path.exists(DOWNLOADS_DIR):
@@ -68,146 +178,2258 @@ DEFAULT_DRIVERS = [
     }
 ]
 
+# Registro compacto de um driver do catálogo. Os campos conhecidos ficam em __slots__ e os
+# demais campos do JSON (ex.: "manifesto") em `extras`, para gravar de volta sem perda.
+# O acesso como dicionário (driver['url'], driver.get('checksum'), dict(driver)) continua valendo.
+# A igualdade e o hash são por identidade: para comparar os dados, use dict(driver).
+class Driver:
+    CAMPOS = ('nome', 'url', 'grupo', 'checksum')
+    __slots__ = ('nome', '_url', 'grupo', 'checksum', 'extras', '_host')
+
+    def __init__(self, nome, url, grupo, checksum=None, extras=None):
+        self.nome = nome
+        self._url = url
+        self.grupo = sys.intern(grupo)
+        self.checksum = checksum  # None quando o JSON não tem o campo
+        self.extras = extras or None
+        self._host = None
+
+    @classmethod
+    def de_dict(cls, dados):
+        if isinstance(dados, Driver):
+            return dados
+        extras = {campo: valor for campo, valor in dados.items() if campo not in cls.CAMPOS}
+        return cls(dados['nome'], dados['url'], dados['grupo'], dados.get('checksum'), extras)
+
+    @property
+    def url(self):
+        return self._url
+
+    @url.setter
+    def url(self, url):
+        self._url = url
+        self._host = None
+
+    # Host da URL, extraído só na primeira consulta
+    @property
+    def host(self):
+        if self._host is None:
+            self._host = urlparse(self._url).netloc.lower()
+        return self._host
+
+    def keys(self):
+        chaves = [campo for campo in self.CAMPOS if getattr(self, campo) is not None]
+        if self.extras:
+            chaves.extend(self.extras)
+        return chaves
+
+    def __getitem__(self, campo):
+        if campo in self.CAMPOS:
+            valor = getattr(self, campo)
+            if valor is not None:
+                return valor
+        elif self.extras and campo in self.extras:
+            return self.extras[campo]
+        raise KeyError(campo)
+
+    def get(self, campo, padrao=None):
+        try:
+            return self[campo]
+        except KeyError:
+            return padrao
+
+    def __contains__(self, campo):
+        try:
+            self[campo]
+        except KeyError:
+            return False
+        return True
+
+    def __repr__(self):
+        return f"Driver({dict(self)!r})"
+
+# Catálogo de drivers em ordem, com índices por chave (nome), grupo e host.
+# O índice por host é montado na primeira consulta.
+class CatalogoDrivers:
+    def __init__(self, drivers=()):
+        self._drivers = []
+        self._por_chave = {}
+        self._por_grupo = {}
+        self._por_host = None
+        self.extend(drivers)
+
+    def __iter__(self):
+        return iter(self._drivers)
+
+    def __len__(self):
+        return len(self._drivers)
+
+    def __getitem__(self, indice):
+        return self._drivers[indice]
+
+    def append(self, driver):
+        driver = Driver.de_dict(driver)
+        self._drivers.append(driver)
+        self._indexar(driver)
+        return driver
+
+    def extend(self, drivers):
+        for driver in drivers:
+            self.append(driver)
+
+    def _indexar(self, driver):
+        self._por_chave[chave_driver(driver)] = driver
+        self._por_grupo.setdefault(driver.grupo, []).append(driver)
+        if self._por_host is not None:
+            self._por_host.setdefault(driver.host, []).append(driver)
+
+    def _reindexar(self):
+        self._por_chave = {}
+        self._por_grupo = {}
+        self._por_host = None
+        for driver in self._drivers:
+            self._indexar(driver)
+
+    def remover(self, chaves):
+        self._drivers = [driver for driver in self._drivers if chave_driver(driver) not in chaves]
+        self._reindexar()
+
+    # Troca o registro por um novo objeto na mesma posição. O antigo não é alterado,
+    # para que um download em andamento continue com os dados com que começou.
+    def substituir(self, atual, novo):
+        novo = Driver.de_dict(mesclar_campos_locais(atual, novo))
+        self._drivers[self._drivers.index(atual)] = novo
+        grupo = self._por_grupo[atual.grupo]
+        grupo[:] = [driver for driver in grupo if driver is not atual]
+        del self._por_chave[chave_driver(atual)]
+        self._por_host = None
+        self._indexar(novo)
+        return novo
+
+    def por_chave(self, chave):
+        return self._por_chave.get(chave)
+
+    def por_grupo(self, grupo):
+        return list(self._por_grupo.get(grupo, []))
+
+    def por_host(self, host):
+        if self._por_host is None:
+            self._por_host = {}
+            for driver in self._drivers:
+                self._por_host.setdefault(driver.host, []).append(driver)
+        return list(self._por_host.get(host.lower(), []))
+
+    def grupos(self):
+        return sorted(grupo for grupo, drivers in self._por_grupo.items() if grupo and drivers)
+
+# Rastreamento de execução no formato Chrome Trace Event (chrome://tracing, Perfetto).
+# Cada trecho vira um evento "X" com a thread que o executou, para ver lado a lado a
+# interface e os downloads do pool. Desligado, o custo é uma consulta a `ativo` por chamada.
+class Rastreador:
+    def __init__(self):
+        self.ativo = False
+        self.origem = time.perf_counter()
+        self.eventos = deque(maxlen=200000)
+        self.threads = {}  # id da thread -> nome
+
+    def iniciar(self, max_eventos=200000):
+        if self.eventos.maxlen != max_eventos:
+            self.eventos = deque(self.eventos, maxlen=max_eventos)
+        self.ativo = True
+
+    def parar(self):
+        self.ativo = False
+
+    def zerar(self):
+        self.eventos.clear()
+        self.threads.clear()
+        self.origem = time.perf_counter()
+
+    def _registrar(self, nome, categoria, inicio, fim, args):
+        tid = threading.get_ident()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+        # deque.append é atômico: as threads do pool gravam sem trava
+        self.eventos.append((nome, categoria, inicio, fim, tid, args))
+
+    @contextlib.contextmanager
+    def _trecho(self, nome, categoria, args):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._registrar(nome, categoria, inicio, time.perf_counter(), args)
+
+    def trecho(self, nome, categoria="", **args):
+        if not self.ativo:
+            return SEM_RASTREIO
+        return self._trecho(nome, categoria, args)
+
+    # Decorador: o estado é consultado a cada chamada, então vale para funções de módulo
+    def rastrear(self, nome, categoria=""):
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def rastreada(*args, **kwargs):
+                if not self.ativo:
+                    return funcao(*args, **kwargs)
+                inicio = time.perf_counter()
+                try:
+                    return funcao(*args, **kwargs)
+                finally:
+                    self._registrar(nome, categoria, inicio, time.perf_counter(), None)
+            return rastreada
+        return decorador
+
+    def eventos_chrome(self):
+        pid = os.getpid()
+        principal = threading.main_thread().ident
+        eventos = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "Driver Downloader"}}]
+        for tid, nome in list(self.threads.items()):
+            eventos.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                            "args": {"name": "Interface" if tid == principal else nome}})
+            eventos.append({"name": "thread_sort_index", "ph": "M", "pid": pid, "tid": tid,
+                            "args": {"sort_index": 0 if tid == principal else 1}})
+        for nome, categoria, inicio, fim, tid, args in list(self.eventos):
+            evento = {"name": nome, "cat": categoria, "ph": "X", "pid": pid, "tid": tid,
+                      "ts": round((inicio - self.origem) * 1e6, 1), "dur": round((fim - inicio) * 1e6, 1)}
+            if args:
+                evento["args"] = args
+            eventos.append(evento)
+        return eventos
+
+    def exportar(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": self.eventos_chrome(), "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+SEM_RASTREIO = contextlib.nullcontext()
+RASTREADOR = Rastreador()
+
 # Função para carregar drivers do JSON
 def carregar_drivers():
     if not os.path.exists(DRIVERS_FILE):
         salvar_drivers(DEFAULT_DRIVERS)
-        return DEFAULT_DRIVERS.copy()
+        return CatalogoDrivers(DEFAULT_DRIVERS)
     with open(DRIVERS_FILE, 'r', encoding='utf-8') as f:
         try:
             drivers = json.load(f)
             # Se o arquivo estiver vazio, adicionar os drivers padrão
             if not drivers:
                 salvar_drivers(DEFAULT_DRIVERS)
-                return DEFAULT_DRIVERS.copy()
-            return drivers
+                return CatalogoDrivers(DEFAULT_DRIVERS)
+            return CatalogoDrivers(drivers)
         except json.JSONDecodeError:
             # Se o JSON estiver corrompido, reescreve com os drivers padrão
             salvar_drivers(DEFAULT_DRIVERS)
-            return DEFAULT_DRIVERS.copy()
+            return CatalogoDrivers(DEFAULT_DRIVERS)
 
 # Função para salvar drivers no JSON
+@RASTREADOR.rastrear("salvar_drivers", "catalogo")
 def salvar_drivers(drivers):
     with open(DRIVERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(drivers, f, indent=4, ensure_ascii=False)
+        json.dump([dict(driver) for driver in drivers], f, indent=4, ensure_ascii=False)
+
+# Função para carregar configurações (valores ausentes usam o padrão)
+def carregar_config():
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            try:
+                config.update(json.load(f))
+            except json.JSONDecodeError:
+                pass
+    return config
+
+# Função para salvar configurações
+def salvar_config(config):
+    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=4, ensure_ascii=False)
+
+# Cache dos metadados dos links do catálogo (tamanho, Range, redirecionamento), por URL
+def carregar_metadados():
+    if os.path.exists(METADADOS_FILE):
+        with open(METADADOS_FILE, 'r', encoding='utf-8') as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                pass
+    return {}
+
+@RASTREADOR.rastrear("salvar_metadados", "catalogo")
+def salvar_metadados(metadados):
+    with open(METADADOS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(metadados, f, indent=4, ensure_ascii=False)
+
+# Tamanho legível para a tabela
+def formatar_tamanho(tamanho):
+    if tamanho is None:
+        return "—"
+    for unidade in ('B', 'KB', 'MB'):
+        if tamanho < 1024:
+            return f"{tamanho:.0f} {unidade}" if unidade == 'B' else f"{tamanho:.1f} {unidade}"
+        tamanho /= 1024
+    return f"{tamanho:.1f} GB"
+
+# Percentil (0 a 1) de uma lista ordenada, com interpolação linear
+def percentil(valores, q):
+    if not valores:
+        return None
+    posicao = (len(valores) - 1) * q
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores) - 1)
+    return valores[inferior] + (valores[superior] - valores[inferior]) * (posicao - inferior)
+
+# Histórico persistente das transferências (SQLite), com índices por host e por driver
+# para as consultas de estatísticas
+class HistoricoDownloads:
+    def __init__(self, arquivo=HISTORICO_FILE):
+        # O motor de downloads grava de várias threads; as chamadas são serializadas por quem usa
+        self.conexao = sqlite3.connect(arquivo, check_same_thread=False)
+        self.conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS transferencias (
+                id INTEGER PRIMARY KEY,
+                quando REAL NOT NULL,
+                driver TEXT NOT NULL,
+                host TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                duracao REAL NOT NULL,
+                vazao_media REAL,
+                vazao_pico REAL,
+                tentativas INTEGER NOT NULL,
+                resultado TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_transferencias_host ON transferencias (host, quando);
+            CREATE INDEX IF NOT EXISTS idx_transferencias_driver ON transferencias (driver, quando);
+        """)
+
+    def registrar(self, driver, host, total_bytes, duracao, vazao_pico, tentativas, resultado):
+        vazao_media = total_bytes / duracao if total_bytes and duracao > 0 else None
+        with self.conexao:
+            self.conexao.execute(
+                "INSERT INTO transferencias (quando, driver, host, bytes, duracao, vazao_media, vazao_pico, "
+                "tentativas, resultado) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), driver, host, total_bytes, duracao, vazao_media, vazao_pico or None, tentativas, resultado)
+            )
+
+    def recentes(self, limite=200):
+        cursor = self.conexao.execute(
+            "SELECT quando, driver, host, bytes, duracao, vazao_media, vazao_pico, tentativas, resultado "
+            "FROM transferencias ORDER BY quando DESC LIMIT ?", (limite,)
+        )
+        colunas = [descricao[0] for descricao in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor]
+
+    # Por host, nos últimos dias: volume, falhas e p50/p95 da vazão média dos downloads concluídos
+    def estatisticas_por_host(self, dias=30):
+        desde = time.time() - dias * 86400
+        estatisticas = {}
+        for host, total, falhas, volume, pico in self.conexao.execute(
+                "SELECT host, COUNT(*), SUM(resultado = 'erro'), SUM(bytes), MAX(vazao_pico) "
+                "FROM transferencias WHERE quando >= ? GROUP BY host", (desde,)):
+            estatisticas[host] = {
+                "host": host, "transferencias": total, "falhas": falhas, "bytes": volume,
+                "pico": pico, "vazoes": []
+            }
+        for host, vazao in self.conexao.execute(
+                "SELECT host, vazao_media FROM transferencias WHERE quando >= ? AND resultado = 'baixado' "
+                "AND vazao_media IS NOT NULL ORDER BY host, vazao_media", (desde,)):
+            estatisticas[host]["vazoes"].append(vazao)
+        for item in estatisticas.values():
+            vazoes = item.pop("vazoes")
+            item["p50"] = percentil(vazoes, 0.5)
+            item["p95"] = percentil(vazoes, 0.95)
+        return sorted(estatisticas.values(), key=lambda item: item["host"])
+
+    # Vazão típica (p50) de cada host, usada para estimar a duração dos downloads na fila
+    def vazao_estimada(self, dias=30):
+        return {item["host"]: item["p50"] for item in self.estatisticas_por_host(dias) if item["p50"]}
+
+# Chave estável de um driver no catálogo
+def chave_driver(driver):
+    return driver['nome']
+
+# Validação básica de uma entrada do catálogo
+def driver_valido(driver):
+    return isinstance(driver, dict) and all(campo in driver for campo in ('nome', 'url', 'grupo'))
+
+# Dados de um registro remoto completados com o que só existe no registro local: um checksum
+# calculado aqui (registrar_checksum, marcado com checksum_local) continua valendo se o remoto
+# não traz um e a URL é a mesma. Um checksum que veio do catálogo segue o catálogo.
+def mesclar_campos_locais(atual, remoto):
+    dados = dict(remoto)
+    if atual.get('checksum_local') and not dados.get('checksum') and atual['url'] == dados['url']:
+        dados['checksum'] = atual['checksum']
+        dados['checksum_local'] = True
+    return dados
+
+# Função para calcular a diferença entre o catálogo local e um catálogo completo
+def calcular_delta_catalogo(locais, remotos):
+    por_chave = {chave_driver(driver): driver for driver in locais}
+    adicionados = []
+    alterados = []
+    vistos = set()
+    for driver in remotos:
+        chave = chave_driver(driver)
+        vistos.add(chave)
+        atual = por_chave.get(chave)
+        if atual is None:
+            adicionados.append(driver)
+        elif dict(atual) != mesclar_campos_locais(atual, driver):
+            alterados.append(driver)
+    removidos = [chave for chave in por_chave if chave not in vistos]
+    return {"adicionados": adicionados, "alterados": alterados, "removidos": removidos}
+
+# Checksums tipados no catálogo: "algoritmo:hex", vários separados por espaço
+# (ex.: "sha256:... blake2b:..."). Um valor sem prefixo é sha256, como antes.
+ALGORITMO_PADRAO = 'sha256'
+# Na reverificação de um arquivo local basta o digest mais rápido disponível
+ALGORITMOS_RAPIDOS = ('blake2b', 'blake2s', 'sha256', 'sha512')
+# Digests gravados no catálogo após o primeiro download confiável
+ALGORITMOS_AUTOMATICOS = ('sha256', 'blake2b')
+LEITURA_HASH = 1 << 20
+
+# Função para ler o campo checksum de um driver: {algoritmo: digest}
+def ler_checksums(valor):
+    if not valor:
+        return {}
+    partes = valor if isinstance(valor, list) else re.split(r'[\s,;]+', valor.strip())
+    digests = {}
+    for parte in partes:
+        if not parte:
+            continue
+        algoritmo, _, digest = parte.rpartition(':')
+        digests[(algoritmo or ALGORITMO_PADRAO).lower().replace('-', '_')] = digest.lower()
+    return digests
+
+def formatar_checksums(digests):
+    return " ".join(f"{algoritmo}:{digest}" for algoritmo, digest in digests.items())
+
+# Função para calcular vários digests numa única leitura do arquivo (mmap, em fatias de 1 MB)
+@RASTREADOR.rastrear("calcular_digests", "hash")
+def calcular_digests(file_path, algoritmos):
+    funcoes = {algoritmo: hashlib.new(algoritmo) for algoritmo in algoritmos}
+    with open(file_path, 'rb') as f:
+        tamanho = os.fstat(f.fileno()).st_size
+        if tamanho:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa, memoryview(mapa) as visao:
+                for inicio in range(0, tamanho, LEITURA_HASH):
+                    with visao[inicio:inicio + LEITURA_HASH] as fatia:
+                        for funcao in funcoes.values():
+                            funcao.update(fatia)
+    return {algoritmo: funcao.hexdigest() for algoritmo, funcao in funcoes.items()}
 
 # Função para calcular checksum
 def calcular_checksum(file_path, hash_type='sha256'):
-    hash_func = getattr(hashlib, hash_type)()
+    return calcular_digests(file_path, [hash_type])[hash_type]
+
+# Função para conferir um arquivo com o checksum do catálogo. Com rapido=True usa só o digest
+# mais rápido; algoritmos desconhecidos não contam e, sem nenhum conhecido, a verificação falha.
+def verificar_checksums(file_path, valor, rapido=False):
+    esperados = {algoritmo: digest for algoritmo, digest in ler_checksums(valor).items()
+                 if algoritmo in hashlib.algorithms_available}
+    if not esperados:
+        return False
+    if rapido:
+        algoritmo = next((algoritmo for algoritmo in ALGORITMOS_RAPIDOS if algoritmo in esperados),
+                         next(iter(esperados)))
+        esperados = {algoritmo: esperados[algoritmo]}
+    return calcular_digests(file_path, esperados) == esperados
+
+# Manifesto de blocos para atualizações parciais (estilo zsync):
+# {"formato": 1, "tamanho": N, "bloco": B, "sha256": "...", "checksum": "sha256:... blake2b:...",
+#  "fortes": [md5 de cada bloco], "ancoras": [primeiros ANCORA_BYTES de cada bloco, em hex]}
+# O campo "checksum" pode ser copiado para o catálogo.
+# Em vez do checksum rolante byte a byte (lento em Python puro), os blocos deslocados
+# são localizados pela âncora com mmap.find e confirmados pelo md5.
+BLOCO_MANIFESTO = 65536
+ANCORA_BYTES = 32
+
+# Função para gerar o manifesto de blocos de um arquivo (publicado ao lado do driver)
+def gerar_manifesto_blocos(file_path, bloco=BLOCO_MANIFESTO):
+    fortes = []
+    ancoras = []
+    funcoes = {algoritmo: hashlib.new(algoritmo) for algoritmo in ALGORITMOS_AUTOMATICOS}
     with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_func.update(chunk)
-    return hash_func.hexdigest()
+        for dados in iter(lambda: f.read(bloco), b""):
+            for funcao in funcoes.values():
+                funcao.update(dados)
+            fortes.append(hashlib.md5(dados).hexdigest())
+            ancoras.append(dados[:ANCORA_BYTES].hex())
+    digests = {algoritmo: funcao.hexdigest() for algoritmo, funcao in funcoes.items()}
+    return {
+        "formato": 1,
+        "tamanho": os.path.getsize(file_path),
+        "bloco": bloco,
+        "sha256": digests['sha256'],
+        "checksum": formatar_checksums(digests),
+        "fortes": fortes,
+        "ancoras": ancoras
+    }
+
+# Localiza na cópia antiga os blocos do manifesto: {índice do bloco: offset no arquivo antigo}
+def localizar_blocos(caminho_antigo, manifesto):
+    bloco = manifesto['bloco']
+    tamanho = manifesto['tamanho']
+    fortes = manifesto['fortes']
+    ancoras = manifesto['ancoras']
+    encontrados = {}
+    if os.path.getsize(caminho_antigo) == 0:
+        return encontrados
+
+    with open(caminho_antigo, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as antigo:
+        def confere(i, offset):
+            tamanho_bloco = min(bloco, tamanho - i * bloco)
+            dados = antigo[offset:offset + tamanho_bloco]
+            return len(dados) == tamanho_bloco and hashlib.md5(dados).hexdigest() == fortes[i]
+
+        offset_anterior = None
+        for i in range(len(fortes)):
+            # Mesma posição, continuação do bloco anterior e, por fim, busca pela âncora
+            candidatos = [i * bloco]
+            if offset_anterior is not None:
+                candidatos.append(offset_anterior + bloco)
+            for offset in candidatos:
+                if confere(i, offset):
+                    encontrados[i] = offset
+                    break
+            else:
+                ancora = bytes.fromhex(ancoras[i])
+                offset = antigo.find(ancora)
+                tentativas = 0
+                while offset != -1 and tentativas < 16:
+                    if confere(i, offset):
+                        encontrados[i] = offset
+                        break
+                    offset = antigo.find(ancora, offset + 1)
+                    tentativas += 1
+            offset_anterior = encontrados.get(i)
+    return encontrados
+
+# Nome de arquivo sugerido para um driver (ignora query strings como as do Dropbox)
+def nome_arquivo_driver(driver):
+    nome = os.path.basename(unquote(urlparse(driver['url']).path))
+    return nome or driver['nome']
+
+# Nomes de dispositivo do Windows, reservados com qualquer extensão (NUL, NUL.txt)
+NOMES_RESERVADOS = frozenset(['CON', 'PRN', 'AUX', 'NUL'] + [f'{prefixo}{i}' for prefixo in ('COM', 'LPT')
+                                                              for i in range(1, 10)])
+
+# Nome de arquivo simples, que só pode ser gravado dentro da pasta de destino em qualquer sistema
+def nome_arquivo_valido(nome):
+    return (bool(nome) and nome not in ('.', '..') and not re.search(r'[\x00-\x1f<>:"/\\|?*]', nome)
+            and not nome.endswith(('.', ' ')) and nome.split('.')[0].rstrip().upper() not in NOMES_RESERVADOS)
+
+# Pasta onde o conteúdo de um ZIP é extraído (ao lado do arquivo)
+def pasta_extracao(save_path):
+    pasta = os.path.splitext(save_path)[0]
+    if pasta == save_path:
+        pasta += '_extraido'
+    return pasta
+
+# Extrator incremental de ZIP: recebe os blocos do download à medida que chegam
+# e extrai cada entrada lendo os cabeçalhos locais, sem reler o arquivo.
+# Entradas que não podem ser delimitadas pelo fluxo (armazenadas com descritor
+# de dados, criptografadas ou com método não suportado) ficam para depois do
+# último bloco, quando o diretório central já está disponível.
+class ExtratorZip:
+    ASSINATURA_LOCAL = b'PK\x03\x04'
+    ASSINATURA_CENTRAL = b'PK\x01\x02'
+    ASSINATURA_FIM = b'PK\x05\x06'
+    ASSINATURA_DESCRITOR = b'PK\x07\x08'
+
+    def __init__(self, destino):
+        self.destino = destino
+        self.ativo = True
+        self.adiado_em = None
+        self.extraidos = []
+        self._buffer = bytearray()
+        self._offset = 0  # Posição, no arquivo, do primeiro byte do buffer
+        self._estado = 'cabecalho'
+        self._entrada = None
+
+    def alimentar(self, data):
+        if not self.ativo or self._estado in ('adiado', 'fim'):
+            return
+        self._buffer += data
+        while self._processar():
+            pass
+
+    def _consumir(self, n):
+        dados = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        self._offset += n
+        return dados
+
+    def _processar(self):
+        if self._estado == 'cabecalho':
+            return self._ler_cabecalho()
+        if self._estado == 'dados':
+            return self._ler_dados()
+        if self._estado == 'descritor':
+            return self._ler_descritor()
+        return False
+
+    def _ler_cabecalho(self):
+        if len(self._buffer) < 4:
+            return False
+        assinatura = bytes(self._buffer[:4])
+        if assinatura in (self.ASSINATURA_CENTRAL, self.ASSINATURA_FIM):
+            # Todas as entradas já foram extraídas
+            self._estado = 'fim'
+            self._buffer.clear()
+            return False
+        if assinatura != self.ASSINATURA_LOCAL:
+            if self._offset == 0:
+                # Não é um ZIP: nada a extrair
+                self.ativo = False
+                self._buffer.clear()
+                return False
+            raise zipfile.BadZipFile(f"Cabeçalho inválido na posição {self._offset} do ZIP.")
+        if len(self._buffer) < 30:
+            return False
+        (_, _, flags, metodo, _, _, crc, tam_comp, tam_orig,
+         len_nome, len_extra) = struct.unpack('<4sHHHHHIIIHH', self._buffer[:30])
+        if len(self._buffer) < 30 + len_nome + len_extra:
+            return False
+
+        nome_bytes = bytes(self._buffer[30:30 + len_nome])
+        extra = bytes(self._buffer[30 + len_nome:30 + len_nome + len_extra])
+        nome = nome_bytes.decode('utf-8' if flags & 0x800 else 'cp437')
+        zip64 = False
+        if tam_comp == 0xFFFFFFFF or tam_orig == 0xFFFFFFFF:
+            zip64 = True
+            tam_orig, tam_comp = self._tamanhos_zip64(extra, tam_orig, tam_comp)
+
+        descritor = bool(flags & 0x08)
+        if flags & 0x01 or metodo not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) \
+                or (descritor and metodo == zipfile.ZIP_STORED):
+            self.adiado_em = self._offset
+            self._estado = 'adiado'
+            self._buffer.clear()
+            return False
+
+        self._consumir(30 + len_nome + len_extra)
+        caminho = self._caminho_seguro(nome)
+        arquivo = None
+        if nome.endswith('/'):
+            os.makedirs(caminho, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            arquivo = open(caminho, 'wb')
+        self._entrada = {
+            "nome": nome,
+            "arquivo": arquivo,
+            "crc_esperado": crc,
+            "crc": 0,
+            "restante": None if descritor else tam_comp,
+            "zip64": zip64,
+            "descompressor": zlib.decompressobj(-15) if metodo == zipfile.ZIP_DEFLATED else None
+        }
+        self._estado = 'dados'
+        return True
+
+    def _tamanhos_zip64(self, extra, tam_orig, tam_comp):
+        pos = 0
+        while pos + 4 <= len(extra):
+            tipo, tamanho = struct.unpack('<HH', extra[pos:pos + 4])
+            if tipo == 0x0001:
+                campos = extra[pos + 4:pos + 4 + tamanho]
+                if tam_orig == 0xFFFFFFFF:
+                    tam_orig = struct.unpack('<Q', campos[:8])[0]
+                    campos = campos[8:]
+                if tam_comp == 0xFFFFFFFF:
+                    tam_comp = struct.unpack('<Q', campos[:8])[0]
+                break
+            pos += 4 + tamanho
+        return tam_orig, tam_comp
+
+    def _ler_dados(self):
+        entrada = self._entrada
+        descompressor = entrada["descompressor"]
+        if entrada["restante"] is None:
+            # Tamanho desconhecido: o fim do fluxo deflate delimita a entrada
+            if not self._buffer:
+                return False
+            recebido = len(self._buffer)
+            self._gravar(self._descomprimir(descompressor.decompress, bytes(self._buffer)))
+            self._buffer.clear()
+            self._offset += recebido
+            if descompressor.eof:
+                sobra = descompressor.unused_data
+                self._buffer += sobra
+                self._offset -= len(sobra)
+                self._estado = 'descritor'
+                return True
+            return False
+
+        n = min(entrada["restante"], len(self._buffer))
+        if n:
+            bloco = self._consumir(n)
+            entrada["restante"] -= n
+            self._gravar(self._descomprimir(descompressor.decompress, bloco) if descompressor else bloco)
+        if entrada["restante"] == 0:
+            if descompressor:
+                self._gravar(self._descomprimir(descompressor.flush))
+            self._concluir_entrada()
+            return True
+        return False
+
+    # Fluxo deflate corrompido ou truncado: mesmo tratamento dos outros defeitos do arquivo
+    def _descomprimir(self, funcao, *dados):
+        try:
+            return funcao(*dados)
+        except zlib.error as e:
+            raise zipfile.BadZipFile(f"Dados comprimidos inválidos em '{self._entrada['nome']}': {e}")
+
+    def _ler_descritor(self):
+        entrada = self._entrada
+        tamanho = 20 if entrada["zip64"] else 12
+        if len(self._buffer) < 4:
+            return False
+        inicio = 4 if bytes(self._buffer[:4]) == self.ASSINATURA_DESCRITOR else 0
+        if len(self._buffer) < inicio + tamanho:
+            return False
+        descritor = self._consumir(inicio + tamanho)
+        entrada["crc_esperado"] = struct.unpack('<I', descritor[inicio:inicio + 4])[0]
+        self._concluir_entrada()
+        return True
+
+    def _gravar(self, dados):
+        if dados:
+            self._entrada["crc"] = zlib.crc32(dados, self._entrada["crc"])
+            if self._entrada["arquivo"]:
+                self._entrada["arquivo"].write(dados)
+
+    def _concluir_entrada(self):
+        entrada = self._entrada
+        if entrada["arquivo"]:
+            entrada["arquivo"].close()
+        self._entrada = None
+        self._estado = 'cabecalho'
+        if entrada["crc"] != entrada["crc_esperado"]:
+            raise zipfile.BadZipFile(f"CRC inválido para '{entrada['nome']}'.")
+        self.extraidos.append(entrada["nome"])
+
+    def _caminho_seguro(self, nome):
+        # Evitar que entradas escapem da pasta de destino ("zip slip")
+        partes = [p for p in nome.replace('\\', '/').split('/') if p not in ('', '.', '..')]
+        if partes and ':' in partes[0]:
+            partes[0] = partes[0].replace(':', '')
+        return os.path.join(self.destino, *partes)
+
+    @RASTREADOR.rastrear("ExtratorZip.finalizar", "download")
+    def finalizar(self, caminho_zip):
+        if not self.ativo:
+            return
+        if self._estado == 'adiado':
+            # Extrair o restante a partir do diretório central, lendo apenas
+            # as entradas que ficaram pendentes
+            with zipfile.ZipFile(caminho_zip) as zf:
+                for info in zf.infolist():
+                    if info.header_offset < self.adiado_em:
+                        continue
+                    caminho = self._caminho_seguro(info.filename)
+                    if info.is_dir():
+                        os.makedirs(caminho, exist_ok=True)
+                        continue
+                    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                    # zipfile valida o CRC de cada entrada durante a leitura. Entradas
+                    # criptografadas (RuntimeError) ou com método não suportado, como
+                    # deflate64 (NotImplementedError), falham a extração; o ZIP baixado fica.
+                    try:
+                        with zf.open(info) as origem, open(caminho, 'wb') as destino:
+                            shutil.copyfileobj(origem, destino, 65536)
+                    except (RuntimeError, NotImplementedError) as e:
+                        if os.path.exists(caminho):
+                            os.remove(caminho)
+                        raise zipfile.BadZipFile(f"A entrada '{info.filename}' não pode ser extraída: {e}")
+                    self.extraidos.append(info.filename)
+        elif self._estado != 'fim':
+            self.abortar()
+            raise zipfile.BadZipFile("ZIP incompleto: o download terminou no meio de uma entrada.")
+
+    def abortar(self):
+        if self._entrada and self._entrada["arquivo"]:
+            self._entrada["arquivo"].close()
+        self._entrada = None
+        self.ativo = False
+
+# Erro levantado pelo watchdog quando a vazão fica abaixo do limite
+class TransferenciaTravada(Exception):
+    pass
+
+# Erro levantado quando não há espaço (ou cota) para o download
+class EspacoInsuficiente(Exception):
+    def __init__(self, mensagem, necessario):
+        super().__init__(mensagem)
+        self.necessario = necessario
+
+# Tamanho total dos arquivos de uma pasta (incluindo subpastas)
+def tamanho_pasta(pasta):
+    total = 0
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            try:
+                total += os.path.getsize(os.path.join(raiz, nome))
+            except OSError:
+                pass
+    return total
+
+# Reservas de espaço dos downloads em andamento, para que downloads simultâneos
+# não contem o mesmo espaço livre duas vezes
+class ReservasDisco:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reservas = {}  # download_id -> [volume, pasta, bytes restantes]
+
+    def reservar(self, chave, pasta, necessario, reserva_minima=0, cota=0):
+        with self._lock:
+            volume = os.stat(pasta).st_dev
+            outras = [r for c, r in self._reservas.items() if c != chave]
+            livre = shutil.disk_usage(pasta).free - reserva_minima
+            livre -= sum(r[2] for r in outras if r[0] == volume)
+            if necessario > livre:
+                raise EspacoInsuficiente(
+                    f"Espaço insuficiente em disco: são necessários {necessario / 2**20:.1f} MB, "
+                    f"disponíveis {max(livre, 0) / 2**20:.1f} MB.",
+                    necessario
+                )
+            if cota:
+                usado = tamanho_pasta(pasta) + sum(r[2] for r in outras if r[1] == pasta)
+                if usado + necessario > cota:
+                    raise EspacoInsuficiente(
+                        f"Cota de downloads excedida: {usado / 2**20:.1f} MB usados de {cota / 2**20:.1f} MB, "
+                        f"são necessários mais {necessario / 2**20:.1f} MB.",
+                        necessario
+                    )
+            self._reservas[chave] = [volume, pasta, necessario]
+
+    def atualizar(self, chave, restante):
+        reserva = self._reservas.get(chave)
+        if reserva:
+            reserva[2] = max(restante, 0)
+
+    def restante(self, chave):
+        reserva = self._reservas.get(chave)
+        return reserva[2] if reserva else 0
+
+    def liberar(self, chave):
+        with self._lock:
+            self._reservas.pop(chave, None)
+
+RESERVAS_DISCO = ReservasDisco()
+
+# Erro levantado quando a URL leva a uma página sem link de download reconhecível
+class LinkNaoResolvido(requests.exceptions.RequestException):
+    pass
+
+# Erros de rede que valem uma nova tentativa (4xx, exceto 408/425/429, não mudam ao repetir)
+def erro_retentavel(e):
+    if isinstance(e, LinkNaoResolvido):
+        return False
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+        status = e.response.status_code
+        return status in (408, 425, 429) or status >= 500
+    return True
+
+# Descrição curta do motivo de uma falha, para a coluna de status
+def descrever_erro(e):
+    if isinstance(e, (TransferenciaTravada, LinkNaoResolvido)):
+        return str(e)
+    if isinstance(e, requests.exceptions.ConnectTimeout):
+        return "Timeout de conexão"
+    if isinstance(e, requests.exceptions.ReadTimeout):
+        return "Timeout de leitura"
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+        return f"HTTP {e.response.status_code}"
+    if isinstance(e, requests.exceptions.ConnectionError):
+        return "Falha de conexão"
+    return e.__class__.__name__
+
+# Interrompe uma resposta lida por outra thread. Só fechar a resposta não desbloqueia uma
+# leitura em andamento: o socket sob o arquivo da resposta (urllib3 > http.client > socket)
+# é desligado para que o recv retorne na hora.
+def interromper_resposta(response):
+    arquivo = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+    sock = getattr(getattr(arquivo, 'raw', None), '_sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+# Espera exponencial com jitter antes da próxima tentativa
+def calcular_backoff(tentativa, base, maximo):
+    return min(maximo, base * 2 ** (tentativa - 1)) * random.uniform(0.5, 1.0)
+
+def _minutos(horario):
+    horas, minutos = horario.split(':')
+    return int(horas) * 60 + int(minutos)
+
+# Janela fora de pico aberta no momento (ou None)
+def janela_ativa(janelas, agora=None):
+    local = time.localtime(agora)
+    minuto = local.tm_hour * 60 + local.tm_min
+    for janela in janelas:
+        inicio, fim = _minutos(janela['inicio']), _minutos(janela['fim'])
+        if (inicio <= minuto < fim) if inicio < fim else (minuto >= inicio or minuto < fim):
+            return janela
+    return None
+
+# Horário de abertura da próxima janela, para exibir na tabela
+def proxima_janela(janelas, agora=None):
+    local = time.localtime(agora)
+    minuto = local.tm_hour * 60 + local.tm_min
+    inicios = sorted(_minutos(janela['inicio']) for janela in janelas)
+    if not inicios:
+        return None
+    proximo = next((inicio for inicio in inicios if inicio > minuto), inicios[0])
+    return f"{proximo // 60:02d}:{proximo % 60:02d}"
+
+# Limite de banda compartilhado pelos downloads fora de pico (0 = sem limite).
+# Cada bloco recebido reserva seu tempo de transmissão; quem passar do ritmo espera.
+class LimitadorBanda:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bps = 0
+        self._proximo = time.monotonic()
+
+    def definir(self, bps):
+        with self.lock:
+            if bps != self.bps:
+                self.bps = bps
+                self._proximo = time.monotonic()
+
+    def consumir(self, n):
+        with self.lock:
+            if not self.bps:
+                return
+            agora = time.monotonic()
+            self._proximo = max(self._proximo, agora) + n / self.bps
+            espera = self._proximo - agora
+        if espera > 0:
+            time.sleep(espera)
+
+LIMITE_FORA_PICO = LimitadorBanda()
+
+# Corpo de uma resposta httpx exposto como o "raw" que o requests espera
+class CorpoHttp2:
+    def __init__(self, resposta):
+        self._resposta = resposta
+        self._partes = resposta.iter_raw()
+        self._buffer = bytearray()
+        self.versao = resposta.http_version
+
+    def read(self, amt=None, **kwargs):
+        try:
+            while amt is None or len(self._buffer) < amt:
+                parte = next(self._partes, b'')
+                if not parte:
+                    break
+                self._buffer += parte
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(e)
+        except (httpx.TransportError, httpx.StreamError) as e:
+            raise requests.exceptions.ConnectionError(e)
+        if amt is None:
+            amt = len(self._buffer)
+        dados = bytes(self._buffer[:amt])
+        del self._buffer[:amt]
+        return dados
+
+    def close(self):
+        self._resposta.close()
+
+# Transporte HTTP/2 para o requests: as sessões compartilham um cliente httpx por
+# combinação de verify/cert/proxy, que multiplexa os downloads de uma mesma origem em
+# uma única conexão. Servidores que não negociam h2 (ALPN) seguem em HTTP/1.1 pelo mesmo cliente.
+class AdaptadorHttp2(BaseAdapter):
+    _clientes = {}  # (verify, cert, proxy) -> httpx.Client
+    _lock = threading.Lock()
+
+    # Cabeçalhos de conexão não existem no HTTP/2
+    CABECALHOS_IGNORADOS = ('connection', 'keep-alive', 'transfer-encoding', 'upgrade')
+
+    # O requests já resolveu proxy e certificados do ambiente (HTTPS_PROXY, NO_PROXY,
+    # REQUESTS_CA_BUNDLE): o httpx recebe o resultado e não relê o ambiente
+    @classmethod
+    def cliente(cls, verify=True, cert=None, proxy=None):
+        chave = (verify, cert, proxy)
+        with cls._lock:
+            if chave not in cls._clientes:
+                # O httpx só aceita um caminho de CA na forma de contexto SSL
+                if isinstance(verify, str):
+                    if os.path.isdir(verify):
+                        verify = ssl.create_default_context(capath=verify)
+                    else:
+                        verify = ssl.create_default_context(cafile=verify)
+                    if cert:
+                        verify.load_cert_chain(*((cert,) if isinstance(cert, str) else cert))
+                        cert = None
+                transporte = httpx.HTTPTransport(
+                    http2=True, verify=verify, cert=cert, proxy=httpx.Proxy(proxy) if proxy else None
+                )
+                cls._clientes[chave] = httpx.Client(transport=transporte, trust_env=False)
+            return cls._clientes[chave]
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        else:
+            timeout = httpx.Timeout(timeout)
+        headers = {
+            nome: valor for nome, valor in request.headers.items()
+            if nome.lower() not in self.CABECALHOS_IGNORADOS
+        }
+        # O corpo é repassado sem descompactar, como no raw do requests
+        headers['Accept-Encoding'] = 'identity'
+
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        proxy = requests.utils.select_proxy(request.url, proxies or {})
+        cliente = self.cliente(verify, cert, proxy)
+        try:
+            pedido = cliente.build_request(
+                request.method, request.url, headers=headers, content=request.body, timeout=timeout
+            )
+            resposta = cliente.send(pedido, stream=True)
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(e, request=request)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+
+        response = requests.Response()
+        response.status_code = resposta.status_code
+        response.reason = resposta.reason_phrase
+        response.headers = CaseInsensitiveDict(resposta.headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.raw = CorpoHttp2(resposta)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        if not stream:
+            response.content
+        return response
+
+    def close(self):
+        # O cliente é compartilhado entre as sessões e vive até o fim do processo
+        pass
+
+# Pool de conexões HTTP/1.1 compartilhado por todas as sessões, para que uma conexão
+# aberta no pré-aquecimento seja reaproveitada pelo download
+ADAPTADOR_HTTP = requests.adapters.HTTPAdapter(pool_connections=20, pool_maxsize=20)
+
+# Sessão HTTP de um download; com HTTP/2 ativo, as origens https passam pelo adaptador
+def nova_sessao(config):
+    sessao = requests.Session()
+    sessao.mount('http://', ADAPTADOR_HTTP)
+    sessao.mount('https://', ADAPTADOR_HTTP)
+    if config.get('http2') and HTTP2_DISPONIVEL:
+        sessao.mount('https://', AdaptadorHttp2())
+    return sessao
+
+# Sessão HTTP reaproveitada pelos downloads que rodam na mesma thread do pool
+_SESSOES = threading.local()
+
+def sessao_da_thread(config):
+    chave = bool(config.get('http2') and HTTP2_DISPONIVEL)
+    sessoes = getattr(_SESSOES, 'sessoes', None)
+    if sessoes is None:
+        sessoes = _SESSOES.sessoes = {}
+    if chave not in sessoes:
+        sessoes[chave] = nova_sessao(config)
+    return sessoes[chave]
+
+# Cache de DNS com TTL, compartilhado pelo processo inteiro (requests e httpx
+# resolvem nomes por socket.getaddrinfo). Falhas de resolução não ficam em cache.
+# Guarda no máximo MAXIMO consultas, descartando as usadas há mais tempo.
+class CacheDns:
+    MAXIMO = 512
+
+    def __init__(self):
+        self.ttl = 300
+        self._original = socket.getaddrinfo
+        self._instalado = False
+        self._entradas = OrderedDict()  # chave -> (expira, resultado), da menos à mais recente
+        self._lock = threading.Lock()
+
+    def instalar(self, ttl):
+        self.ttl = ttl
+        if ttl <= 0:
+            self.desinstalar()
+        elif not self._instalado:
+            self._original = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo
+            self._instalado = True
+
+    # Devolve ao processo a resolução original (ao fechar a janela)
+    def desinstalar(self):
+        if self._instalado:
+            # Só restaurar se ninguém substituiu a função depois de nós
+            if socket.getaddrinfo == self.getaddrinfo:
+                socket.getaddrinfo = self._original
+            self._instalado = False
+        with self._lock:
+            self._entradas.clear()
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        chave = (host, port, family, type, proto, flags)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and entrada[0] > time.monotonic():
+                self._entradas.move_to_end(chave)
+                return list(entrada[1])
+        resultado = self._original(host, port, family, type, proto, flags)
+        with self._lock:
+            self._entradas[chave] = (time.monotonic() + self.ttl, resultado)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.MAXIMO:
+                self._entradas.popitem(last=False)
+        return list(resultado)
+
+CACHE_DNS = CacheDns()
+
+# Pré-aquecimento: resolve o DNS e deixa uma conexão aberta no pool compartilhado
+# enquanto o usuário ainda escolhe onde salvar. Cada host é aquecido no máximo
+# uma vez a cada INTERVALO segundos.
+class PreAquecedor:
+    INTERVALO = 30
+
+    def __init__(self):
+        self._recentes = {}
+        self._lock = threading.Lock()
+
+    def aquecer(self, url, config):
+        host = urlparse(url or '').netloc
+        if not host or not config['preaquecer_conexoes']:
+            return
+        agora = time.monotonic()
+        with self._lock:
+            if agora - self._recentes.get(host, -self.INTERVALO) < self.INTERVALO:
+                return
+            self._recentes[host] = agora
+        threading.Thread(target=self._aquecer, args=(url, config), daemon=True).start()
+
+    def _aquecer(self, url, config):
+        # Um HEAD segue os redirecionamentos e devolve cada conexão ao pool
+        try:
+            nova_sessao(config).head(
+                url, allow_redirects=True,
+                timeout=(config['timeout_conexao'], config['timeout_leitura'])
+            )
+        except requests.exceptions.RequestException:
+            pass
+
+PRE_AQUECEDOR = PreAquecedor()
+
+TIPOS_HTML = ('text/html', 'application/xhtml+xml')
+
+# Consulta leve de um link do catálogo: HEAD e, se o servidor não informar o tamanho
+# ou recusar HEAD, um GET apenas do primeiro byte
+def sondar_url(sessao, url, timeout):
+    info = {
+        "verificado_em": time.time(),
+        "alcancavel": False,
+        "tamanho": None,
+        "ranges": False,
+        "url_final": url,
+        "modificado": "",
+        "tipo": "",
+        "problema": ""
+    }
+    try:
+        response = sessao.head(url, allow_redirects=True, timeout=timeout)
+        if response.status_code in (403, 405, 501) or 'Content-Length' not in response.headers:
+            response = sessao.get(url, headers={'Range': 'bytes=0-0'}, stream=True, allow_redirects=True, timeout=timeout)
+            response.close()
+    except requests.exceptions.RequestException as e:
+        info['problema'] = descrever_erro(e)
+        return info
+
+    info['url_final'] = response.url
+    if response.status_code >= 400:
+        info['problema'] = f"HTTP {response.status_code}"
+        return info
+    info['alcancavel'] = True
+    info['modificado'] = response.headers.get('Last-Modified', '')
+    info['tipo'] = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    try:
+        if response.status_code == 206:
+            total = response.headers.get('Content-Range', '').rpartition('/')[2]
+            info['tamanho'] = int(total) if total.isdigit() else None
+            info['ranges'] = True
+        else:
+            info['tamanho'] = int(response.headers['Content-Length']) if 'Content-Length' in response.headers else None
+            info['ranges'] = response.headers.get('Accept-Ranges', 'none').lower() == 'bytes'
+    except ValueError:
+        info['tamanho'] = None
+
+    # Link quebrado típico: página de erro ou de login no lugar do arquivo
+    if info['tipo'] in TIPOS_HTML:
+        info['problema'] = "Página HTML em vez do arquivo"
+    return info
+
+def eh_pagina_html(response):
+    return response.ok and response.headers.get('Content-Type', '').split(';')[0].strip().lower() in TIPOS_HTML
+
+# Links de compartilhamento que abrem uma página de visualização em vez do arquivo
+def reescrever_link_compartilhado(url):
+    partes = urlparse(url)
+    host = partes.netloc.lower()
+    if host in ('dropbox.com', 'www.dropbox.com'):
+        consulta = parse_qs(partes.query)
+        consulta['dl'] = ['1']
+        return partes._replace(query=urlencode(consulta, doseq=True)).geturl()
+    if host == 'drive.google.com':
+        encontrado = re.match(r'/file/d/([\w-]+)', partes.path)
+        arquivo = encontrado.group(1) if encontrado else parse_qs(partes.query).get('id', [''])[0]
+        if arquivo:
+            return f"https://drive.usercontent.google.com/download?id={arquivo}&export=download&confirm=t"
+    return url
+
+class _ColetorLinks(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self.links.append(href)
+
+# Link do arquivo dentro de uma página: regras do site primeiro, depois pela extensão
+def localizar_link_download(pagina, html, regras, extensoes):
+    coletor = _ColetorLinks()
+    coletor.feed(html)
+    links = [urljoin(pagina, href.strip()) for href in coletor.links]
+    for regra in regras:
+        if re.search(regra['pagina'], pagina):
+            for link in links:
+                if re.search(regra['link'], link):
+                    return link
+    for link in links:
+        partes = urlparse(link)
+        caminho = unquote(partes.path).lower()
+        if any(caminho.endswith(extensao) for extensao in extensoes) or \
+                reescrever_link_compartilhado(link) != link:
+            return link
+    return None
+
+# Cache dos links diretos encontrados em páginas de produto, com validade,
+# para que os próximos downloads não precisem buscar a página
+class ResolvedorLinks:
+    def __init__(self, arquivo=LINKS_FILE):
+        self.arquivo = arquivo
+        self._lock = threading.Lock()
+        self._links = {}  # URL do catálogo -> {"url": link direto, "expira": timestamp}
+        if os.path.exists(arquivo):
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                try:
+                    self._links = json.load(f)
+                except json.JSONDecodeError:
+                    pass
+
+    # URL a usar no download: link já resolvido ou link de compartilhamento reescrito
+    def url_direta(self, url):
+        entrada = self._links.get(url)
+        if entrada and entrada['expira'] > time.time():
+            return entrada['url']
+        return reescrever_link_compartilhado(url)
+
+    def resolvido(self, url):
+        return url in self._links
+
+    def resolver(self, url, sessao, timeout, config):
+        response = sessao.get(reescrever_link_compartilhado(url), allow_redirects=True, timeout=timeout)
+        response.raise_for_status()
+        if not eh_pagina_html(response):
+            return response.url
+        direta = localizar_link_download(
+            response.url, response.text, config['regras_links'], config['extensoes_download']
+        )
+        if not direta:
+            raise LinkNaoResolvido("Página HTML sem link de download reconhecível")
+        direta = reescrever_link_compartilhado(direta)
+        with self._lock:
+            self._links[url] = {"url": direta, "expira": time.time() + config['links_ttl']}
+            with open(self.arquivo, 'w', encoding='utf-8') as f:
+                json.dump(self._links, f, indent=4, ensure_ascii=False)
+        return direta
+
+RESOLVEDOR_LINKS = ResolvedorLinks()
+
+# Servidor HTTP do cache entre pares: entrega arquivos verificados pelo checksum
+#   GET /indice            - lista JSON dos checksums disponíveis
+#   GET /drivers/<sha256>  - conteúdo do arquivo (aceita Range)
+class ParesHandler(http.server.BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        self._responder(False)
+
+    def do_GET(self):
+        self._responder(True)
+
+    def _responder(self, corpo):
+        cache = self.server.cache
+        if self.path == '/indice':
+            dados = json.dumps(cache.checksums()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            if corpo:
+                self.wfile.write(dados)
+            return
+
+        caminho = None
+        if self.path.startswith('/drivers/'):
+            caminho = cache.caminho(self.path[len('/drivers/'):])
+        if caminho is None:
+            self.send_error(404)
+            return
+
+        tamanho = os.path.getsize(caminho)
+        inicio = 0
+        intervalo = self.headers.get('Range', '')
+        if intervalo.startswith('bytes=') and intervalo.endswith('-') and intervalo[6:-1].isdigit():
+            inicio = int(intervalo[6:-1])
+            if inicio >= tamanho:
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {inicio}-{tamanho - 1}/{tamanho}')
+        else:
+            self.send_response(200)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(tamanho - inicio))
+        self.end_headers()
+        if corpo:
+            with open(caminho, 'rb') as f:
+                f.seek(inicio)
+                shutil.copyfileobj(f, self.wfile, 65536)
+
+    def log_message(self, format, *args):
+        pass
+
+# Cache entre pares da rede local: registra downloads verificados, serve-os por HTTP
+# e descobre outros pares por broadcast UDP (além da lista configurada)
+class CachePares:
+    ANUNCIO = b'GERALDIVERS1'
+
+    def __init__(self, arquivo=PARES_FILE):
+        self.arquivo = arquivo
+        self.id = uuid.uuid4().hex
+        self.porta = None
+        self._lock = threading.Lock()
+        self._arquivos = {}  # sha256 -> [caminho, tamanho]
+        self._descobertos = {}  # "host:porta" -> último anúncio
+        self._servidor = None
+        self._parar = threading.Event()
+        self._recarregar()
+
+    # O motor de downloads separado também registra arquivos: mesclar com o que está no disco
+    def _recarregar(self):
+        if os.path.exists(self.arquivo):
+            with open(self.arquivo, 'r', encoding='utf-8') as f:
+                try:
+                    self._arquivos.update(json.load(f))
+                except json.JSONDecodeError:
+                    pass
+
+    def registrar(self, checksum, caminho):
+        with self._lock:
+            self._recarregar()
+            self._arquivos[checksum.lower()] = [os.path.abspath(caminho), os.path.getsize(caminho)]
+            with open(self.arquivo, 'w', encoding='utf-8') as f:
+                json.dump(self._arquivos, f, indent=4, ensure_ascii=False)
+
+    def caminho(self, checksum):
+        if checksum.lower() not in self._arquivos:
+            with self._lock:
+                self._recarregar()
+        entrada = self._arquivos.get(checksum.lower())
+        # Arquivos apagados ou alterados depois do registro não são servidos
+        if entrada and os.path.isfile(entrada[0]) and os.path.getsize(entrada[0]) == entrada[1]:
+            return entrada[0]
+        return None
+
+    def checksums(self):
+        return [checksum for checksum in list(self._arquivos) if self.caminho(checksum)]
+
+    def iniciar(self, porta=0, porta_descoberta=0, endereco='127.0.0.1'):
+        if self._servidor:
+            return
+        self._servidor = http.server.ThreadingHTTPServer((endereco, porta), ParesHandler)
+        self._servidor.daemon_threads = True
+        self._servidor.cache = self
+        self.porta = self._servidor.server_address[1]
+        self._parar.clear()
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        if porta_descoberta:
+            threading.Thread(target=self._descobrir, args=(porta_descoberta,), daemon=True).start()
+
+    def parar(self):
+        if self._servidor:
+            self._parar.set()
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+            self.porta = None
+
+    def _descobrir(self, porta_descoberta):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        try:
+            sock.bind(('', porta_descoberta))
+        except OSError:
+            sock.close()
+            return
+        sock.settimeout(1)
+        proximo_anuncio = 0
+        with sock:
+            while not self._parar.is_set():
+                if time.monotonic() >= proximo_anuncio:
+                    anuncio = b' '.join([self.ANUNCIO, self.id.encode(), str(self.porta).encode()])
+                    try:
+                        sock.sendto(anuncio, ('<broadcast>', porta_descoberta))
+                    except OSError:
+                        pass
+                    proximo_anuncio = time.monotonic() + 10
+                try:
+                    dados, (host, _) = sock.recvfrom(256)
+                except OSError:
+                    continue
+                partes = dados.split()
+                if len(partes) == 3 and partes[0] == self.ANUNCIO and partes[1] != self.id.encode() \
+                        and partes[2].isdigit():
+                    self._descobertos[f"{host}:{int(partes[2])}"] = time.monotonic()
+
+    # Pares a consultar: lista configurada primeiro, depois os anunciados no último minuto
+    def pares(self, configurados=()):
+        proprios = {f"{host}:{self.porta}" for host in ('127.0.0.1', 'localhost')}
+        agora = time.monotonic()
+        descobertos = [par for par, visto in list(self._descobertos.items()) if agora - visto < 60]
+        vistos = set()
+        resultado = []
+        for par in list(configurados) + descobertos:
+            if par not in proprios and par not in vistos:
+                vistos.add(par)
+                resultado.append(par)
+        return resultado
+
+CACHE_PARES = CachePares()
+
+# Pacote offline (lojas sem internet): um ZIP com o catálogo e os binários verificados do cache.
+#   catalogo.json            - lista de drivers, como o drivers.json
+#   arquivos/<sha256>/<nome> - binários
+#   manifesto.json           - {"formato": 1, "arquivos": [{"arquivo": ..., "sha256": chave no catálogo,
+#                               "checksum": "sha256:... blake2b:...", "tamanho": N}]}
+# Os binários passam em fatias de LEITURA_HASH, sem cópias intermediárias em disco.
+PACOTE_FORMATO = 1
+
+# Função para exportar o pacote; retorna (arquivos incluídos, arquivos que não conferem com o catálogo)
+def exportar_pacote(caminho, drivers, progresso=None):
+    arquivos = {}
+    for driver in drivers:
+        sha256 = ler_checksums(driver.get('checksum')).get(ALGORITMO_PADRAO)
+        origem = CACHE_PARES.caminho(sha256) if sha256 else None
+        if origem and sha256 not in arquivos:
+            arquivos[sha256] = origem
+    total = sum(os.path.getsize(origem) for origem in arquivos.values()) or 1
+    enviados = 0
+    manifesto = []
+    divergentes = 0
+    parcial = caminho + '.parcial'
+    try:
+        with zipfile.ZipFile(parcial, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as pacote:
+            pacote.writestr('catalogo.json', json.dumps([dict(driver) for driver in drivers], indent=4,
+                                                        ensure_ascii=False))
+            for sha256, origem in arquivos.items():
+                nome = f"arquivos/{sha256}/{os.path.basename(origem)}"
+                funcoes = {algoritmo: hashlib.new(algoritmo) for algoritmo in ALGORITMOS_AUTOMATICOS}
+                tamanho = 0
+                with open(origem, 'rb') as entrada, pacote.open(nome, 'w', force_zip64=True) as saida:
+                    for bloco in iter(lambda: entrada.read(LEITURA_HASH), b""):
+                        saida.write(bloco)
+                        for funcao in funcoes.values():
+                            funcao.update(bloco)
+                        tamanho += len(bloco)
+                        enviados += len(bloco)
+                        if progresso:
+                            progresso(enviados / total)
+                digests = {algoritmo: funcao.hexdigest() for algoritmo, funcao in funcoes.items()}
+                # Arquivo alterado depois de entrar no cache: a importação vai recusá-lo
+                if digests[ALGORITMO_PADRAO] != sha256:
+                    divergentes += 1
+                manifesto.append({"arquivo": nome, "sha256": sha256, "checksum": formatar_checksums(digests),
+                                  "tamanho": tamanho})
+            pacote.writestr('manifesto.json', json.dumps({"formato": PACOTE_FORMATO, "arquivos": manifesto}))
+        os.replace(parcial, caminho)
+    finally:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+    return len(arquivos), divergentes
+
+# Função para importar o pacote: os binários são verificados e gravados direto no cache, em paralelo.
+# Retorna (drivers do catálogo, arquivos importados, arquivos recusados, falhas de gravação),
+# com uma mensagem "arquivo: erro" por entrada que não pôde ser gravada.
+def importar_pacote(caminho, paralelos=4, progresso=None, destino=CACHE_DIR):
+    with zipfile.ZipFile(caminho) as pacote:
+        drivers = json.loads(pacote.read('catalogo.json'))
+        manifesto = json.loads(pacote.read('manifesto.json'))
+    if manifesto.get('formato') != PACOTE_FORMATO:
+        raise ValueError("Formato de pacote não suportado.")
+    entradas = manifesto['arquivos']
+    total = sum(entrada['tamanho'] for entrada in entradas) or 1
+    lock = threading.Lock()
+    recebidos = [0]
+
+    def contar(n):
+        with lock:
+            recebidos[0] += n
+            if progresso:
+                progresso(recebidos[0] / total)
+
+    def extrair(entrada):
+        sha256 = entrada['sha256'].lower()
+        esperados = {algoritmo: digest for algoritmo, digest in ler_checksums(entrada['checksum']).items()
+                     if algoritmo in hashlib.algorithms_available}
+        # Só o layout do exportador (arquivos/<sha256>/<nome>): nada de '..', outras pastas ou nomes reservados
+        pasta_pacote, _, nome = entrada['arquivo'].rpartition('/')
+        if not re.fullmatch(r'[0-9a-f]{64}', sha256) or esperados.get(ALGORITMO_PADRAO) != sha256 or \
+                pasta_pacote != f'arquivos/{sha256}' or not nome_arquivo_valido(nome):
+            contar(entrada['tamanho'])
+            return False
+        if CACHE_PARES.caminho(sha256):
+            contar(entrada['tamanho'])
+            return True  # Já está no cache
+        final = os.path.join(destino, sha256, nome)
+        funcoes = {algoritmo: hashlib.new(algoritmo) for algoritmo in esperados}
+        try:
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            # Cada thread com o próprio ZipFile: as leituras não disputam a mesma posição no arquivo
+            with zipfile.ZipFile(caminho) as pacote, pacote.open(entrada['arquivo']) as origem, \
+                    open(final + '.parcial', 'wb') as saida:
+                for bloco in iter(lambda: origem.read(LEITURA_HASH), b""):
+                    saida.write(bloco)
+                    for funcao in funcoes.values():
+                        funcao.update(bloco)
+                    contar(len(bloco))
+            if {algoritmo: funcao.hexdigest() for algoritmo, funcao in funcoes.items()} != esperados:
+                os.remove(final + '.parcial')
+                return False
+            os.replace(final + '.parcial', final)
+            CACHE_PARES.registrar(sha256, final)
+        except (zipfile.BadZipFile, KeyError, zlib.error):
+            # Entrada corrompida ou ausente (CRC inválido, dados truncados)
+            descartar_parcial(final + '.parcial')
+            return False
+        except OSError as e:
+            # Falha de gravação (disco cheio, sem permissão): só esta entrada fica de fora
+            descartar_parcial(final + '.parcial')
+            return f"{nome}: {e}"
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, paralelos)) as pool:
+        resultados = list(pool.map(extrair, entradas))
+    return (drivers, resultados.count(True), resultados.count(False),
+            [resultado for resultado in resultados if isinstance(resultado, str)])
+
+def descartar_parcial(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
 
 # Classe Worker para download
-class DownloadWorker(QObject):
+# Sinais compartilhados por todos os downloads; o app identifica cada um pelo download_id
+class SinaisDownload(QObject):
     progress_changed = pyqtSignal(int, int)  # (download_id, progress)
     download_finished = pyqtSignal(int, bool, str)  # (download_id, success, message)
+    status_changed = pyqtSignal(int, str)  # (download_id, status)
 
-    def __init__(self, download_id, driver, save_path, priority=1):
+# Job de download executado por uma thread do pool (QThreadPool)
+class DownloadWorker(QRunnable):
+    def __init__(self, download_id, driver, save_path, priority=1, extrair=False, pular_existente=False, config=None,
+                 sinais=None):
         super().__init__()
+        self.sinais = sinais or SinaisDownload()
+        self.progress_changed = self.sinais.progress_changed
+        self.download_finished = self.sinais.download_finished
+        self.status_changed = self.sinais.status_changed
         self.download_id = download_id
         self.driver = driver
         self.save_path = save_path
         self.priority = priority
+        self.extrair = extrair
+        self.pular_existente = pular_existente
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.pulado = False
+        self.sem_espaco = False
+        self.espaco_necessario = 0
+        self.erro_retomavel = False
+        self.tentativas = 0
+        self.par = None
+        self.limitador = None  # LIMITE_FORA_PICO nos downloads fora de pico
+        self.sha256_manifesto = None
+        self.cache_local = False
+        self.delta = None
+        self.url_origem = None  # URL final da última transferência da origem
+        self.checksum_calculado = None
+        # Arquivo de um download idêntico já concluído por outra linha (ver DownloadCompartilhado)
+        self.origem_compartilhada = None
+        self.origem_verificada = False
+        self.compartilhado = False
+        self.http2 = False
+        self.sessao = None
+        self._extrator = None
+        self._recebidos = 0
+        self.inicio = None
+        self.host = urlparse(driver['url']).netloc
+        self.vazao_pico = 0.0
+        self._janela = (None, 0)
+        self._travado = None
         self._is_paused = False
         self._is_canceled = False
         self._mutex = QMutex()
 
     def run(self):
+        self.inicio = time.monotonic()
+        self.sessao = sessao_da_thread(self.config)
         try:
-            # Primeiro, verificar se o servidor suporta Range requests
-            head_resp = requests.head(self.driver['url'], allow_redirects=True)
-            accept_ranges = head_resp.headers.get('Accept-Ranges', 'none').lower()
+            with RASTREADOR.trecho("DownloadWorker.run", "download", download_id=self.download_id, driver=self.driver['nome']):
+                self._executar()
+        except EspacoInsuficiente as e:
+            if self._extrator:
+                self._extrator.abortar()
+            self.sem_espaco = True
+            self.espaco_necessario = e.necessario
+            self.download_finished.emit(self.download_id, False, str(e))
+        except OSError as e:
+            # Falha de escrita: o arquivo parcial é mantido para retomar depois
+            if self._extrator:
+                self._extrator.abortar()
+            if e.errno in (errno.ENOSPC, errno.EDQUOT):
+                self.sem_espaco = True
+                self.espaco_necessario = RESERVAS_DISCO.restante(self.download_id)
+            else:
+                self.erro_retomavel = True
+            self.download_finished.emit(
+                self.download_id,
+                False,
+                f"Erro de disco ao salvar '{self.save_path}': {e}. O download pode ser retomado."
+            )
+        except Exception as e:
+            # Uma exceção que escapasse do QRunnable derrubaria o processo (interface ou motor);
+            # o erro chega a quem acompanha o download pela mensagem de término
+            if self._extrator:
+                self._extrator.abortar()
+            self.download_finished.emit(
+                self.download_id,
+                False,
+                f"Erro inesperado ao baixar o driver '{self.driver['nome']}': {e}"
+            )
+        finally:
+            RESERVAS_DISCO.liberar(self.download_id)
+
+    def _executar(self):
+        # Arquivo já presente e com checksum válido: nada a baixar
+        if self.pular_existente and self.driver.get('checksum') and os.path.isfile(self.save_path):
+            if verificar_checksums(self.save_path, self.driver['checksum'], rapido=True):
+                self.pulado = True
+                self.download_finished.emit(
+                    self.download_id,
+                    True,
+                    f"Driver '{self.driver['nome']}' já estava presente e verificado."
+                )
+                return
+
+        # Cache na rede local: tentar os pares que tenham o mesmo checksum antes da origem
+        # (os pares indexam os arquivos pelo sha256)
+        concluido = False
+        verificado = False
+        checksum = ler_checksums(self.driver.get('checksum')).get(ALGORITMO_PADRAO, '')
+
+        # Download idêntico concluído por outra linha: hardlink ou cópia do arquivo dele
+        if self.origem_compartilhada:
+            self.status_changed.emit(self.download_id, "Copiando do download compartilhado")
+            if not self._vincular(self.origem_compartilhada):
+                self._emitir_cancelado()
+                return
+            self.compartilhado = concluido = True
+            verificado = self.origem_verificada
+
+        # Cache local (ex.: pacote offline importado): copiar em vez de baixar
+        local = CACHE_PARES.caminho(checksum) if checksum and not concluido else None
+        if local and os.path.abspath(local) != os.path.abspath(self.save_path):
+            self.status_changed.emit(self.download_id, "Copiando do cache local")
+            if not self._copiar_local(local):
+                self._emitir_cancelado()
+                return
+            if verificar_checksums(self.save_path, self.driver['checksum']):
+                self.cache_local = concluido = verificado = True
+            else:
+                self._descartar_copia()
+                self.status_changed.emit(self.download_id, "Baixando")
+
+        if not concluido and self.config['pares_ativo'] and checksum:
+            # O que vem de um par vai para um arquivo à parte, que só substitui o destino
+            # (talvez uma cópia antiga ou um download parcial da origem) depois de verificado
+            temporario = self.save_path + '.par'
+            for par in CACHE_PARES.pares(self.config['pares_lista']):
+                self.status_changed.emit(self.download_id, f"Baixando do par {par}")
+                self._descartar_copia(temporario)
+                try:
+                    if not self._transferir(f"http://{par}/drivers/{checksum}", (2, 10), temporario):
+                        self._descartar_copia(temporario)
+                        self._emitir_cancelado()
+                        return
+                    if verificar_checksums(temporario, self.driver['checksum']):
+                        os.replace(temporario, self.save_path)
+                        self.par = par
+                        concluido = verificado = True
+                        break
+                except (requests.exceptions.RequestException, TransferenciaTravada, zipfile.BadZipFile):
+                    pass
+                # Falha ou conteúdo divergente (ZIP corrompido, checksum errado): descartar
+                # o que o par entregou e seguir para o próximo par ou para a origem
+                self._descartar_copia(temporario)
+            if not verificado:
+                self.status_changed.emit(self.download_id, "Baixando")
+
+        # Atualização por blocos: reaproveitar o que não mudou na cópia local antiga
+        versao_nova = None
+        if not concluido and self.driver.get('manifesto') and os.path.isfile(self.save_path):
+            self.status_changed.emit(self.download_id, "Comparando com a versão local")
+            try:
+                baixados = self._atualizar_por_blocos()
+            except (requests.exceptions.RequestException, TransferenciaTravada, zipfile.BadZipFile,
+                    ValueError, KeyError, TypeError):
+                baixados = None
+                if self._extrator:
+                    self._extrator.abortar()
+                if os.path.exists(self.save_path + '.parcial'):
+                    os.remove(self.save_path + '.parcial')
+                # A cópia antiga (a única que funciona) fica no lugar: a versão completa é
+                # baixada à parte e só a substitui depois de verificada
+                versao_nova = self.save_path + '.novo'
+                self.status_changed.emit(self.download_id, "Baixando")
+            if baixados is False:
+                self._emitir_cancelado()
+                return
+            if baixados is not None:
+                self.delta = (baixados, os.path.getsize(self.save_path))
+                concluido = True
+                verificado = bool(checksum)
+
+        tentativas_max = max(1, self.config['tentativas_max'])
+        while not concluido:
+            self.tentativas += 1
+            try:
+                if not self._transferir(destino=versao_nova):
+                    self._emitir_cancelado()
+                    return
+                break
+            except (requests.exceptions.RequestException, TransferenciaTravada) as e:
+                if self._extrator:
+                    self._extrator.abortar()
+                if self._is_canceled:
+                    self._emitir_cancelado()
+                    return
+                if self.tentativas >= tentativas_max or not erro_retentavel(e):
+                    self.download_finished.emit(
+                        self.download_id,
+                        False,
+                        f"Erro ao baixar o driver após {self.tentativas} tentativa(s): {e}"
+                    )
+                    return
+                espera = calcular_backoff(self.tentativas, self.config['backoff_base'], self.config['backoff_max'])
+                retry_after = getattr(getattr(e, 'response', None), 'headers', {}).get('Retry-After', '')
+                if retry_after.isdigit():
+                    espera = max(espera, min(int(retry_after), self.config['backoff_max']))
+                self.status_changed.emit(
+                    self.download_id,
+                    f"Tentativa {self.tentativas + 1}/{tentativas_max} em {espera:.0f}s ({descrever_erro(e)})"
+                )
+                with RASTREADOR.trecho("backoff", "download", segundos=espera):
+                    aguardou = self._aguardar(espera)
+                if not aguardou:
+                    self._emitir_cancelado()
+                    return
+                self.status_changed.emit(self.download_id, f"Baixando (tentativa {self.tentativas + 1}/{tentativas_max})")
+            except zipfile.BadZipFile as e:
+                self.download_finished.emit(
+                    self.download_id,
+                    False,
+                    f"Driver '{self.driver['nome']}' baixado, mas a extração falhou: {e}"
+                )
+                return
+
+        if versao_nova:
+            esperado = self.driver.get('checksum') or (f"sha256:{self.sha256_manifesto}" if self.sha256_manifesto else "")
+            if esperado and not verificar_checksums(versao_nova, esperado):
+                os.remove(versao_nova)
+                if self._extrator:
+                    self._extrator.abortar()
+                    shutil.rmtree(self._extrator.destino, ignore_errors=True)
+                self.download_finished.emit(
+                    self.download_id,
+                    False,
+                    f"Checksum inválido para o driver '{self.driver['nome']}'. A versão anterior foi mantida."
+                )
+                return
+            os.replace(versao_nova, self.save_path)
+            verificado = bool(esperado)
 
-            supports_range = accept_ranges == 'bytes'
+        extrator = self._extrator
+        try:
+            # Verificar checksum se disponível
+            if verificado and self.par:
+                message = f"Driver '{self.driver['nome']}' obtido do par {self.par} e verificado com sucesso!"
+            elif verificado and self.cache_local:
+                message = f"Driver '{self.driver['nome']}' copiado do cache local e verificado com sucesso!"
+            elif verificado and self.compartilhado:
+                message = f"Driver '{self.driver['nome']}' obtido do download compartilhado e verificado com sucesso!"
+            elif verificado:
+                message = f"Driver '{self.driver['nome']}' baixado e verificado com sucesso!"
+            elif self.driver.get('checksum'):
+                if not verificar_checksums(self.save_path, self.driver['checksum']):
+                    os.remove(self.save_path)
+                    if extrator:
+                        extrator.abortar()
+                        shutil.rmtree(extrator.destino, ignore_errors=True)
+                    self.download_finished.emit(
+                        self.download_id,
+                        False,
+                        f"Checksum inválido para o driver '{self.driver['nome']}'. O arquivo foi removido."
+                    )
+                    return
+                message = f"Driver '{self.driver['nome']}' baixado e verificado com sucesso!"
+                verificado = True
+            elif self.compartilhado:
+                message = f"Driver '{self.driver['nome']}' obtido do download compartilhado com sucesso!"
+            else:
+                message = f"Driver '{self.driver['nome']}' baixado com sucesso!"
+                # Primeiro download confiável (da origem, por HTTPS): a interface grava os checksums
+                if self.par is None and urlparse(self.url_origem or '').scheme == 'https':
+                    digests = calcular_digests(self.save_path, ALGORITMOS_AUTOMATICOS)
+                    self.checksum_calculado = formatar_checksums(digests)
+                    checksum = digests[ALGORITMO_PADRAO]
+                    message += " Checksum registrado no catálogo."
+
+            # Concluir a extração logo após o último bloco
+            if extrator and extrator.ativo:
+                extrator.finalizar(self.save_path)
+                if extrator.extraidos:
+                    message += f" {len(extrator.extraidos)} arquivo(s) extraído(s) em '{extrator.destino}'."
+            if self.tentativas > 1:
+                message += f" ({self.tentativas} tentativas)"
+            if self.http2:
+                message += " (HTTP/2)"
+            if self.delta:
+                message += (
+                    f" Atualização por blocos: {self.delta[0] / 2**20:.1f} de "
+                    f"{self.delta[1] / 2**20:.1f} MB baixados."
+                )
+            if checksum and not self.cache_local:
+                # Disponibilizar o arquivo verificado (ou com checksum recém-calculado) para os outros pares
+                CACHE_PARES.registrar(checksum, self.save_path)
+            self.download_finished.emit(self.download_id, True, message)
+        except zipfile.BadZipFile as e:
+            self.download_finished.emit(
+                self.download_id,
+                False,
+                f"Driver '{self.driver['nome']}' baixado, mas a extração falhou: {e}"
+            )
 
-            headers = {}
-            existing_size = 0
-            if os.path.exists(self.save_path):
-                existing_size = os.path.getsize(self.save_path)
-                if supports_range:
-                    headers['Range'] = f'bytes={existing_size}-'
-                else:
-                    # Se o servidor não suporta Range, deletar o arquivo existente
+    # Descarta o que uma fonte não verificada (par ou cache local) gravou: arquivo e extração
+    def _descartar_copia(self, caminho=None):
+        caminho = caminho or self.save_path
+        if self._extrator:
+            self._extrator.abortar()
+            shutil.rmtree(self._extrator.destino, ignore_errors=True)
+            self._extrator = None
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+    # Cópia de um arquivo do cache local; retorna False se o download foi cancelado
+    @RASTREADOR.rastrear("DownloadWorker._copiar_local", "download")
+    def _copiar_local(self, origem):
+        self._extrator = ExtratorZip(pasta_extracao(self.save_path)) if self.extrair else None
+        total = os.path.getsize(origem) or 1
+        copiados = 0
+        with open(origem, 'rb') as entrada, open(self.save_path, 'wb') as saida:
+            for bloco in iter(lambda: entrada.read(LEITURA_HASH), b""):
+                if self._is_canceled:
+                    if self._extrator:
+                        self._extrator.abortar()
+                    return False
+                saida.write(bloco)
+                if self._extrator:
+                    self._extrator.alimentar(bloco)
+                copiados += len(bloco)
+                self.progress_changed.emit(self.download_id, int(100 * copiados / total))
+        return True
+
+    # Arquivo de um download idêntico: hardlink quando possível (mesmo volume e sem extração),
+    # senão cópia. Retorna False se o download foi cancelado.
+    @RASTREADOR.rastrear("DownloadWorker._vincular", "download")
+    def _vincular(self, origem):
+        if os.path.abspath(origem) == os.path.abspath(self.save_path):
+            return True
+        if not self.extrair:
+            try:
+                if os.path.exists(self.save_path):
                     os.remove(self.save_path)
-                    existing_size = 0
-
-            response = requests.get(self.driver['url'], stream=True, headers=headers, allow_redirects=True)
-            if response.status_code == 416:
-                # Requested Range Not Satisfiable
-                # Isso pode ocorrer se o arquivo já foi completamente baixado
-                # Ou se o Range solicitado está fora dos limites
-                # Nesse caso, deletar o arquivo e tentar novamente
-                os.remove(self.save_path)
-                response = requests.get(self.driver['url'], stream=True, allow_redirects=True)
+                os.link(origem, self.save_path)
+                self.progress_changed.emit(self.download_id, 100)
+                return True
+            except OSError:
+                pass
+        return self._copiar_local(origem)
+
+    # Uma tentativa de transferência de url (padrão: a origem do driver) para destino
+    # (padrão: save_path); retoma por Range a partir do que já está no disco.
+    # Retorna False se o download foi cancelado.
+    @RASTREADOR.rastrear("DownloadWorker._transferir", "download")
+    def _transferir(self, url=None, timeout=None, destino=None):
+        timeout = timeout or (self.config['timeout_conexao'], self.config['timeout_leitura'])
+        destino = destino or self.save_path
+        origem = url is None
+        if origem:
+            url = RESOLVEDOR_LINKS.url_direta(self.driver['url'])
+        self._extrator = None
+
+        # Primeiro, verificar se o servidor suporta Range requests
+        with RASTREADOR.trecho("HEAD", "rede", url=url):
+            head_resp = self.sessao.head(url, allow_redirects=True, timeout=timeout)
+        # Página de produto no lugar do arquivo (ou link resolvido que deixou de existir):
+        # seguir pelo link real
+        if origem and (eh_pagina_html(head_resp) or
+                       head_resp.status_code in (404, 410) and RESOLVEDOR_LINKS.resolvido(self.driver['url'])):
+            return self._transferir(self._resolver_link(timeout), timeout, destino)
+        accept_ranges = head_resp.headers.get('Accept-Ranges', 'none').lower()
+
+        supports_range = accept_ranges == 'bytes'
+
+        headers = {}
+        existing_size = 0
+        if os.path.exists(destino):
+            existing_size = os.path.getsize(destino)
+            if supports_range:
+                headers['Range'] = f'bytes={existing_size}-'
+            else:
+                # Se o servidor não suporta Range, deletar o arquivo existente
+                os.remove(destino)
                 existing_size = 0
-                if response.status_code != 200:
-                    raise requests.exceptions.RequestException(f"Erro ao baixar o driver: {response.status_code} {response.reason}")
 
-            response.raise_for_status()
+        with RASTREADOR.trecho("GET", "rede", url=url, inicio=existing_size):
+            response = self.sessao.get(url, stream=True, headers=headers, allow_redirects=True, timeout=timeout)
+        if response.status_code == 416:
+            # Requested Range Not Satisfiable
+            # Isso pode ocorrer se o arquivo já foi completamente baixado
+            # Ou se o Range solicitado está fora dos limites
+            # Nesse caso, deletar o arquivo e tentar novamente
+            os.remove(destino)
+            response = self.sessao.get(url, stream=True, allow_redirects=True, timeout=timeout)
+            existing_size = 0
 
-            total_length = response.headers.get('content-length')
-            if total_length is not None:
-                total_length = int(total_length) + existing_size
-            else:
-                total_length = None
+        response.raise_for_status()
+        if eh_pagina_html(response):
+            response.close()
+            if origem:
+                return self._transferir(self._resolver_link(timeout), timeout, destino)
+            raise LinkNaoResolvido("O servidor devolveu uma página HTML em vez do arquivo")
+        self.host = urlparse(response.url).netloc
+        if origem:
+            self.url_origem = response.url
+        self.http2 = getattr(response.raw, 'versao', None) == 'HTTP/2'
+        if existing_size > 0 and response.status_code != 206:
+            # O servidor ignorou o Range: recomeçar do zero
+            existing_size = 0
 
-            mode = 'ab' if existing_size > 0 else 'wb'
-            with open(self.save_path, mode) as f:
+        total_length = response.headers.get('content-length')
+        if total_length is not None:
+            total_length = int(total_length) + existing_size
+        else:
+            total_length = None
+
+        # Verificação de espaço livre (e cota) antes de escrever
+        if total_length:
+            try:
+                RESERVAS_DISCO.reservar(
+                    self.download_id,
+                    os.path.dirname(os.path.abspath(destino)),
+                    total_length - existing_size,
+                    self.config['reserva_disco_mb'] * 2**20,
+                    self.config['cota_mb'] * 2**20
+                )
+            except EspacoInsuficiente:
+                response.close()
+                raise
+
+        # Extração do ZIP em paralelo à gravação
+        extrator = None
+        if self.extrair:
+            extrator = ExtratorZip(pasta_extracao(self.save_path))
+            if existing_size > 0:
+                # Download retomado: a parte já baixada precisa passar pelo extrator
+                with open(destino, 'rb') as parcial:
+                    for bloco in iter(lambda: parcial.read(65536), b""):
+                        extrator.alimentar(bloco)
+        self._extrator = extrator
+
+        # Watchdog em thread própria: a leitura de um bloco pode ficar presa
+        # indefinidamente num servidor que envia poucos bytes por vez
+        self._travado = None
+        parar_watchdog = threading.Event()
+        if self.config['watchdog_segundos']:
+            threading.Thread(target=self._vigiar, args=(response, parar_watchdog), daemon=True).start()
+
+        mode = 'ab' if existing_size > 0 else 'wb'
+        try:
+            with open(destino, mode) as f:
                 dl = existing_size
                 for data in response.iter_content(chunk_size=4096):
                     if self._is_canceled:
-                        self.download_finished.emit(
-                            self.download_id,
-                            False,
-                            f"Download do driver '{self.driver['nome']}' cancelado pelo usuário."
-                        )
-                        return
+                        if extrator:
+                            extrator.abortar()
+                        return False
                     while self._is_paused:
                         QtCore.QThread.msleep(100)
                         if self._is_canceled:
-                            self.download_finished.emit(
-                                self.download_id,
-                                False,
-                                f"Download do driver '{self.driver['nome']}' cancelado pelo usuário."
-                            )
-                            return
+                            if extrator:
+                                extrator.abortar()
+                            return False
                     if not data:
                         break
                     f.write(data)
+                    if extrator:
+                        extrator.alimentar(data)
                     dl += len(data)
+                    self._contar_bytes(len(data))
+                    if self.limitador:
+                        self.limitador.consumir(len(data))
+                    if total_length:
+                        RESERVAS_DISCO.atualizar(self.download_id, total_length - dl)
                     if total_length:
                         done = int(100 * dl / total_length)
                         self.progress_changed.emit(self.download_id, done)
-            # Verificar checksum se disponível
-            if 'checksum' in self.driver and self.driver['checksum']:
-                downloaded_checksum = calcular_checksum(self.save_path, 'sha256')
-                if downloaded_checksum.lower() == self.driver['checksum'].lower():
-                    self.download_finished.emit(
-                        self.download_id,
-                        True,
-                        f"Driver '{self.driver['nome']}' baixado e verificado com sucesso!"
-                    )
+        except Exception:
+            if self._travado is not None:
+                raise TransferenciaTravada(f"Transferência travada ({self._travado:.0f} B/s)")
+            raise
+        finally:
+            parar_watchdog.set()
+
+        if self._travado is not None:
+            raise TransferenciaTravada(f"Transferência travada ({self._travado:.0f} B/s)")
+        if total_length and dl < total_length:
+            raise requests.exceptions.ChunkedEncodingError(
+                f"Resposta incompleta: {dl} de {total_length} bytes"
+            )
+        return True
+
+    # Bytes recebidos (para o watchdog e o histórico) e pico de vazão em janelas de 1 segundo
+    def _contar_bytes(self, n):
+        self._recebidos += n
+        agora = time.monotonic()
+        inicio, base = self._janela
+        if inicio is None:
+            self._janela = (agora, self._recebidos - n)
+        elif agora - inicio >= 1.0:
+            self.vazao_pico = max(self.vazao_pico, (self._recebidos - base) / (agora - inicio))
+            self._janela = (agora, self._recebidos)
+
+    # Fecha a resposta se a vazão ficar abaixo de watchdog_bps por watchdog_segundos
+    def _vigiar(self, response, parar):
+        segundos = self.config['watchdog_segundos']
+        inicio = time.monotonic()
+        base = self._recebidos
+        while not parar.wait(0.5):
+            if self._is_paused:
+                # O tempo em pausa não conta para o watchdog
+                inicio = time.monotonic()
+                base = self._recebidos
+                continue
+            decorrido = time.monotonic() - inicio
+            if decorrido >= segundos:
+                taxa = (self._recebidos - base) / decorrido
+                if taxa < self.config['watchdog_bps']:
+                    self._travado = taxa
+                    interromper_resposta(response)
+                    return
+                inicio = time.monotonic()
+                base = self._recebidos
+
+    @RASTREADOR.rastrear("DownloadWorker._resolver_link", "download")
+    def _resolver_link(self, timeout):
+        self.status_changed.emit(self.download_id, "Localizando o link do arquivo")
+        url = RESOLVEDOR_LINKS.resolver(self.driver['url'], self.sessao, timeout, self.config)
+        self.status_changed.emit(self.download_id, "Baixando")
+        return url
+
+    # Reconstrói a nova versão a partir da cópia local e do manifesto de blocos,
+    # buscando por Range apenas os trechos que mudaram. Retorna os bytes baixados
+    # ou False se o download foi cancelado.
+    @RASTREADOR.rastrear("DownloadWorker._atualizar_por_blocos", "download")
+    def _atualizar_por_blocos(self):
+        timeout = (self.config['timeout_conexao'], self.config['timeout_leitura'])
+        resposta = self.sessao.get(self.driver['manifesto'], timeout=timeout)
+        resposta.raise_for_status()
+        manifesto = resposta.json()
+        if manifesto.get('formato') != 1:
+            raise ValueError("Formato de manifesto não suportado.")
+        checksum = ler_checksums(self.driver.get('checksum')).get(ALGORITMO_PADRAO)
+        if checksum and manifesto['sha256'].lower() != checksum:
+            raise ValueError("O manifesto não corresponde ao checksum do catálogo.")
+        # Sem checksum no catálogo, o do manifesto verifica também um download completo
+        self.sha256_manifesto = manifesto['sha256'].lower()
+
+        tamanho = manifesto['tamanho']
+        bloco = manifesto['bloco']
+        total_blocos = len(manifesto['fortes'])
+
+        # Cópia local já é a versão do manifesto
+        if os.path.getsize(self.save_path) == tamanho and \
+                calcular_checksum(self.save_path, 'sha256') == manifesto['sha256'].lower():
+            return 0
+
+        head_resp = self.sessao.head(RESOLVEDOR_LINKS.url_direta(self.driver['url']), allow_redirects=True, timeout=timeout)
+        head_resp.raise_for_status()
+        if head_resp.headers.get('Accept-Ranges', 'none').lower() != 'bytes':
+            raise ValueError("O servidor não aceita Range.")
+        url = head_resp.url
+        self.host = urlparse(url).netloc
+
+        encontrados = localizar_blocos(self.save_path, manifesto)
+        RESERVAS_DISCO.reservar(
+            self.download_id,
+            os.path.dirname(os.path.abspath(self.save_path)),
+            tamanho,
+            self.config['reserva_disco_mb'] * 2**20,
+            self.config['cota_mb'] * 2**20
+        )
+
+        extrator = None
+        if self.extrair:
+            extrator = ExtratorZip(pasta_extracao(self.save_path))
+        self._extrator = extrator
+
+        temporario = self.save_path + '.parcial'
+        hash_func = hashlib.sha256()
+        baixados = 0
+
+        with open(self.save_path, 'rb') as antigo, open(temporario, 'wb') as novo:
+            def escrever(dados):
+                novo.write(dados)
+                hash_func.update(dados)
+                if extrator:
+                    extrator.alimentar(dados)
+
+            i = 0
+            while i < total_blocos:
+                while self._is_paused and not self._is_canceled:
+                    QtCore.QThread.msleep(100)
+                if self._is_canceled:
+                    break
+                if i in encontrados:
+                    antigo.seek(encontrados[i])
+                    escrever(antigo.read(min(bloco, tamanho - i * bloco)))
+                    i += 1
                 else:
-                    os.remove(self.save_path)
-                    self.download_finished.emit(
-                        self.download_id,
-                        False,
-                        f"Checksum inválido para o driver '{self.driver['nome']}'. O arquivo foi removido."
+                    # Trecho contínuo de blocos ausentes em uma única requisição
+                    j = i
+                    while j < total_blocos and j not in encontrados:
+                        j += 1
+                    inicio = i * bloco
+                    fim = min(j * bloco, tamanho) - 1
+                    if not self._baixar_trecho(url, inicio, fim, escrever, timeout):
+                        break
+                    baixados += fim - inicio + 1
+                    i = j
+                self.progress_changed.emit(self.download_id, int(100 * min(i * bloco, tamanho) / tamanho))
+
+        if self._is_canceled:
+            os.remove(temporario)
+            if extrator:
+                extrator.abortar()
+            return False
+        if hash_func.hexdigest() != manifesto['sha256'].lower():
+            raise ValueError("O arquivo reconstruído não confere com o manifesto.")
+        os.replace(temporario, self.save_path)
+        return baixados
+
+    # Trecho [inicio, fim] da nova versão por Range, com o limitador de banda, o watchdog e as
+    # tentativas com espera exponencial do download completo. Uma nova tentativa continua
+    # de onde a anterior parou. Retorna False se o download foi cancelado.
+    def _baixar_trecho(self, url, inicio, fim, escrever, timeout):
+        recebido = 0
+        tentativa = 0
+        while True:
+            tentativa += 1
+            try:
+                with RASTREADOR.trecho("GET", "rede", url=url, inicio=inicio + recebido):
+                    response = self.sessao.get(
+                        url, headers={'Range': f'bytes={inicio + recebido}-{fim}'}, stream=True, timeout=timeout
                     )
-            else:
-                self.download_finished.emit(
-                    self.download_id,
-                    True,
-                    f"Driver '{self.driver['nome']}' baixado com sucesso!"
-                )
-        except requests.exceptions.RequestException as e:
-            self.download_finished.emit(
-                self.download_id,
-                False,
-                f"Erro ao baixar o driver: {e}"
-            )
+                response.raise_for_status()
+                if response.status_code != 206:
+                    response.close()
+                    raise ValueError("O servidor ignorou o Range.")
+                self.http2 = getattr(response.raw, 'versao', None) == 'HTTP/2'
+                self._travado = None
+                parar_watchdog = threading.Event()
+                if self.config['watchdog_segundos']:
+                    threading.Thread(target=self._vigiar, args=(response, parar_watchdog), daemon=True).start()
+                try:
+                    for dados in response.iter_content(chunk_size=65536):
+                        if self._is_canceled:
+                            return False
+                        escrever(dados)
+                        recebido += len(dados)
+                        self._contar_bytes(len(dados))
+                        if self.limitador:
+                            self.limitador.consumir(len(dados))
+                except Exception:
+                    if self._travado is not None:
+                        raise TransferenciaTravada(f"Transferência travada ({self._travado:.0f} B/s)")
+                    raise
+                finally:
+                    parar_watchdog.set()
+                if self._travado is not None:
+                    raise TransferenciaTravada(f"Transferência travada ({self._travado:.0f} B/s)")
+                if recebido != fim - inicio + 1:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"Resposta incompleta: {recebido} de {fim - inicio + 1} bytes"
+                    )
+                return True
+            except (requests.exceptions.RequestException, TransferenciaTravada) as e:
+                if tentativa >= max(1, self.config['tentativas_max']) or not erro_retentavel(e):
+                    raise
+                espera = calcular_backoff(tentativa, self.config['backoff_base'], self.config['backoff_max'])
+                with RASTREADOR.trecho("backoff", "download", segundos=espera):
+                    if not self._aguardar(espera):
+                        return False
+
+    def _aguardar(self, segundos):
+        fim = time.monotonic() + segundos
+        while time.monotonic() < fim:
+            if self._is_canceled:
+                return False
+            QtCore.QThread.msleep(100)
+        return True
+
+    def _emitir_cancelado(self):
+        self.download_finished.emit(
+            self.download_id,
+            False,
+            f"Download do driver '{self.driver['nome']}' cancelado pelo usuário."
+        )
 
     def pause(self):
         self._mutex.lock()
@@ -224,6 +2446,743 @@ class DownloadWorker(QObject):
         self._is_canceled = True
         self._mutex.unlock()
 
+# Chaves de uma transferência para juntar downloads idênticos simultâneos:
+# a URL efetiva e, quando conhecido, o sha256
+def chaves_transferencia(driver):
+    chaves = ['url:' + RESOLVEDOR_LINKS.url_direta(driver['url'])]
+    checksum = ler_checksums(driver.get('checksum')).get(ALGORITMO_PADRAO)
+    if checksum:
+        chaves.append('sha256:' + checksum)
+    return chaves
+
+# Mesma URL com sha256 diferentes no catálogo: conteúdos distintos, não podem ser juntados
+def transferencias_compativeis(driver, outro):
+    checksum = ler_checksums(driver.get('checksum')).get(ALGORITMO_PADRAO)
+    checksum_outro = ler_checksums(outro.get('checksum')).get(ALGORITMO_PADRAO)
+    return not (checksum and checksum_outro and checksum != checksum_outro)
+
+# Download que acompanha uma transferência idêntica já em andamento (o líder) em vez de
+# abrir outra. Não ocupa vaga no pool: quando o líder termina, a interface o troca por um
+# DownloadWorker que só faz o hardlink ou a cópia do arquivo baixado.
+class DownloadCompartilhado:
+    def __init__(self, download_id, driver, save_path, lider, sinais):
+        self.download_id = download_id
+        self.driver = driver
+        self.save_path = save_path
+        self.lider = lider  # download_id da transferência acompanhada
+        self.sinais = sinais
+        self.pulado = False
+        self.sem_espaco = False
+        self.espaco_necessario = 0
+        self.erro_retomavel = False
+        self.tentativas = 0
+        self.checksum_calculado = None
+        self.compartilhado = True
+        self.host = urlparse(driver['url']).netloc
+        self._recebidos = 0
+        self.vazao_pico = 0.0
+        self.inicio = None
+        self._is_paused = False  # Sem pausa própria: o botão fica desabilitado nestas linhas
+        self._is_canceled = False
+
+    def cancel(self):
+        if self._is_canceled:
+            return
+        self._is_canceled = True
+        self.finalizar(False, f"Download do driver '{self.driver['nome']}' cancelado pelo usuário.")
+
+    # Fim pelo hub de sinais, como os outros downloads, fora da chamada atual
+    def finalizar(self, sucesso, mensagem):
+        QTimer.singleShot(0, lambda: self.sinais.download_finished.emit(self.download_id, sucesso, mensagem))
+
+# Classe Worker para sincronizar o catálogo remoto
+class CatalogSyncWorker(QObject):
+    catalog_received = pyqtSignal(object)  # (dados da resposta, None se nada mudou)
+    sync_failed = pyqtSignal(str)  # (mensagem)
+
+    def __init__(self, url, versao=0, etag="", modificado=""):
+        super().__init__()
+        self.url = url
+        self.versao = versao
+        self.etag = etag
+        self.modificado = modificado
+
+    def run(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.modificado:
+            headers['If-Modified-Since'] = self.modificado
+        try:
+            response = requests.get(self.url, params={'desde': self.versao}, headers=headers, timeout=(5, 30))
+            if response.status_code == 304:
+                self.catalog_received.emit(None)
+                return
+            response.raise_for_status()
+
+            dados = response.json()
+            if isinstance(dados, list):
+                dados = {"completo": True, "drivers": dados}
+            elif not isinstance(dados, dict) or dados.get('formato', CATALOGO_FORMATO) != CATALOGO_FORMATO:
+                raise ValueError("Formato de catálogo não suportado.")
+            for campo in ('drivers', 'adicionados', 'alterados'):
+                if not all(driver_valido(driver) for driver in dados.get(campo, [])):
+                    raise ValueError("Formato de driver inválido.")
+
+            dados['etag'] = response.headers.get('ETag', '')
+            dados['modificado'] = response.headers.get('Last-Modified', '')
+            self.catalog_received.emit(dados)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.sync_failed.emit(f"Erro ao sincronizar o catálogo: {e}")
+
+# Worker que consulta os links do catálogo em segundo plano, com um pool limitado de threads.
+# Os resultados são emitidos em lotes para que a tabela seja atualizada poucas vezes.
+class MetadadosWorker(QObject):
+    metadados_prontos = pyqtSignal(object)  # {url: metadados}
+    finished = pyqtSignal()
+
+    def __init__(self, urls, config):
+        super().__init__()
+        self.urls = urls
+        self.config = config
+        self._cancelado = False
+
+    def cancelar(self):
+        self._cancelado = True
+
+    def _sondar(self, sessao, url, timeout):
+        info = sondar_url(sessao, RESOLVEDOR_LINKS.url_direta(url), timeout)
+        # Página de produto: localizar o link real já deixa o download pronto para usá-lo
+        if info['alcancavel'] and info['tipo'] in TIPOS_HTML:
+            try:
+                info = sondar_url(sessao, RESOLVEDOR_LINKS.resolver(url, sessao, timeout, self.config), timeout)
+            except requests.exceptions.RequestException:
+                pass
+        return info
+
+    def run(self):
+        sessao = nova_sessao(self.config)
+        timeout = (self.config['timeout_conexao'], self.config['timeout_leitura'])
+        pool = ThreadPoolExecutor(max_workers=max(1, self.config['metadados_paralelos']))
+        pendentes = {pool.submit(self._sondar, sessao, url, timeout): url for url in self.urls}
+        try:
+            while pendentes and not self._cancelado:
+                prontos, _ = wait(pendentes, timeout=0.5)
+                if prontos:
+                    self.metadados_prontos.emit({pendentes.pop(futuro): futuro.result() for futuro in prontos})
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.finished.emit()
+
+# Exportação/importação de pacote offline em segundo plano
+class PacoteWorker(QObject):
+    progresso = pyqtSignal(int)  # (porcentagem)
+    concluido = pyqtSignal(object)  # (resultado de exportar_pacote/importar_pacote)
+    falhou = pyqtSignal(str)  # (mensagem)
+
+    def __init__(self, caminho, drivers=None, paralelos=4):
+        super().__init__()
+        self.caminho = caminho
+        self.drivers = drivers  # None: importar
+        self.paralelos = paralelos
+        self._ultimo = -1
+
+    def _progresso(self, fracao):
+        porcentagem = int(fracao * 100)
+        if porcentagem != self._ultimo:
+            self._ultimo = porcentagem
+            self.progresso.emit(porcentagem)
+
+    def run(self):
+        try:
+            if self.drivers is not None:
+                resultado = exportar_pacote(self.caminho, self.drivers, self._progresso)
+            else:
+                resultado = importar_pacote(self.caminho, self.paralelos, self._progresso)
+        except (OSError, ValueError, KeyError, TypeError, zipfile.BadZipFile) as e:
+            self.falhou.emit(str(e))
+            return
+        self.concluido.emit(resultado)
+
+# Motor de downloads fora do processo da interface (main.py --daemon), para que a interface
+# não dispute o GIL com as transferências e possa ser fechada sem interromper os downloads.
+# Protocolo: linhas JSON por TCP em 127.0.0.1:daemon_porta; a primeira linha do cliente
+# é {"token": ...} com o conteúdo de DAEMON_TOKEN_FILE.
+#   cliente -> motor: {"cmd": "baixar", "job", "driver", "save_path", "extrair", "pular_existente", "config"}
+#                     {"cmd": "pausar" | "retomar" | "cancelar", "job"}
+#                     {"cmd": "estado"}
+#   motor -> cliente: {"evento": "estado", "progresso", "jobs": [...], "concluidos": [...]}
+#                     {"evento": "iniciado", "job", "slot"}
+#                     {"evento": "status", "job", "status"}
+#                     {"evento": "fim", "job", "sucesso", "mensagem", + atributos do worker}
+# O progresso fica em PROGRESSO_FILE, um mmap com DAEMON_SLOTS entradas (job, progresso)
+# que a interface lê por timer, sem mensagens por bloco recebido.
+DAEMON_SLOTS = 64
+SLOT_PROGRESSO = struct.Struct('<qi')
+CAMPOS_FIM = ('pulado', 'sem_espaco', 'espaco_necessario', 'erro_retomavel', 'tentativas',
+              'host', '_recebidos', 'vazao_pico', 'checksum_calculado')
+
+class MotorDownloads:
+    def __init__(self):
+        self.token = uuid.uuid4().hex
+        self.lock = threading.RLock()
+        self.jobs = {}  # job -> {"worker", "slot", "status"}
+        self.concluidos = []  # eventos "fim" ainda não entregues a uma interface
+        self.clientes = []
+        self.ocioso_desde = time.monotonic()
+        self.historico = HistoricoDownloads()
+
+        self.pool = QThreadPool()
+        self.pool.setExpiryTimeout(-1)
+        self.pool.setMaxThreadCount(DAEMON_SLOTS)
+        # Sem loop de eventos: os sinais são tratados na própria thread do download
+        self.sinais = SinaisDownload()
+        self.sinais.progress_changed.connect(self._progresso, Qt.DirectConnection)
+        self.sinais.status_changed.connect(self._status, Qt.DirectConnection)
+        self.sinais.download_finished.connect(self._fim, Qt.DirectConnection)
+
+        with open(PROGRESSO_FILE, 'wb') as f:
+            f.write(bytes(SLOT_PROGRESSO.size * DAEMON_SLOTS))
+        self._arquivo_progresso = open(PROGRESSO_FILE, 'r+b')
+        self.progresso = mmap.mmap(self._arquivo_progresso.fileno(), 0)
+
+    def ocioso(self):
+        with self.lock:
+            if self.jobs or self.clientes:
+                self.ocioso_desde = time.monotonic()
+            return time.monotonic() - self.ocioso_desde
+
+    def enviar(self, evento, clientes=None):
+        linha = (json.dumps(evento) + '\n').encode('utf-8')
+        with self.lock:
+            for cliente in list(clientes or self.clientes):
+                try:
+                    cliente.sendall(linha)
+                except OSError:
+                    if cliente in self.clientes:
+                        self.clientes.remove(cliente)
+
+    def comando(self, msg, cliente):
+        cmd = msg.get('cmd')
+        with self.lock:
+            if cmd == 'estado':
+                jobs = [{
+                    "job": job, "driver": info['worker'].driver, "save_path": info['worker'].save_path,
+                    "slot": info['slot'], "status": info['status'], "pausado": info['worker']._is_paused
+                } for job, info in self.jobs.items()]
+                self.enviar({
+                    "evento": "estado", "progresso": os.path.abspath(PROGRESSO_FILE),
+                    "jobs": jobs, "concluidos": self.concluidos
+                }, [cliente])
+                self.concluidos = []
+            elif cmd == 'baixar':
+                self._baixar(msg)
+            elif cmd in ('pausar', 'retomar', 'cancelar') and msg.get('job') in self.jobs:
+                worker = self.jobs[msg['job']]['worker']
+                {'pausar': worker.pause, 'retomar': worker.resume, 'cancelar': worker.cancel}[cmd]()
+
+    def _baixar(self, msg):
+        job = msg['job']
+        livres = set(range(DAEMON_SLOTS)) - {info['slot'] for info in self.jobs.values()}
+        if job in self.jobs or not livres:
+            self.enviar({"evento": "fim", "job": job, "sucesso": False,
+                         "mensagem": "Motor de downloads sem vagas para um novo download."})
+            return
+        slot = min(livres)
+        SLOT_PROGRESSO.pack_into(self.progresso, slot * SLOT_PROGRESSO.size, job, 0)
+        worker = DownloadWorker(
+            job, msg['driver'], msg['save_path'], 1, msg.get('extrair', False),
+            msg.get('pular_existente', False), msg.get('config'), self.sinais
+        )
+        self.jobs[job] = {"worker": worker, "slot": slot, "status": "Baixando"}
+        self.enviar({"evento": "iniciado", "job": job, "slot": slot})
+        self.pool.start(worker)
+
+    def _progresso(self, job, progresso):
+        info = self.jobs.get(job)
+        if info:
+            SLOT_PROGRESSO.pack_into(self.progresso, info['slot'] * SLOT_PROGRESSO.size, job, progresso)
+
+    def _status(self, job, status):
+        with self.lock:
+            if job in self.jobs:
+                self.jobs[job]['status'] = status
+        self.enviar({"evento": "status", "job": job, "status": status})
+
+    def _fim(self, job, sucesso, mensagem):
+        with self.lock:
+            info = self.jobs.pop(job, None)
+            if info is None:
+                return
+            worker = info['worker']
+            SLOT_PROGRESSO.pack_into(self.progresso, info['slot'] * SLOT_PROGRESSO.size, 0, 0)
+            evento = {"evento": "fim", "job": job, "sucesso": sucesso, "mensagem": mensagem,
+                      "driver": worker.driver, "duracao": time.monotonic() - worker.inicio}
+            evento.update({campo: getattr(worker, campo) for campo in CAMPOS_FIM})
+            if not worker.sem_espaco:
+                if sucesso:
+                    resultado = 'pulado' if worker.pulado else 'baixado'
+                else:
+                    resultado = 'cancelado' if "cancelado" in mensagem.lower() else 'erro'
+                try:
+                    self.historico.registrar(
+                        worker.driver['nome'], worker.host, worker._recebidos, evento['duracao'],
+                        max(worker.vazao_pico, worker._recebidos / max(evento['duracao'], 1e-6)),
+                        worker.tentativas, resultado
+                    )
+                except sqlite3.Error:
+                    pass
+            if self.clientes:
+                self.enviar(evento)
+            else:
+                self.concluidos = (self.concluidos + [evento])[-50:]
+
+class _MotorHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        motor = self.server.motor
+        try:
+            if json.loads(self.rfile.readline() or b'{}').get('token') != motor.token:
+                return
+        except ValueError:
+            return
+        with motor.lock:
+            motor.clientes.append(self.connection)
+        try:
+            for linha in self.rfile:
+                try:
+                    msg = json.loads(linha)
+                except ValueError:
+                    continue
+                motor.comando(msg, self.connection)
+        except OSError:
+            pass
+        finally:
+            with motor.lock:
+                if self.connection in motor.clientes:
+                    motor.clientes.remove(self.connection)
+
+# Ponto de entrada do motor; encerra sozinho depois de daemon_ocioso_minutos sem downloads
+# e sem interface conectada
+def executar_daemon(config):
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    try:
+        servidor = socketserver.ThreadingTCPServer(('127.0.0.1', config['daemon_porta']), _MotorHandler)
+    except OSError:
+        return  # Outro motor já está em execução
+    servidor.daemon_threads = True
+    motor = MotorDownloads()
+    servidor.motor = motor
+    with open(DAEMON_TOKEN_FILE, 'w', encoding='utf-8') as f:
+        f.write(motor.token)
+    try:
+        os.chmod(DAEMON_TOKEN_FILE, 0o600)
+    except OSError:
+        pass
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    while motor.ocioso() < config['daemon_ocioso_minutos'] * 60:
+        time.sleep(5)
+    servidor.shutdown()
+    servidor.server_close()
+
+# Comando para iniciar o motor em outro processo (também no executável do PyInstaller)
+def comando_daemon():
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, '--daemon']
+    return [sys.executable, os.path.abspath(__file__), '--daemon']
+
+# Download em execução no motor: mesmos atributos e controles do DownloadWorker
+class DownloadRemoto:
+    def __init__(self, job, driver, save_path, cliente):
+        self.job = job
+        self.driver = driver
+        self.save_path = save_path
+        self.cliente = cliente
+        self.slot = None
+        self.progresso = -1
+        self.pulado = False
+        self.sem_espaco = False
+        self.espaco_necessario = 0
+        self.erro_retomavel = False
+        self.tentativas = 0
+        self.checksum_calculado = None
+        self.host = urlparse(driver['url']).netloc
+        self._recebidos = 0
+        self.vazao_pico = 0.0
+        self.inicio = None
+        self._is_paused = False
+
+    def pause(self):
+        self._is_paused = True
+        self.cliente.enviar({"cmd": "pausar", "job": self.job})
+
+    def resume(self):
+        self._is_paused = False
+        self.cliente.enviar({"cmd": "retomar", "job": self.job})
+
+    def cancel(self):
+        self.cliente.enviar({"cmd": "cancelar", "job": self.job})
+
+    def atualizar(self, evento):
+        for campo in CAMPOS_FIM:
+            if campo in evento:
+                setattr(self, campo, evento[campo])
+
+# Conexão da interface com o motor, integrada ao loop de eventos do Qt
+class ClienteDaemon(QObject):
+    evento_recebido = pyqtSignal(object)
+    conectado = pyqtSignal()
+    desconectado = pyqtSignal()
+    falhou = pyqtSignal()
+
+    def __init__(self, porta, parent=None):
+        super().__init__(parent)
+        self.porta = porta
+        self.pronto = False
+        self._buffer = b''
+        self.socket = QTcpSocket(self)
+        self.socket.connected.connect(self._conectado)
+        self.socket.readyRead.connect(self._ler)
+        self.socket.disconnected.connect(self._desconectado)
+        self.socket.error.connect(lambda _: self.falhou.emit() if not self.pronto else None)
+
+    def conectar(self):
+        self.socket.abort()
+        self.socket.connectToHost('127.0.0.1', self.porta)
+
+    def enviar(self, msg):
+        if self.pronto:
+            self.socket.write((json.dumps(msg) + '\n').encode('utf-8'))
+
+    def _conectado(self):
+        try:
+            with open(DAEMON_TOKEN_FILE, 'r', encoding='utf-8') as f:
+                token = f.read().strip()
+        except OSError:
+            token = ''
+        self.socket.write((json.dumps({"token": token}) + '\n').encode('utf-8'))
+        self.pronto = True
+        self.conectado.emit()
+
+    def _ler(self):
+        self._buffer += bytes(self.socket.readAll())
+        *linhas, self._buffer = self._buffer.split(b'\n')
+        for linha in linhas:
+            try:
+                self.evento_recebido.emit(json.loads(linha))
+            except ValueError:
+                continue
+
+    def _desconectado(self):
+        if self.pronto:
+            self.pronto = False
+            self.desconectado.emit()
+
+# Faixas (ms) do histograma de atrasos do loop de eventos; a última faixa é aberta
+FAIXAS_LATENCIA_MS = (16, 33, 50, 100, 250, 500, 1000, 2000)
+SEM_SLOT_MEDIDO = "(fora dos slots medidos)"
+
+# Monitor de latência da thread principal. Um timer de alta frequência compara o instante
+# previsto de cada disparo com o real: a diferença é o tempo em que o loop de eventos ficou
+# preso. Os slots decorados com medir() registram a própria duração, e cada travamento é
+# atribuído ao slot mais demorado executado desde o disparo anterior.
+class MonitorLatencia:
+    def __init__(self):
+        self.timer = None
+        self.intervalo = 0.01
+        self.limite = 0.1
+        self._ultimo = None
+        self._pilha = []   # Slots medidos em execução (um slot pode chamar outro)
+        self._lentos = []  # (duração, slot) desde o último disparo
+        self.zerar()
+
+    def zerar(self):
+        self.histograma = [0] * (len(FAIXAS_LATENCIA_MS) + 1)
+        self.travamentos = deque(maxlen=500)
+        self.slots = {}  # slot -> [execuções lentas, travamentos atribuídos, maior duração, duração total]
+        self.inicio = time.time()
+
+    @property
+    def ativo(self):
+        return self.timer is not None and self.timer.isActive()
+
+    def iniciar(self, intervalo_ms, limite_ms):
+        self.intervalo = intervalo_ms / 1000
+        self.limite = limite_ms / 1000
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.setTimerType(Qt.PreciseTimer)
+            self.timer.timeout.connect(self._disparo)
+        self.timer.setInterval(intervalo_ms)
+        self._ultimo = time.perf_counter()
+        self._lentos.clear()
+        self.timer.start()
+
+    def parar(self):
+        if self.timer is not None:
+            self.timer.stop()
+
+    def _disparo(self):
+        agora = time.perf_counter()
+        atraso = max(0.0, agora - self._ultimo - self.intervalo)
+        self._ultimo = agora
+        atraso_ms = atraso * 1000
+        faixa = next((i for i, limite in enumerate(FAIXAS_LATENCIA_MS) if atraso_ms < limite), len(FAIXAS_LATENCIA_MS))
+        self.histograma[faixa] += 1
+        if atraso >= self.limite:
+            duracao, slot = max(self._lentos) if self._lentos else (None, SEM_SLOT_MEDIDO)
+            if duracao is not None:
+                self.slots[slot][1] += 1
+            self.travamentos.append({
+                "quando": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "atraso_ms": round(atraso_ms, 1),
+                "slot": slot,
+                "duracao_slot_ms": round(duracao * 1000, 1) if duracao is not None else None,
+            })
+        self._lentos.clear()
+
+    def medir(self, funcao):
+        nome = funcao.__name__
+
+        # Os argumentos passam intactos: sinais com argumentos extras devem
+        # ser conectados por lambda, com a assinatura exata do slot
+        @functools.wraps(funcao)
+        def medido(*args, **kwargs):
+            self._pilha.append(nome)
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                duracao = time.perf_counter() - inicio
+                caminho = " > ".join(self._pilha)
+                self._pilha.pop()
+                # Execuções curtas não explicam travamentos: só as longas entram na conta
+                if duracao >= self.limite / 2:
+                    self._lentos.append((duracao, caminho))
+                    estatistica = self.slots.setdefault(caminho, [0, 0, 0.0, 0.0])
+                    estatistica[0] += 1
+                    estatistica[2] = max(estatistica[2], duracao)
+                    estatistica[3] += duracao
+        return medido
+
+    def resumo_slots(self):
+        linhas = [
+            {"slot": slot, "execucoes_lentas": lentas, "travamentos": travamentos,
+             "maior_ms": round(maior * 1000, 1), "total_ms": round(total * 1000, 1)}
+            for slot, (lentas, travamentos, maior, total) in self.slots.items()
+        ]
+        return sorted(linhas, key=lambda linha: (linha["travamentos"], linha["total_ms"]), reverse=True)
+
+    def relatorio(self):
+        faixas = list(FAIXAS_LATENCIA_MS) + [None]
+        return {
+            "gerado_em": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "desde": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.inicio)),
+            "intervalo_ms": round(self.intervalo * 1000),
+            "limite_ms": round(self.limite * 1000),
+            "plataforma": sys.platform,
+            "python": sys.version.split()[0],
+            "qt": QtCore.QT_VERSION_STR,
+            "histograma": [{"ate_ms": ate, "disparos": n} for ate, n in zip(faixas, self.histograma)],
+            "slots": self.resumo_slots(),
+            "travamentos": list(self.travamentos),
+        }
+
+    def exportar(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(self.relatorio(), f, ensure_ascii=False, indent=4)
+
+MONITOR_LATENCIA = MonitorLatencia()
+
+# Histograma dos atrasos do loop de eventos (escala logarítmica: travamentos são raros)
+class HistogramaLatencia(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(160)
+        self.rotulos = ["<%d" % FAIXAS_LATENCIA_MS[0]] + [
+            "%d-%d" % par for par in zip(FAIXAS_LATENCIA_MS, FAIXAS_LATENCIA_MS[1:])
+        ] + [">%d" % FAIXAS_LATENCIA_MS[-1]]
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        metricas = painter.fontMetrics()
+        altura_texto = metricas.height()
+        contagens = MONITOR_LATENCIA.histograma
+        maximo = math.log1p(max(contagens)) or 1
+        largura = self.width() / len(contagens)
+        base = self.height() - 2 * altura_texto
+        for i, n in enumerate(contagens):
+            limite_ms = FAIXAS_LATENCIA_MS[i - 1] if i else 0
+            if limite_ms >= MONITOR_LATENCIA.limite * 1000:
+                cor = QtGui.QColor('#D32F2F')
+            elif limite_ms >= FAIXAS_LATENCIA_MS[0]:
+                cor = QtGui.QColor('#F57C00')
+            else:
+                cor = QtGui.QColor('#388E3C')
+            altura = int((base - altura_texto) * math.log1p(n) / maximo)
+            x = int(i * largura) + 2
+            painter.fillRect(x, base - altura, int(largura) - 4, altura, cor)
+            painter.setPen(self.palette().color(QtGui.QPalette.WindowText))
+            painter.drawText(x, base - altura - altura_texto, int(largura) - 4, altura_texto, Qt.AlignCenter, str(n))
+            painter.drawText(x, base, int(largura) - 4, altura_texto, Qt.AlignCenter, self.rotulos[i])
+        painter.drawText(0, base + altura_texto, self.width(), altura_texto, Qt.AlignCenter, "atraso (ms)")
+
+# Painel de depuração com o histograma, os slots culpados e a exportação do relatório
+class PainelLatencia(QWidget):
+    alternado = pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.setLayout(layout)
+
+        self.resumo = QLabel()
+        layout.addWidget(self.resumo)
+        self.histograma = HistogramaLatencia()
+        layout.addWidget(self.histograma)
+
+        self.tabela = QTableWidget(0, 5)
+        self.tabela.setHorizontalHeaderLabels(["Slot", "Lentas", "Travamentos", "Maior (ms)", "Total (ms)"])
+        self.tabela.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tabela.verticalHeader().setVisible(False)
+        self.tabela.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabela.setAccessibleName("Slots Responsáveis por Travamentos")
+        layout.addWidget(self.tabela)
+
+        botoes = QHBoxLayout()
+        self.ativo = QtWidgets.QCheckBox("Monitorar")
+        self.ativo.setChecked(MONITOR_LATENCIA.ativo)
+        self.ativo.toggled.connect(self.alternado.emit)
+        botoes.addWidget(self.ativo)
+        botoes.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+        zerar = QPushButton("Zerar")
+        zerar.clicked.connect(self.zerar)
+        botoes.addWidget(zerar)
+        exportar = QPushButton("Exportar...")
+        exportar.clicked.connect(self.exportar)
+        botoes.addWidget(exportar)
+        layout.addLayout(botoes)
+
+        # Atualizado só enquanto visível
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.atualizar)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.atualizar()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def atualizar(self):
+        disparos = sum(MONITOR_LATENCIA.histograma)
+        travamentos = MONITOR_LATENCIA.travamentos
+        texto = f"{disparos} amostras, {len(travamentos)} travamentos (≥ {round(MONITOR_LATENCIA.limite * 1000)} ms)"
+        if travamentos:
+            ultimo = travamentos[-1]
+            texto += f" — último: {ultimo['atraso_ms']} ms em {ultimo['slot']}"
+        self.resumo.setText(texto)
+        self.histograma.update()
+        linhas = MONITOR_LATENCIA.resumo_slots()
+        self.tabela.setRowCount(len(linhas))
+        for row, linha in enumerate(linhas):
+            valores = [linha["slot"], linha["execucoes_lentas"], linha["travamentos"], linha["maior_ms"], linha["total_ms"]]
+            for coluna, valor in enumerate(valores):
+                self.tabela.setItem(row, coluna, QTableWidgetItem(str(valor)))
+
+    def zerar(self):
+        MONITOR_LATENCIA.zerar()
+        self.atualizar()
+
+    def exportar(self):
+        caminho, _ = QFileDialog.getSaveFileName(self, "Exportar Relatório de Latência", "latencia_interface.json", "JSON Files (*.json)")
+        if not caminho:
+            return
+        try:
+            MONITOR_LATENCIA.exportar(caminho)
+        except OSError as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao exportar o relatório: {e}")
+
+# Cores de cada tema da interface
+TEMAS = {
+    "claro": {"janela": "#F0F0F0", "texto": "#000000", "botao": "#FFFFFF", "botao_hover": "#DDDDDD",
+              "campo": "#FFFFFF", "borda": "#CCCCCC", "cabecalho": "#DDDDDD"},
+    "escuro": {"janela": "#1E1E1E", "texto": "#FFFFFF", "botao": "#333333", "botao_hover": "#555555",
+               "campo": "#2E2E2E", "borda": "#555555", "cabecalho": "#444444"},
+}
+
+# Regras de um tema; {dentro} seleciona os widgets dentro da janela principal. A janela e a
+# tabela, que contêm as linhas, tiram as cores da paleta: uma regra de cor nelas repassaria
+# uma paleta nova a cada linha na troca de tema.
+MODELO_FOLHA_TEMA = """
+{dentro}.QPushButton {{ background-color: {c[botao]}; color: {c[texto]}; border: 1px solid {c[borda]};
+    border-radius: 5px; padding: 5px; min-width: 80px; }}
+{dentro}.QPushButton:hover {{ background-color: {c[botao_hover]}; }}
+{dentro}QLineEdit, {dentro}QComboBox {{ background-color: {c[campo]}; color: {c[texto]};
+    border: 1px solid {c[borda]}; border-radius: 5px; padding: 5px; }}
+{dentro}QHeaderView::section {{ background-color: {c[cabecalho]}; color: {c[texto]}; padding: 4px;
+    border: 1px solid {c[borda]}; }}
+{dentro}.QProgressBar {{ border: 1px solid {c[borda]}; border-radius: 5px; text-align: center; height: 20px; }}
+"""
+
+# Os dois temas numa única folha de estilo, aplicada uma vez à QApplication. O tema claro é o
+# padrão e as regras do escuro só valem com a propriedade tema="escuro" na janela principal.
+# Trocar de tema muda só essa propriedade e a paleta da aplicação, sem interpretar a folha de
+# novo. As regras usam o seletor de classe exata (.QPushButton): os widgets das linhas da
+# tabela (BotaoLinha, BarraLinha) não casam com nenhuma e tiram as cores só da paleta, então
+# a troca de tema não precisa repolir uma linha sequer.
+class GerenciadorTemas:
+    def __init__(self):
+        partes = [MODELO_FOLHA_TEMA.format(dentro="", c=TEMAS["claro"])]
+        for nome, cores in TEMAS.items():
+            if nome != "claro":
+                partes.append(MODELO_FOLHA_TEMA.format(dentro=f'*[tema="{nome}"] ', c=cores))
+        partes.append("QLabel { color: #2E8B57; }\n"
+                      ".QProgressBar::chunk { background-color: #2E8B57; width: 20px; }\n")
+        self.folha = "".join(partes)
+        self.paletas = {}
+
+    def paleta(self, nome):
+        if nome not in self.paletas:
+            cores = TEMAS[nome]
+            paleta = QtGui.QPalette(QtGui.QColor(cores["botao"]), QtGui.QColor(cores["janela"]))
+            for papel, cor in ((QtGui.QPalette.WindowText, "texto"), (QtGui.QPalette.Text, "texto"),
+                               (QtGui.QPalette.ButtonText, "texto"), (QtGui.QPalette.Base, "campo"),
+                               (QtGui.QPalette.AlternateBase, "janela")):
+                paleta.setColor(papel, QtGui.QColor(cores[cor]))
+            # Preenchimento das barras de progresso das linhas
+            paleta.setColor(QtGui.QPalette.Highlight, QtGui.QColor("#2E8B57"))
+            self.paletas[nome] = paleta
+        return self.paletas[nome]
+
+    def aplicar(self, app, janela, nome):
+        if app.styleSheet() != self.folha:
+            # Sem isto, um widget polido pela folha de estilo guarda a paleta do momento
+            # do polimento e não acompanha as trocas de paleta da aplicação
+            QApplication.setAttribute(Qt.AA_UseStyleSheetPropagationInWidgetStyles)
+            app.setStyleSheet(self.folha)
+        app.setPalette(self.paleta(nome))
+        janela.setProperty("tema", nome)
+
+# Repolir um widget para que as regras dependentes da propriedade tema passem a valer
+def repolir_widget(widget):
+    estilo = widget.style()
+    estilo.unpolish(widget)
+    estilo.polish(widget)
+    widget.update()
+
+# Botão e barra de progresso das linhas da tabela: fora das regras da folha de estilo
+class BotaoLinha(QPushButton):
+    pass
+
+class BarraLinha(QProgressBar):
+    pass
+
+GERENCIADOR_TEMAS = GerenciadorTemas()
+
 # Classe Principal da Aplicação
 class DriverDownloaderApp(QMainWindow):
     def __init__(self):
@@ -232,12 +3191,76 @@ class DriverDownloaderApp(QMainWindow):
         self.setGeometry(100, 100, 1200, 700)
         self.setWindowIcon(QIcon.fromTheme("application-exit"))
         self.drivers = carregar_drivers()
+        self.config = carregar_config()
         self.download_id_counter = 0
-        self.current_threads = {}
+        self.drivers_por_id = {}
+        self.itens_por_id = {}  # download_id -> item da coluna ID (a linha sai de download_table.row)
         self.current_workers = {}
+        # Downloads idênticos simultâneos viram uma só transferência: chave -> download_id do líder,
+        # e download_id do líder -> ids das linhas que o acompanham (DownloadCompartilhado)
+        self.transferencias = {}
+        self.seguidores = {}
+        # Pool fixo de threads para os downloads, com um único hub de sinais
+        self.pool_downloads = QThreadPool(self)
+        self.pool_downloads.setExpiryTimeout(-1)
+        self.pool_downloads.setMaxThreadCount(self.config['downloads_simultaneos'])
+        self.sinais_download = SinaisDownload()
+        self.sinais_download.progress_changed.connect(self.update_progress)
+        self.sinais_download.status_changed.connect(self.update_status)
+        self.sinais_download.download_finished.connect(self.download_finished)
+        self.sync_thread = None
+        self.sync_worker = None
+        self.pacote_thread = None
+        self.pacote_worker = None
+        self.fila_downloads = []
+        self.aguardando_espaco = []
+        self.espaco_timer = QTimer(self)
+        self.espaco_timer.setInterval(30000)
+        self.espaco_timer.timeout.connect(self.verificar_espaco)
+        self.lotes = {}
+        self.lote_por_id = {}
+        self.lote_counter = 0
+        self.metadados = carregar_metadados()  # Metadados dos links, por URL
+        self.metadados_thread = None
+        self.metadados_worker = None
+        self.sondagem_pendente = None  # Nova consulta pedida durante outra (valor: forçada)
+        self.historico = HistoricoDownloads()
+        self.vazao_por_host = self.historico.vazao_estimada()
+        # Motor de downloads em processo separado (opcional)
+        self.daemon = None
+        self.daemon_sessao = False
+        self.daemon_tentativas = 0
+        self.jobs_remotos = {}  # job no motor -> download_id
+        self.progresso_daemon = None
+        self.daemon_timer = QTimer(self)
+        self.daemon_timer.setInterval(200)
+        self.daemon_timer.timeout.connect(self.ler_progresso_daemon)
+        # Linhas removidas do catálogo durante um download: saem da tabela quando ele terminar
+        self.remocao_adiada = set()
+        # Downloads fora de pico (agendados, na fila ou em andamento): download_id -> save_path.
+        # Ficam em AGENDA_FILE até terminarem; os suspensos pelo fechamento da janela voltam à agenda.
+        self.fora_pico = {}
+        self.suspensos = set()
+        self.agenda_timer = QTimer(self)
+        self.agenda_timer.setInterval(30000)
+        self.agenda_timer.timeout.connect(self.verificar_janelas)
+        if self.config['monitor_latencia']:
+            MONITOR_LATENCIA.iniciar(self.config['monitor_intervalo_ms'], self.config['monitor_limite_ms'])
+        if self.config['rastreamento']:
+            RASTREADOR.iniciar(self.config['rastreamento_max_eventos'])
         self.init_ui()
         self.atualizar_table()  # Chamada para popular a tabela com os drivers padrão
         self.setAcceptDrops(True)  # Habilitar Drag and Drop
+        self.observar_catalogo()
+        self.agenda_timer.start()
+        self.verificar_janelas()
+        CACHE_DNS.instalar(self.config['dns_ttl'])
+        if self.config['catalogo_url']:
+            self.sincronizar_catalogo()
+        if self.config['pares_ativo']:
+            self.iniciar_cache_pares()
+        if self.config['daemon_ativo']:
+            self.iniciar_daemon()
 
     def init_ui(self):
         # Menu Bar
@@ -247,28 +3270,104 @@ class DriverDownloaderApp(QMainWindow):
         file_menu = menubar.addMenu('Arquivo')
 
         export_action = QAction('Exportar Drivers', self)
-        export_action.triggered.connect(self.exportar_drivers)
+        export_action.triggered.connect(lambda: self.exportar_drivers())
         export_action.setShortcut('Ctrl+E')
         file_menu.addAction(export_action)
 
         import_action = QAction('Importar Drivers', self)
-        import_action.triggered.connect(self.importar_drivers)
+        import_action.triggered.connect(lambda: self.importar_drivers())
         import_action.setShortcut('Ctrl+I')
         file_menu.addAction(import_action)
 
+        export_bundle_action = QAction('Exportar Pacote Offline...', self)
+        export_bundle_action.triggered.connect(self.exportar_pacote_offline)
+        file_menu.addAction(export_bundle_action)
+
+        import_bundle_action = QAction('Importar Pacote Offline...', self)
+        import_bundle_action.triggered.connect(self.importar_pacote_offline)
+        file_menu.addAction(import_bundle_action)
+
+        sync_action = QAction('Sincronizar Catálogo', self)
+        sync_action.triggered.connect(self.sincronizar_catalogo)
+        sync_action.setShortcut('Ctrl+R')
+        file_menu.addAction(sync_action)
+
+        links_action = QAction('Verificar Links', self)
+        links_action.triggered.connect(lambda: self.sondar_metadados(forcar=True))
+        file_menu.addAction(links_action)
+
+        history_action = QAction('Histórico e Estatísticas...', self)
+        history_action.triggered.connect(self.mostrar_historico)
+        history_action.setShortcut('Ctrl+H')
+        file_menu.addAction(history_action)
+
         # Configurações Menu
         settings_menu = menubar.addMenu('Configurações')
+        settings_menu.setToolTipsVisible(True)
 
         theme_action = QAction('Tema Escuro', self, checkable=True)
+        theme_action.setChecked(self.config['tema'] == 'escuro')
         theme_action.triggered.connect(self.toggle_theme)
         settings_menu.addAction(theme_action)
 
+        extract_action = QAction('Extrair ZIP durante o download', self, checkable=True)
+        extract_action.setChecked(self.config['extrair_zip'])
+        extract_action.triggered.connect(self.toggle_extrair_zip)
+        settings_menu.addAction(extract_action)
+
+        http2_action = QAction('Usar HTTP/2', self, checkable=True)
+        http2_action.setChecked(self.config['http2'] and HTTP2_DISPONIVEL)
+        http2_action.setEnabled(HTTP2_DISPONIVEL)
+        if not HTTP2_DISPONIVEL:
+            http2_action.setToolTip('Instale httpx[http2] para habilitar')
+        http2_action.triggered.connect(self.toggle_http2)
+        settings_menu.addAction(http2_action)
+
+        daemon_action = QAction('Motor de Downloads em Processo Separado', self, checkable=True)
+        daemon_action.setChecked(self.config['daemon_ativo'])
+        daemon_action.triggered.connect(self.toggle_daemon)
+        settings_menu.addAction(daemon_action)
+
+        peers_action = QAction('Cache na Rede Local', self, checkable=True)
+        peers_action.setChecked(self.config['pares_ativo'])
+        peers_action.triggered.connect(self.toggle_cache_pares)
+        settings_menu.addAction(peers_action)
+
+        peers_list_action = QAction('Pares da Rede Local...', self)
+        peers_list_action.triggered.connect(self.configurar_pares)
+        settings_menu.addAction(peers_list_action)
+
+        peers_address_action = QAction('Endereço do Cache na Rede Local...', self)
+        peers_address_action.triggered.connect(self.configurar_endereco_pares)
+        settings_menu.addAction(peers_address_action)
+
+        network_action = QAction('Rede e Disco...', self)
+        network_action.triggered.connect(self.configurar_rede)
+        settings_menu.addAction(network_action)
+
+        concurrency_action = QAction('Downloads Simultâneos...', self)
+        concurrency_action.triggered.connect(self.configurar_downloads_simultaneos)
+        settings_menu.addAction(concurrency_action)
+
+        catalog_action = QAction('Catálogo Remoto...', self)
+        catalog_action.triggered.connect(self.configurar_catalogo_remoto)
+        settings_menu.addAction(catalog_action)
+
+        windows_action = QAction('Janelas Fora de Pico...', self)
+        windows_action.triggered.connect(self.configurar_janelas)
+        settings_menu.addAction(windows_action)
+
+        off_peak_groups_action = QAction('Grupos Fora de Pico...', self)
+        off_peak_groups_action.triggered.connect(self.configurar_grupos_fora_pico)
+        settings_menu.addAction(off_peak_groups_action)
+
         # Ajuda Menu
         help_menu = menubar.addMenu('Ajuda')
 
         credits_action = QAction(QIcon.fromTheme("help-about"), 'Créditos', self)
         credits_action.triggered.connect(self.show_credits)
         help_menu.addAction(credits_action)
+        help_menu.addSeparator()
 
         # Widget Central
         central_widget = QWidget()
@@ -319,6 +3418,32 @@ class DriverDownloaderApp(QMainWindow):
         add_button.setAccessibleDescription("Clique para adicionar um novo driver")
         manage_layout.addWidget(add_button)
 
+        batch_button = QPushButton("Baixar selecionados")
+        batch_button.setIcon(QIcon.fromTheme("download"))
+        batch_button.clicked.connect(self.baixar_selecionados)
+        batch_button.setStyleSheet("padding: 10px;")
+        batch_button.setShortcut('Ctrl+B')
+        batch_button.setAccessibleName("Botão Baixar Selecionados")
+        batch_button.setAccessibleDescription("Baixa todos os drivers selecionados para uma única pasta")
+        manage_layout.addWidget(batch_button)
+
+        group_button = QPushButton("Baixar Grupo")
+        group_button.setIcon(QIcon.fromTheme("folder-download"))
+        group_button.clicked.connect(self.baixar_grupo)
+        group_button.setStyleSheet("padding: 10px;")
+        group_button.setShortcut('Ctrl+G')
+        group_button.setAccessibleName("Botão Baixar Grupo")
+        group_button.setAccessibleDescription("Baixa todos os drivers de um grupo")
+        manage_layout.addWidget(group_button)
+
+        off_peak_button = QPushButton("Agendar fora de pico")
+        off_peak_button.setIcon(QIcon.fromTheme("appointment-new"))
+        off_peak_button.clicked.connect(self.agendar_selecionados)
+        off_peak_button.setStyleSheet("padding: 10px;")
+        off_peak_button.setAccessibleName("Botão Agendar Fora de Pico")
+        off_peak_button.setAccessibleDescription("Baixa os drivers selecionados só nas janelas fora de pico")
+        manage_layout.addWidget(off_peak_button)
+
         # ComboBox para Gerenciamento Avançado de Downloads
         priority_label = QLabel("Prioridade do Download:")
         priority_label.setAccessibleName("Rótulo Prioridade")
@@ -336,78 +3461,98 @@ class DriverDownloaderApp(QMainWindow):
         spacer = QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum)
         manage_layout.addItem(spacer)
 
+        # Progresso agregado dos lotes em andamento
+        self.lotes_layout = QVBoxLayout()
+        main_layout.addLayout(self.lotes_layout)
+
         # TableWidget para Listar Downloads
         self.download_table = QTableWidget()
-        self.download_table.setColumnCount(5)
-        self.download_table.setHorizontalHeaderLabels(["ID", "Driver", "Progresso", "Status", "Ações"])
+        self.download_table.setColumnCount(7)
+        self.download_table.setHorizontalHeaderLabels(["ID", "Driver", "Tamanho", "Link", "Progresso", "Status", "Ações"])
         self.download_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.download_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.download_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.download_table.setAccessibleName("Tabela de Downloads")
         self.download_table.setAccessibleDescription("Lista de downloads ativos com seus status e controles")
+        # Pré-aquecer a conexão ao selecionar ou passar o mouse sobre um driver
+        self.download_table.setMouseTracking(True)
+        self.download_table.cellEntered.connect(lambda row, _: self.preaquecer_linhas([row]))
+        self.download_table.itemSelectionChanged.connect(
+            lambda: self.preaquecer_linhas(index.row() for index in self.download_table.selectionModel().selectedRows())
+        )
         main_layout.addWidget(self.download_table)
 
+        # Painel de Notificações (não modal)
+        notification_widget = QWidget()
+        notification_layout = QVBoxLayout()
+        notification_layout.setContentsMargins(4, 4, 4, 4)
+        notification_widget.setLayout(notification_layout)
+
+        summary_layout = QHBoxLayout()
+        self.notification_summary = QLabel()
+        self.notification_summary.setAccessibleName("Resumo das Notificações")
+        summary_layout.addWidget(self.notification_summary)
+        summary_layout.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+        clear_button = QPushButton("Limpar")
+        clear_button.setIcon(QIcon.fromTheme("edit-clear"))
+        clear_button.clicked.connect(self.limpar_notificacoes)
+        summary_layout.addWidget(clear_button)
+        notification_layout.addLayout(summary_layout)
+
+        self.notification_list = QListWidget()
+        self.notification_list.setAccessibleName("Lista de Notificações")
+        self.notification_list.setAccessibleDescription("Conclusões e erros dos downloads")
+        notification_layout.addWidget(self.notification_list)
+
+        self.notification_dock = QDockWidget("Notificações", self)
+        self.notification_dock.setObjectName("notification_dock")
+        self.notification_dock.setWidget(notification_widget)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.notification_dock)
+        settings_menu.addAction(self.notification_dock.toggleViewAction())
+        self.limpar_notificacoes()
+
+        # Painel de depuração da latência da interface (fechado por padrão)
+        self.latencia_painel = PainelLatencia()
+        self.latencia_painel.alternado.connect(self.alternar_monitor_latencia)
+        self.latencia_dock = QDockWidget("Latência da Interface", self)
+        self.latencia_dock.setObjectName("latencia_dock")
+        self.latencia_dock.setWidget(self.latencia_painel)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.latencia_dock)
+        self.latencia_dock.hide()
+        help_menu.addAction(self.latencia_dock.toggleViewAction())
+
+        trace_action = QAction('Rastrear Execução', self, checkable=True)
+        trace_action.setChecked(RASTREADOR.ativo)
+        trace_action.triggered.connect(self.toggle_rastreamento)
+        help_menu.addAction(trace_action)
+
+        export_trace_action = QAction('Exportar Rastreamento (Chrome Trace)...', self)
+        export_trace_action.triggered.connect(self.exportar_rastreamento)
+        help_menu.addAction(export_trace_action)
+
         # Aplicar estilos modernos
-        self.apply_styles()
-
-    def apply_styles(self):
-        # Tema Claro como padrão
-        light_stylesheet = """
-        QMainWindow {
-            background-color: #F0F0F0;
-            color: #000000;
-        }
-        QLabel {
-            color: #2E8B57;
-        }
-        QPushButton {
-            background-color: #FFFFFF;
-            color: #000000;
-            border: 1px solid #CCCCCC;
-            border-radius: 5px;
-            padding: 5px;
-            min-width: 80px;
-        }
-        QPushButton:hover {
-            background-color: #DDDDDD;
-        }
-        QLineEdit {
-            background-color: #FFFFFF;
-            color: #000000;
-            border: 1px solid #CCCCCC;
-            border-radius: 5px;
-            padding: 5px;
-        }
-        QComboBox {
-            background-color: #FFFFFF;
-            color: #000000;
-            border: 1px solid #CCCCCC;
-            border-radius: 5px;
-            padding: 5px;
-        }
-        QTableWidget {
-            background-color: #FFFFFF;
-            color: #000000;
-            border: 1px solid #CCCCCC;
-        }
-        QHeaderView::section {
-            background-color: #DDDDDD;
-            color: #000000;
-            padding: 4px;
-            border: 1px solid #CCCCCC;
-        }
-        QProgressBar {
-            border: 1px solid #CCCCCC;
-            border-radius: 5px;
-            text-align: center;
-            height: 20px;
-        }
-        QProgressBar::chunk {
-            background-color: #2E8B57;
-            width: 20px;
-        }
-        """
-        self.setStyleSheet(light_stylesheet)
+        self.aplicar_tema(self.config['tema'])
+
+    def alternar_monitor_latencia(self, ativo):
+        self.config['monitor_latencia'] = ativo
+        salvar_config(self.config)
+        if ativo:
+            MONITOR_LATENCIA.iniciar(self.config['monitor_intervalo_ms'], self.config['monitor_limite_ms'])
+        else:
+            MONITOR_LATENCIA.parar()
+
+    @MONITOR_LATENCIA.medir
+    def aplicar_tema(self, nome):
+        GERENCIADOR_TEMAS.aplicar(QApplication.instance(), self, nome)
+
+        # Fora da tabela são poucos widgets: repolidos na hora. As linhas acompanham a paleta.
+        viewport = self.download_table.viewport()
+        pilha = [self]
+        while pilha:
+            widget = pilha.pop()
+            repolir_widget(widget)
+            if widget is not viewport:
+                pilha.extend(filho for filho in widget.children() if isinstance(filho, QWidget))
 
     def adicionar_driver(self):
         nome, ok = QInputDialog.getText(self, "Adicionar Driver", "Nome da Impressora:")
@@ -425,7 +3570,7 @@ class DriverDownloaderApp(QMainWindow):
         if not ok:
             return
 
-        checksum, ok = QInputDialog.getText(self, "Adicionar Driver", "Checksum (Opcional):")
+        checksum, ok = QInputDialog.getText(self, "Adicionar Driver", "Checksum (Opcional, ex.: sha256:...):")
         if not ok:
             checksum = ""
 
@@ -458,779 +3603,19 @@ class DriverDownloaderApp(QMainWindow):
             )
 
             if resposta == QMessageBox.Yes:
-                # Cancelar download se estiver em andamento
+                # Cancelar download se estiver em andamento; a vaga no pool é liberada
+                # quando o job terminar (download_finished)
                 if download_id in self.current_workers:
-                    worker = self.current_workers[download_id]
-                    worker.cancel()
-                    thread = self.current_threads[download_id]
-                    thread.quit()
-                    thread.wait()
-                    del self.current_workers[download_id]
-                    del self.current_threads[download_id]
+                    self.current_workers[download_id].cancel()
 
+                self.itens_por_id.pop(download_id, None)
                 self.download_table.removeRow(index.row())
                 QMessageBox.information(self, "Sucesso", f"Download do driver '{driver_name}' removido com sucesso!")
 
-    def iniciar_download(self, download_id, driver, row):
-        # Abrir diálogo para escolher onde salvar
-        save_path, _ = QFileDialog.getSaveFileName(
-            self, "Salvar Arquivo",
-            os.path.join(DOWNLOADS_DIR, os.path.basename(driver['url'])),
-            "Executáveis (*.exe);;ZIP (*.zip);;Todos os Arquivos (*)"
-        )
-
-        if not save_path:
-            return  # Usuário cancelou
-
-        # Definir prioridade
-        priority = self.priority_combo.currentIndex() + 1  # 1: Baixa, 2: Média, 3: Alta
-
-        # Iniciar download em uma thread separada usando QThread
-        progress_bar = QProgressBar()
-        progress_bar.setValue(0)
-        self.download_table.setCellWidget(row, 2, progress_bar)
-
-        status_item = QTableWidgetItem("Baixando")
-        status_item.setTextAlignment(Qt.AlignCenter)
-        self.download_table.setItem(row, 3, status_item)
-
-        # Ações: Botões para pausar e cancelar
-        pause_button = QPushButton("Pausar")
-        pause_button.setIcon(QIcon.fromTheme("media-playback-pause"))
-        cancel_button = QPushButton("Cancelar")
-        cancel_button.setIcon(QIcon.fromTheme("process-stop"))
-
-        action_layout = QHBoxLayout()
-        action_layout.setContentsMargins(0, 0, 0, 0)
-        action_layout.addWidget(pause_button)
-        action_layout.addWidget(cancel_button)
-        action_widget = QWidget()
-        action_widget.setLayout(action_layout)
-        self.download_table.setCellWidget(row, 4, action_widget)
-
-        # Conectar botões
-        pause_button.clicked.connect(lambda: self.pausar_download(download_id, pause_button))
-        cancel_button.clicked.connect(lambda: self.cancelar_download(download_id))
-
-        # Iniciar download
-        thread = QThread()
-        worker = DownloadWorker(download_id, driver, save_path, priority)
-        worker.moveToThread(thread)
-
-        # Conectar sinais e slots
-        thread.started.connect(worker.run)
-        worker.progress_changed.connect(lambda id, progress: self.update_progress(id, progress))
-        worker.download_finished.connect(lambda id, success, message: self.download_finished(id, success, message))
-        worker.download_finished.connect(thread.quit)
-        worker.download_finished.connect(worker.deleteLater)
-        thread.finished.connect(thread.deleteLater)
-
-        # Manter referência às threads e workers
-        self.current_threads[download_id] = thread
-        self.current_workers[download_id] = worker
-
-        thread.start()
-        QMessageBox.information(self, "Download Iniciado", f"Iniciando download do driver '{driver['nome']}'.")
-
-    def pausar_download(self, download_id, button):
-        if download_id in self.current_workers:
-            worker = self.current_workers[download_id]
-            if not worker._is_paused:
-                worker.pause()
-                button.setText("Retomar")
-                button.setIcon(QIcon.fromTheme("media-playback-start"))
-                self.download_table.setItem(self.get_row_by_id(download_id), 3, QTableWidgetItem("Pausado"))
-            else:
-                worker.resume()
-                button.setText("Pausar")
-                button.setIcon(QIcon.fromTheme("media-playback-pause"))
-                self.download_table.setItem(self.get_row_by_id(download_id), 3, QTableWidgetItem("Baixando"))
-
-    def cancelar_download(self, download_id):
-        if download_id in self.current_workers:
-            worker = self.current_workers[download_id]
-            worker.cancel()
-            self.download_table.setItem(self.get_row_by_id(download_id), 3, QTableWidgetItem("Cancelado"))
-            # Após cancelamento, restaurar o botão "Baixar"
-            self.restaurar_baixar(download_id)
-
-    def restaurar_baixar(self, download_id):
-        row = self.get_row_by_id(download_id)
-        if row is not None:
-            driver = self.get_driver_by_id(download_id)
-            if driver:
-                # Remover os botões de pausa e cancelar
-                self.download_table.setCellWidget(row, 4, QWidget())
-
-                # Adicionar o botão "Baixar" novamente
-                baixar_button = QPushButton("Baixar")
-                baixar_button.setIcon(QIcon.fromTheme("download"))
-                baixar_button.clicked.connect(lambda _, id=download_id, drv=driver, r=row: self.iniciar_download(id, drv, r))
-                baixar_button.setAccessibleName("Botão Baixar")
-                baixar_button.setAccessibleDescription("Clique para iniciar o download deste driver")
-                self.download_table.setCellWidget(row, 4, baixar_button)
-
-                # Resetar a barra de progresso
-                progress_bar = QProgressBar()
-                progress_bar.setValue(0)
-                self.download_table.setCellWidget(row, 2, progress_bar)
-
-    def update_progress(self, download_id, progress):
-        row = self.get_row_by_id(download_id)
-        if row is not None:
-            progress_bar = self.download_table.cellWidget(row, 2)
-            progress_bar.setValue(progress)
-
-    def download_finished(self, download_id, success, message):
-        row = self.get_row_by_id(download_id)
-        if row is not None:
-            if not success:
-                if "cancelado" in message.lower():
-                    status_text = "Cancelado"
-                    # Restaurar o botão "Baixar"
-                    self.restaurar_baixar(download_id)
-                else:
-                    status_text = "Erro"
-                    # Remover os botões apenas se for um erro
-                    self.download_table.setCellWidget(row, 4, QWidget())
-            else:
-                status_text = "Concluído"
-                # Remover os botões após conclusão bem-sucedida
-                self.download_table.setCellWidget(row, 4, QWidget())
-
-            status_item = self.download_table.item(row, 3)
-            status_item.setText(status_text)
-
-            QMessageBox.information(self, "Download Finalizado", message)
-
-            # Limpar referências
-            if download_id in self.current_workers:
-                del self.current_workers[download_id]
-            if download_id in self.current_threads:
-                del self.current_threads[download_id]
-
-    def restaurar_baixar(self, download_id):
-        row = self.get_row_by_id(download_id)
-        if row is not None:
-            driver = self.get_driver_by_id(download_id)
-            if driver:
-                # Remover os botões de pausa e cancelar
-                self.download_table.setCellWidget(row, 4, QWidget())
-
-                # Adicionar o botão "Baixar" novamente
-                baixar_button = QPushButton("Baixar")
-                baixar_button.setIcon(QIcon.fromTheme("download"))
-                baixar_button.clicked.connect(lambda _, id=download_id, drv=driver, r=row: self.iniciar_download(id, drv, r))
-                baixar_button.setAccessibleName("Botão Baixar")
-                baixar_button.setAccessibleDescription("Clique para iniciar o download deste driver")
-                self.download_table.setCellWidget(row, 4, baixar_button)
-
-                # Resetar a barra de progresso
-                progress_bar = QProgressBar()
-                progress_bar.setValue(0)
-                self.download_table.setCellWidget(row, 2, progress_bar)
-
-    def get_driver_by_name(self, nome):
-        for driver in self.drivers:
-            if driver['nome'] == nome:
-                return driver
-        return None
-
-    def get_row_by_id(self, download_id):
-        for row in range(self.download_table.rowCount()):
-            item = self.download_table.item(row, 0)
-            if item and int(item.text()) == download_id:
-                return row
-        return None
-
-    def show_credits(self):
-        credits_text = """
-        <h2>Driver Downloader</h2>
-        <p>Desenvolvido por <b>Qualifaz Sistemas</b>.</p>
-        <p>© 2024 Qualifaz Sistemas. Todos os direitos reservados.</p>
-        """
-        QMessageBox.information(self, "Créditos", credits_text)
-
-    def filtrar_drivers(self, texto):
-        texto = texto.lower()
-        for row in range(self.download_table.rowCount()):
-            driver_name = self.download_table.item(row, 1).text().lower()
-            download_id = int(self.download_table.item(row, 0).text())
-            driver = self.get_driver_by_id(download_id)
-            grupo = driver.get('grupo', '').lower() if driver else ''
-            if texto in driver_name or texto in grupo:
-                self.download_table.setRowHidden(row, False)
-            else:
-                self.download_table.setRowHidden(row, True)
-
-    def get_driver_by_id(self, download_id):
-        # Map download_id to driver index (download_id starts at 1)
-        index = download_id - 1
-        if 0 <= index < len(self.drivers):
-            return self.drivers[index]
-        return None
-
-    def toggle_theme(self, checked):
-        if checked:
-            # Tema Escuro
-            dark_stylesheet = """
-            QMainWindow {
-                background-color: #1E1E1E;
-                color: #FFFFFF;
-            }
-            QLabel {
-                color: #2E8B57;
-            }
-            QPushButton {
-                background-color: #333333;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-                border-radius: 5px;
-                padding: 5px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background-color: #555555;
-            }
-            QLineEdit {
-                background-color: #2E2E2E;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QComboBox {
-                background-color: #2E2E2E;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QTableWidget {
-                background-color: #2E2E2E;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-            }
-            QHeaderView::section {
-                background-color: #444444;
-                color: #FFFFFF;
-                padding: 4px;
-                border: 1px solid #555555;
-            }
-            QProgressBar {
-                border: 1px solid #555555;
-                border-radius: 5px;
-                text-align: center;
-                height: 20px;
-            }
-            QProgressBar::chunk {
-                background-color: #2E8B57;
-                width: 20px;
-            }
-            """
-            self.setStyleSheet(dark_stylesheet)
-        else:
-            # Tema Claro
-            light_stylesheet = """
-            QMainWindow {
-                background-color: #F0F0F0;
-                color: #000000;
-            }
-            QLabel {
-                color: #2E8B57;
-            }
-            QPushButton {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                padding: 5px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background-color: #DDDDDD;
-            }
-            QLineEdit {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QComboBox {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QTableWidget {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-            }
-            QHeaderView::section {
-                background-color: #DDDDDD;
-                color: #000000;
-                padding: 4px;
-                border: 1px solid #CCCCCC;
-            }
-            QProgressBar {
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                text-align: center;
-                height: 20px;
-            }
-            QProgressBar::chunk {
-                background-color: #2E8B57;
-                width: 20px;
-            }
-            """
-            self.setStyleSheet(light_stylesheet)
-
-    # Implementação de Drag and Drop
-    def dragEnterEvent(self, event: QtGui.QDragEnterEvent):
-        if event.mimeData().hasUrls() or event.mimeData().hasText():
-            event.acceptProposedAction()
-
-    def dropEvent(self, event: QtGui.QDropEvent):
-        if event.mimeData().hasUrls():
-            for url in event.mimeData().urls():
-                file_path = url.toLocalFile()
-                if os.path.isfile(file_path):
-                    self.process_file(file_path)
-        elif event.mimeData().hasText():
-            text = event.mimeData().text()
-            # Supondo que o texto seja uma URL
-            self.process_url(text)
-
-    def process_file(self, file_path):
-        # Extrair informações do arquivo para adicionar como driver
-        nome = os.path.basename(file_path)
-        url = f"file:///{os.path.abspath(file_path)}"
-        grupo, ok = QInputDialog.getItem(
-            self, "Adicionar Driver via Arquivo", "Grupo:",
-            ["Não Fiscal", "A4"], editable=False
-        )
-        if not ok:
-            return
-
-        checksum = ""  # Opcional: calcular checksum do arquivo
-        novo_driver = {
-            "nome": nome,
-            "url": url,
-            "grupo": grupo,
-            "checksum": checksum
-        }
-
-        self.drivers.append(novo_driver)
-        salvar_drivers(self.drivers)
-        self.atualizar_table()
-        QMessageBox.information(self, "Sucesso", f"Driver '{nome}' adicionado com sucesso via arquivo!")
-
-    def process_url(self, url):
-        nome, ok = QInputDialog.getText(self, "Adicionar Driver via URL", "Nome da Impressora:")
-        if not ok or not nome.strip():
-            return
-
-        grupo, ok = QInputDialog.getItem(
-            self, "Adicionar Driver via URL", "Grupo:",
-            ["Não Fiscal", "A4"], editable=False
-        )
-        if not ok:
-            return
-
-        checksum, ok = QInputDialog.getText(self, "Adicionar Driver via URL", "Checksum (Opcional):")
-        if not ok:
-            checksum = ""
-
-        novo_driver = {
-            "nome": nome.strip(),
-            "url": url.strip(),
-            "grupo": grupo
-        }
-        if checksum.strip():
-            novo_driver["checksum"] = checksum.strip()
-
-        self.drivers.append(novo_driver)
-        salvar_drivers(self.drivers)
-        self.atualizar_table()
-        QMessageBox.information(self, "Sucesso", f"Driver '{nome}' adicionado com sucesso via URL!")
-
-    def exportar_drivers(self):
-        export_path, _ = QFileDialog.getSaveFileName(
-            self, "Exportar Drivers",
-            "drivers_export.json",
-            "JSON Files (*.json)"
-        )
-        if export_path:
-            try:
-                with open(export_path, 'w', encoding='utf-8') as f:
-                    json.dump(self.drivers, f, indent=4, ensure_ascii=False)
-                QMessageBox.information(self, "Sucesso", "Drivers exportados com sucesso!")
-            except Exception as e:
-                QMessageBox.critical(self, "Erro", f"Erro ao exportar drivers: {e}")
-
-    def importar_drivers(self):
-        import_path, _ = QFileDialog.getOpenFileName(
-            self, "Importar Drivers",
-            "",
-            "JSON Files (*.json)"
-        )
-        if import_path:
-            try:
-                with open(import_path, 'r', encoding='utf-8') as f:
-                    imported_drivers = json.load(f)
-                # Validação básica
-                for driver in imported_drivers:
-                    if 'nome' not in driver or 'url' not in driver or 'grupo' not in driver:
-                        raise ValueError("Formato de driver inválido.")
-                self.drivers.extend(imported_drivers)
-                salvar_drivers(self.drivers)
-                self.atualizar_table()
-                QMessageBox.information(self, "Sucesso", "Drivers importados com sucesso!")
-            except Exception as e:
-                QMessageBox.critical(self, "Erro", f"Erro ao importar drivers: {e}")
-
-    def atualizar_table(self):
-        self.download_table.setRowCount(0)
-        self.download_id_counter = 0  # Resetar contador para IDs corretos
-        for driver in self.drivers:
-            self.add_driver_to_table(driver)
-
-    def add_driver_to_table(self, driver):
-        row_position = self.download_table.rowCount()
-        self.download_table.insertRow(row_position)
-
-        # ID
-        self.download_id_counter += 1
-        id_item = QTableWidgetItem(str(self.download_id_counter))
-        id_item.setTextAlignment(Qt.AlignCenter)
-        self.download_table.setItem(row_position, 0, id_item)
-
-        # Driver
-        driver_item = QTableWidgetItem(driver['nome'])
-        driver_item.setTextAlignment(Qt.AlignCenter)
-        self.download_table.setItem(row_position, 1, driver_item)
-
-        # Progresso
-        progress_bar = QProgressBar()
-        progress_bar.setValue(0)
-        self.download_table.setCellWidget(row_position, 2, progress_bar)
-
-        # Status
-        status_item = QTableWidgetItem("Aguardando")
-        status_item.setTextAlignment(Qt.AlignCenter)
-        self.download_table.setItem(row_position, 3, status_item)
-
-        # Ações
-        baixar_button = QPushButton("Baixar")
-        baixar_button.setIcon(QIcon.fromTheme("download"))
-        baixar_button.clicked.connect(lambda _, id=self.download_id_counter, drv=driver, r=row_position: self.iniciar_download(id, drv, r))
-        baixar_button.setAccessibleName("Botão Baixar")
-        baixar_button.setAccessibleDescription("Clique para iniciar o download deste driver")
-        self.download_table.setCellWidget(row_position, 4, baixar_button)
-
-    def iniciar_download(self, download_id, driver, row):
-        # Abrir diálogo para escolher onde salvar
-        save_path, _ = QFileDialog.getSaveFileName(
-            self, "Salvar Arquivo",
-            os.path.join(DOWNLOADS_DIR, os.path.basename(driver['url'])),
-            "Executáveis (*.exe);;ZIP (*.zip);;Todos os Arquivos (*)"
-        )
-
-        if not save_path:
-            return  # Usuário cancelou
-
-        # Definir prioridade
-        priority = self.priority_combo.currentIndex() + 1  # 1: Baixa, 2: Média, 3: Alta
-
-        # Iniciar download em uma thread separada usando QThread
-        progress_bar = QProgressBar()
-        progress_bar.setValue(0)
-        self.download_table.setCellWidget(row, 2, progress_bar)
-
-        status_item = QTableWidgetItem("Baixando")
-        status_item.setTextAlignment(Qt.AlignCenter)
-        self.download_table.setItem(row, 3, status_item)
-
-        # Ações: Botões para pausar e cancelar
-        pause_button = QPushButton("Pausar")
-        pause_button.setIcon(QIcon.fromTheme("media-playback-pause"))
-        cancel_button = QPushButton("Cancelar")
-        cancel_button.setIcon(QIcon.fromTheme("process-stop"))
-
-        action_layout = QHBoxLayout()
-        action_layout.setContentsMargins(0, 0, 0, 0)
-        action_layout.addWidget(pause_button)
-        action_layout.addWidget(cancel_button)
-        action_widget = QWidget()
-        action_widget.setLayout(action_layout)
-        self.download_table.setCellWidget(row, 4, action_widget)
-
-        # Conectar botões
-        pause_button.clicked.connect(lambda: self.pausar_download(download_id, pause_button))
-        cancel_button.clicked.connect(lambda: self.cancelar_download(download_id))
-
-        # Iniciar download
-        thread = QThread()
-        worker = DownloadWorker(download_id, driver, save_path, priority)
-        worker.moveToThread(thread)
-
-        # Conectar sinais e slots
-        thread.started.connect(worker.run)
-        worker.progress_changed.connect(lambda id, progress: self.update_progress(id, progress))
-        worker.download_finished.connect(lambda id, success, message: self.download_finished(id, success, message))
-        worker.download_finished.connect(thread.quit)
-        worker.download_finished.connect(worker.deleteLater)
-        thread.finished.connect(thread.deleteLater)
-
-        # Manter referência às threads e workers
-        self.current_threads[download_id] = thread
-        self.current_workers[download_id] = worker
-
-        thread.start()
-        QMessageBox.information(self, "Download Iniciado", f"Iniciando download do driver '{driver['nome']}'.")
-
-    def pausar_download(self, download_id, button):
-        if download_id in self.current_workers:
-            worker = self.current_workers[download_id]
-            if not worker._is_paused:
-                worker.pause()
-                button.setText("Retomar")
-                button.setIcon(QIcon.fromTheme("media-playback-start"))
-                self.download_table.setItem(self.get_row_by_id(download_id), 3, QTableWidgetItem("Pausado"))
-            else:
-                worker.resume()
-                button.setText("Pausar")
-                button.setIcon(QIcon.fromTheme("media-playback-pause"))
-                self.download_table.setItem(self.get_row_by_id(download_id), 3, QTableWidgetItem("Baixando"))
-
-    def cancelar_download(self, download_id):
-        if download_id in self.current_workers:
-            worker = self.current_workers[download_id]
-            worker.cancel()
-            self.download_table.setItem(self.get_row_by_id(download_id), 3, QTableWidgetItem("Cancelado"))
-            # Após cancelamento, restaurar o botão "Baixar"
-            self.restaurar_baixar(download_id)
-
-    def restaurar_baixar(self, download_id):
-        row = self.get_row_by_id(download_id)
-        if row is not None:
-            driver = self.get_driver_by_id(download_id)
-            if driver:
-                # Remover os botões de pausa e cancelar
-                self.download_table.setCellWidget(row, 4, QWidget())
-
-                # Adicionar o botão "Baixar" novamente
-                baixar_button = QPushButton("Baixar")
-                baixar_button.setIcon(QIcon.fromTheme("download"))
-                baixar_button.clicked.connect(lambda _, id=download_id, drv=driver, r=row: self.iniciar_download(id, drv, r))
-                baixar_button.setAccessibleName("Botão Baixar")
-                baixar_button.setAccessibleDescription("Clique para iniciar o download deste driver")
-                self.download_table.setCellWidget(row, 4, baixar_button)
-
-                # Resetar a barra de progresso
-                progress_bar = QProgressBar()
-                progress_bar.setValue(0)
-                self.download_table.setCellWidget(row, 2, progress_bar)
-
-    def update_progress(self, download_id, progress):
-        row = self.get_row_by_id(download_id)
-        if row is not None:
-            progress_bar = self.download_table.cellWidget(row, 2)
-            progress_bar.setValue(progress)
-
-    def download_finished(self, download_id, success, message):
-        row = self.get_row_by_id(download_id)
-        if row is not None:
-            if not success:
-                if "cancelado" in message.lower():
-                    status_text = "Cancelado"
-                    # Restaurar o botão "Baixar"
-                    self.restaurar_baixar(download_id)
-                else:
-                    status_text = "Erro"
-                    # Remover os botões apenas se for um erro
-                    self.download_table.setCellWidget(row, 4, QWidget())
-            else:
-                status_text = "Concluído"
-                # Remover os botões após conclusão bem-sucedida
-                self.download_table.setCellWidget(row, 4, QWidget())
-
-            status_item = self.download_table.item(row, 3)
-            status_item.setText(status_text)
-
-            QMessageBox.information(self, "Download Finalizado", message)
-
-            # Limpar referências
-            if download_id in self.current_workers:
-                del self.current_workers[download_id]
-            if download_id in self.current_threads:
-                del self.current_threads[download_id]
-
-    def get_driver_by_name(self, nome):
-        for driver in self.drivers:
-            if driver['nome'] == nome:
-                return driver
-        return None
-
-    def get_row_by_id(self, download_id):
-        for row in range(self.download_table.rowCount()):
-            item = self.download_table.item(row, 0)
-            if item and int(item.text()) == download_id:
-                return row
-        return None
-
-    def show_credits(self):
-        credits_text = """
-        <h2>Driver Downloader</h2>
-        <p>Desenvolvido por <b>Qualifaz Sistemas</b>.</p>
-        <p>© 2024 Qualifaz Sistemas. Todos os direitos reservados.</p>
-        """
-        QMessageBox.information(self, "Créditos", credits_text)
-
-    def filtrar_drivers(self, texto):
-        texto = texto.lower()
-        for row in range(self.download_table.rowCount()):
-            driver_name = self.download_table.item(row, 1).text().lower()
-            download_id = int(self.download_table.item(row, 0).text())
-            driver = self.get_driver_by_id(download_id)
-            grupo = driver.get('grupo', '').lower() if driver else ''
-            if texto in driver_name or texto in grupo:
-                self.download_table.setRowHidden(row, False)
-            else:
-                self.download_table.setRowHidden(row, True)
-
-    def get_driver_by_id(self, download_id):
-        # Map download_id to driver index (download_id starts at 1)
-        index = download_id - 1
-        if 0 <= index < len(self.drivers):
-            return self.drivers[index]
-        return None
-
-    def toggle_theme(self, checked):
-        if checked:
-            # Tema Escuro
-            dark_stylesheet = """
-            QMainWindow {
-                background-color: #1E1E1E;
-                color: #FFFFFF;
-            }
-            QLabel {
-                color: #2E8B57;
-            }
-            QPushButton {
-                background-color: #333333;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-                border-radius: 5px;
-                padding: 5px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background-color: #555555;
-            }
-            QLineEdit {
-                background-color: #2E2E2E;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QComboBox {
-                background-color: #2E2E2E;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QTableWidget {
-                background-color: #2E2E2E;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-            }
-            QHeaderView::section {
-                background-color: #444444;
-                color: #FFFFFF;
-                padding: 4px;
-                border: 1px solid #555555;
-            }
-            QProgressBar {
-                border: 1px solid #555555;
-                border-radius: 5px;
-                text-align: center;
-                height: 20px;
-            }
-            QProgressBar::chunk {
-                background-color: #2E8B57;
-                width: 20px;
-            }
-            """
-            self.setStyleSheet(dark_stylesheet)
-        else:
-            # Tema Claro
-            light_stylesheet = """
-            QMainWindow {
-                background-color: #F0F0F0;
-                color: #000000;
-            }
-            QLabel {
-                color: #2E8B57;
-            }
-            QPushButton {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                padding: 5px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background-color: #DDDDDD;
-            }
-            QLineEdit {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QComboBox {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QTableWidget {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-            }
-            QHeaderView::section {
-                background-color: #DDDDDD;
-                color: #000000;
-                padding: 4px;
-                border: 1px solid #CCCCCC;
-            }
-            QProgressBar {
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                text-align: center;
-                height: 20px;
-            }
-            QProgressBar::chunk {
-                background-color: #2E8B57;
-                width: 20px;
-            }
-            """
-            self.setStyleSheet(light_stylesheet)
-
-    # Implementação de Drag and Drop
-    def dragEnterEvent(self, event: QtGui.QDragEnterEvent):
-        if event.mimeData().hasUrls() or event.mimeData().hasText():
-            event.acceptProposedAction()
+    # Implementação de Drag and Drop
+    def dragEnterEvent(self, event: QtGui.QDragEnterEvent):
+        if event.mimeData().hasUrls() or event.mimeData().hasText():
+            event.acceptProposedAction()
 
     def dropEvent(self, event: QtGui.QDropEvent):
         if event.mimeData().hasUrls():
@@ -1279,7 +3664,7 @@ class DriverDownloaderApp(QMainWindow):
         if not ok:
             return
 
-        checksum, ok = QInputDialog.getText(self, "Adicionar Driver via URL", "Checksum (Opcional):")
+        checksum, ok = QInputDialog.getText(self, "Adicionar Driver via URL", "Checksum (Opcional, ex.: sha256:...):")
         if not ok:
             checksum = ""
 
@@ -1296,6 +3681,7 @@ class DriverDownloaderApp(QMainWindow):
         self.atualizar_table()
         QMessageBox.information(self, "Sucesso", f"Driver '{nome}' adicionado com sucesso via URL!")
 
+    @MONITOR_LATENCIA.medir
     def exportar_drivers(self):
         export_path, _ = QFileDialog.getSaveFileName(
             self, "Exportar Drivers",
@@ -1305,11 +3691,12 @@ class DriverDownloaderApp(QMainWindow):
         if export_path:
             try:
                 with open(export_path, 'w', encoding='utf-8') as f:
-                    json.dump(self.drivers, f, indent=4, ensure_ascii=False)
+                    json.dump([dict(driver) for driver in self.drivers], f, indent=4, ensure_ascii=False)
                 QMessageBox.information(self, "Sucesso", "Drivers exportados com sucesso!")
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Erro ao exportar drivers: {e}")
 
+    @MONITOR_LATENCIA.medir
     def importar_drivers(self):
         import_path, _ = QFileDialog.getOpenFileName(
             self, "Importar Drivers",
@@ -1331,72 +3718,955 @@ class DriverDownloaderApp(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Erro ao importar drivers: {e}")
 
+    def exportar_pacote_offline(self):
+        caminho, _ = QFileDialog.getSaveFileName(self, "Exportar Pacote Offline", "drivers_offline.zip",
+                                                 "Pacote Offline (*.zip)")
+        if caminho:
+            self.executar_pacote(PacoteWorker(caminho, [dict(driver) for driver in self.drivers]),
+                                 "Exportando pacote offline")
+
+    def importar_pacote_offline(self):
+        caminho, _ = QFileDialog.getOpenFileName(self, "Importar Pacote Offline", "", "Pacote Offline (*.zip)")
+        if caminho:
+            self.executar_pacote(PacoteWorker(caminho, paralelos=self.config['pacote_paralelos']),
+                                 "Importando pacote offline")
+
+    def executar_pacote(self, worker, descricao):
+        if self.pacote_thread is not None:
+            QMessageBox.warning(self, "Aviso", "Já existe um pacote offline em processamento.")
+            return
+        thread = QThread()
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progresso.connect(lambda porcentagem: self.statusBar().showMessage(f"{descricao}... {porcentagem}%"))
+        worker.concluido.connect(self.pacote_concluido)
+        worker.falhou.connect(lambda message: QMessageBox.critical(self, "Erro", f"{descricao} falhou: {message}"))
+        worker.concluido.connect(thread.quit)
+        worker.falhou.connect(thread.quit)
+        thread.finished.connect(self.pacote_finalizado)
+        self.pacote_thread = thread
+        self.pacote_worker = worker
+        self.statusBar().showMessage(f"{descricao}...")
+        thread.start()
+
+    @MONITOR_LATENCIA.medir
+    def pacote_concluido(self, resultado):
+        self.statusBar().clearMessage()
+        if self.pacote_worker.drivers is not None:
+            incluidos, divergentes = resultado
+            message = f"Pacote offline exportado com {incluidos} arquivo(s)."
+            if divergentes:
+                message += f" {divergentes} arquivo(s) do cache não conferem com o catálogo e serão recusados na importação."
+            QMessageBox.information(self, "Sucesso", message)
+            return
+
+        # Catálogo do pacote: novos drivers e alterações entram; nada é removido
+        drivers, importados, recusados, falhas = resultado
+        delta = calcular_delta_catalogo(self.drivers, [driver for driver in drivers if driver_valido(driver)])
+        delta['removidos'] = []
+        adicionados, alterados, _ = self.aplicar_delta_catalogo(delta)
+        message = (f"Pacote offline importado: {importados} arquivo(s) no cache, "
+                   f"{adicionados} driver(s) adicionado(s), {alterados} alterado(s).")
+        if recusados:
+            message += f" {recusados} arquivo(s) recusado(s) por checksum ou nome inválido."
+        if falhas:
+            message += f" {len(falhas)} arquivo(s) não puderam ser gravados:\n" + "\n".join(falhas)
+            QMessageBox.warning(self, "Aviso", message)
+            return
+        QMessageBox.information(self, "Sucesso", message)
+
+    def pacote_finalizado(self):
+        self.pacote_thread.deleteLater()
+        self.pacote_worker.deleteLater()
+        self.pacote_thread = None
+        self.pacote_worker = None
+
+    def toggle_cache_pares(self, checked):
+        self.config['pares_ativo'] = checked
+        salvar_config(self.config)
+        if checked:
+            self.iniciar_cache_pares()
+        else:
+            CACHE_PARES.parar()
+
+    def iniciar_cache_pares(self):
+        porta_descoberta = self.config['pares_porta_descoberta'] if self.config['pares_descoberta'] else 0
+        try:
+            CACHE_PARES.iniciar(self.config['pares_porta'], porta_descoberta, self.config['pares_endereco'])
+        except OSError as e:
+            self.notificar('erro', f"Não foi possível iniciar o cache na rede local: {e}")
+            return
+        self.statusBar().showMessage(
+            f"Cache na rede local ativo em {self.config['pares_endereco']}:{CACHE_PARES.porta}.", 5000)
+
+    def configurar_pares(self):
+        texto, ok = QInputDialog.getText(
+            self, "Pares da Rede Local",
+            "Pares fixos (host:porta, separados por vírgula):",
+            text=", ".join(self.config['pares_lista'])
+        )
+        if ok:
+            self.config['pares_lista'] = [par.strip() for par in texto.split(',') if par.strip()]
+            salvar_config(self.config)
+
+    def configurar_endereco_pares(self):
+        texto, ok = QInputDialog.getText(
+            self, "Endereço do Cache na Rede Local",
+            "Endereço em que o cache escuta (127.0.0.1 = só esta máquina, 0.0.0.0 = todas as interfaces):",
+            text=self.config['pares_endereco']
+        )
+        if not ok:
+            return
+        try:
+            endereco = str(ipaddress.ip_address(texto.strip()))
+        except ValueError:
+            QMessageBox.warning(self, "Aviso", f"Endereço inválido: '{texto.strip()}'.")
+            return
+        self.config['pares_endereco'] = endereco
+        salvar_config(self.config)
+        # Reiniciar o servidor no novo endereço
+        if self.config['pares_ativo']:
+            CACHE_PARES.parar()
+            self.iniciar_cache_pares()
+
+    def configurar_rede(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Rede e Disco")
+        form = QFormLayout()
+        dialog.setLayout(form)
+
+        campos = {}
+        # (chave, rótulo, tipo, mínimo, máximo)
+        for chave, rotulo, tipo, minimo, maximo in (
+            ('timeout_conexao', "Timeout de conexão (s):", QDoubleSpinBox, 1, 300),
+            ('timeout_leitura', "Timeout de leitura (s):", QDoubleSpinBox, 1, 600),
+            ('tentativas_max', "Tentativas por download:", QSpinBox, 1, 50),
+            ('backoff_base', "Espera inicial entre tentativas (s):", QDoubleSpinBox, 0.1, 60),
+            ('backoff_max', "Espera máxima entre tentativas (s):", QDoubleSpinBox, 1, 3600),
+            ('watchdog_bps', "Vazão mínima (bytes/s):", QSpinBox, 0, 10 ** 9),
+            ('watchdog_segundos', "Janela do watchdog (s, 0 desativa):", QSpinBox, 0, 3600),
+            ('reserva_disco_mb', "Espaço mínimo livre no disco (MB):", QSpinBox, 0, 10 ** 6),
+            ('cota_mb', "Cota da pasta de downloads (MB, 0 desativa):", QSpinBox, 0, 10 ** 7),
+        ):
+            campo = tipo()
+            campo.setRange(minimo, maximo)
+            campo.setValue(self.config[chave])
+            campo.setAccessibleName(rotulo)
+            form.addRow(rotulo, campo)
+            campos[chave] = campo
+
+        botoes = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        botoes.accepted.connect(dialog.accept)
+        botoes.rejected.connect(dialog.reject)
+        form.addRow(botoes)
+
+        if dialog.exec_() == QDialog.Accepted:
+            for chave, campo in campos.items():
+                self.config[chave] = campo.value()
+            salvar_config(self.config)
+
+    # Formato: "22:00-06:00@512, 12:00-13:30" (limite opcional em KB/s após o @)
+    def configurar_janelas(self):
+        atual = ", ".join(
+            f"{janela['inicio']}-{janela['fim']}" + (f"@{janela['limite_kbps']}" if janela.get('limite_kbps') else "")
+            for janela in self.config['janelas_fora_pico']
+        )
+        texto, ok = QInputDialog.getText(
+            self, "Janelas Fora de Pico",
+            "Janelas (início-fim, separadas por vírgula; @KB/s limita a banda):",
+            text=atual
+        )
+        if not ok:
+            return
+        janelas = []
+        for parte in filter(None, (parte.strip() for parte in texto.split(','))):
+            m = re.fullmatch(r'(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*(?:@\s*(\d+))?', parte)
+            if not m or int(m[1]) > 23 or int(m[3]) > 23 or int(m[2]) > 59 or int(m[4]) > 59:
+                QMessageBox.warning(self, "Aviso", f"Janela inválida: '{parte}'.")
+                return
+            janelas.append({"inicio": f"{int(m[1]):02d}:{m[2]}", "fim": f"{int(m[3]):02d}:{m[4]}",
+                            "limite_kbps": int(m[5] or 0)})
+        self.config['janelas_fora_pico'] = janelas
+        salvar_config(self.config)
+        for download_id in self.fora_pico:
+            if download_id not in self.current_workers:
+                self.marcar_agendado(download_id)
+        self.verificar_janelas()
+
+    def configurar_grupos_fora_pico(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Grupos Fora de Pico")
+        layout = QVBoxLayout()
+        dialog.setLayout(layout)
+        layout.addWidget(QLabel("Downloads em lote destes grupos rodam só nas janelas fora de pico:"))
+        lista = QListWidget()
+        for grupo in sorted(set(self.drivers.grupos()) | set(self.config['grupos_fora_pico'])):
+            item = QListWidgetItem(grupo)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if grupo in self.config['grupos_fora_pico'] else Qt.Unchecked)
+            lista.addItem(item)
+        layout.addWidget(lista)
+        botoes = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        botoes.accepted.connect(dialog.accept)
+        botoes.rejected.connect(dialog.reject)
+        layout.addWidget(botoes)
+
+        if dialog.exec_() == QDialog.Accepted:
+            self.config['grupos_fora_pico'] = [
+                lista.item(i).text() for i in range(lista.count()) if lista.item(i).checkState() == Qt.Checked
+            ]
+            salvar_config(self.config)
+
+    def configurar_downloads_simultaneos(self):
+        valor, ok = QInputDialog.getInt(
+            self, "Downloads Simultâneos",
+            "Número máximo de downloads ao mesmo tempo:",
+            self.config['downloads_simultaneos'], 1, 20
+        )
+        if ok:
+            self.config['downloads_simultaneos'] = valor
+            salvar_config(self.config)
+            self.pool_downloads.setMaxThreadCount(valor)
+            self.processar_fila()
+
+    def configurar_catalogo_remoto(self):
+        url, ok = QInputDialog.getText(
+            self, "Catálogo Remoto",
+            "URL do catálogo (deixe vazio para desativar):",
+            text=self.config['catalogo_url']
+        )
+        if not ok:
+            return
+        if url.strip() != self.config['catalogo_url']:
+            # Outro endpoint: a próxima sincronização começa do zero
+            self.config.update(catalogo_url=url.strip(), catalogo_versao=0, catalogo_etag="", catalogo_modificado="")
+            salvar_config(self.config)
+        if self.config['catalogo_url']:
+            self.sincronizar_catalogo()
+
+    def sincronizar_catalogo(self):
+        if not self.config['catalogo_url']:
+            QMessageBox.warning(self, "Aviso", "Configure a URL do catálogo remoto em Configurações.")
+            return
+        if self.sync_thread is not None:
+            return  # Sincronização já em andamento
+
+        thread = QThread()
+        worker = CatalogSyncWorker(
+            self.config['catalogo_url'], self.config['catalogo_versao'],
+            self.config['catalogo_etag'], self.config['catalogo_modificado']
+        )
+        worker.moveToThread(thread)
+
+        thread.started.connect(worker.run)
+        worker.catalog_received.connect(lambda dados: self.aplicar_catalogo_remoto(dados))
+        worker.sync_failed.connect(lambda message: self.statusBar().showMessage(message, 10000))
+        worker.catalog_received.connect(thread.quit)
+        worker.sync_failed.connect(thread.quit)
+        thread.finished.connect(self.sync_concluido)
+
+        self.sync_thread = thread
+        self.sync_worker = worker
+        self.statusBar().showMessage("Sincronizando catálogo...")
+        thread.start()
+
+    def sync_concluido(self):
+        self.sync_thread.deleteLater()
+        self.sync_worker.deleteLater()
+        self.sync_thread = None
+        self.sync_worker = None
+
+    def aplicar_catalogo_remoto(self, dados):
+        if dados is None:
+            self.statusBar().showMessage("Catálogo já está atualizado.", 5000)
+            return
+
+        if dados.get('completo'):
+            delta = calcular_delta_catalogo(self.drivers, dados['drivers'])
+        else:
+            delta = dados
+        adicionados, alterados, removidos = self.aplicar_delta_catalogo(delta)
+
+        self.config['catalogo_versao'] = dados.get('versao', self.config['catalogo_versao'])
+        self.config['catalogo_etag'] = dados['etag']
+        self.config['catalogo_modificado'] = dados['modificado']
+        salvar_config(self.config)
+        self.statusBar().showMessage(
+            f"Catálogo sincronizado: {adicionados} adicionado(s), {alterados} alterado(s), {removidos} removido(s).",
+            10000
+        )
+
+    # Recarregar o drivers.json quando outro programa (ex.: script de implantação) alterá-lo.
+    # O diretório também é observado porque a gravação por substituição troca o arquivo.
+    def observar_catalogo(self):
+        self.catalogo_assinatura = self.assinatura_catalogo()
+        self.catalogo_timer = QTimer(self)
+        self.catalogo_timer.setSingleShot(True)
+        self.catalogo_timer.setInterval(500)
+        self.catalogo_timer.timeout.connect(self.recarregar_catalogo)
+        self.catalogo_observador = QFileSystemWatcher(self)
+        self.catalogo_observador.addPath(os.path.dirname(os.path.abspath(DRIVERS_FILE)))
+        if os.path.exists(DRIVERS_FILE):
+            self.catalogo_observador.addPath(os.path.abspath(DRIVERS_FILE))
+        # Várias notificações seguidas (gravação em partes) viram uma única recarga
+        self.catalogo_observador.fileChanged.connect(self.catalogo_timer.start)
+        self.catalogo_observador.directoryChanged.connect(self.catalogo_timer.start)
+
+    def assinatura_catalogo(self):
+        try:
+            info = os.stat(DRIVERS_FILE)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    @MONITOR_LATENCIA.medir
+    def recarregar_catalogo(self):
+        caminho = os.path.abspath(DRIVERS_FILE)
+        if os.path.exists(DRIVERS_FILE) and caminho not in self.catalogo_observador.files():
+            self.catalogo_observador.addPath(caminho)
+        assinatura = self.assinatura_catalogo()
+        if assinatura is None or assinatura == self.catalogo_assinatura:
+            return  # Outro arquivo do diretório mudou
+        try:
+            with open(DRIVERS_FILE, 'r', encoding='utf-8') as f:
+                drivers = json.load(f)
+        except (OSError, ValueError):
+            # Gravação ainda em andamento: a próxima notificação tenta de novo
+            return
+        self.catalogo_assinatura = assinatura
+        if not isinstance(drivers, list):
+            self.statusBar().showMessage(f"{DRIVERS_FILE} ignorado: formato inválido.", 10000)
+            return
+
+        validos = [driver for driver in drivers if driver_valido(driver)]
+        adicionados, alterados, removidos = self.aplicar_delta_catalogo(
+            calcular_delta_catalogo(self.drivers, validos), salvar=False)
+        if adicionados or alterados or removidos:
+            self.statusBar().showMessage(
+                f"{DRIVERS_FILE} recarregado: {adicionados} adicionado(s), {alterados} alterado(s), "
+                f"{removidos} removido(s).", 10000)
+
+    # Aplica adições, alterações e remoções diretamente nas linhas afetadas
+    @RASTREADOR.rastrear("aplicar_delta_catalogo", "tabela")
+    @MONITOR_LATENCIA.medir
+    def aplicar_delta_catalogo(self, delta, salvar=True):
+        ids_por_chave = {chave_driver(driver): download_id for download_id, driver in self.drivers_por_id.items()}
+
+        self.download_table.setUpdatesEnabled(False)
+        try:
+            # Alterações: trocar o registro; os botões da tabela buscam o driver pelo id ao serem clicados
+            novos = list(delta.get('adicionados', []))
+            alterados = 0
+            for driver in delta.get('alterados', []):
+                atual = self.drivers.por_chave(chave_driver(driver))
+                if atual is None:
+                    novos.append(driver)
+                    continue
+                novo = self.drivers.substituir(atual, driver)
+                alterados += 1
+                download_id = ids_por_chave.get(chave_driver(novo))
+                if download_id is None:
+                    continue
+                self.drivers_por_id[download_id] = novo
+                row = self.get_row_by_id(download_id)
+                if row is not None:
+                    self.download_table.item(row, 1).setText(novo['nome'])
+                    self.preencher_metadados(row, novo)
+
+            # Remoções: de baixo para cima para manter os índices das linhas válidos
+            remover = {chave for chave in delta.get('removidos', []) if self.drivers.por_chave(chave) is not None}
+            if remover:
+                self.drivers.remover(remover)
+                ids = {download_id for download_id, driver in self.drivers_por_id.items() if chave_driver(driver) in remover}
+                rows = [row for row in range(self.download_table.rowCount())
+                        if int(self.download_table.item(row, 0).text()) in ids]
+                for row in reversed(rows):
+                    download_id = int(self.download_table.item(row, 0).text())
+                    if download_id in self.current_workers:
+                        # Download em andamento: a linha mantém o estado até ele terminar
+                        self.remocao_adiada.add(download_id)
+                        continue
+                    del self.drivers_por_id[download_id]
+                    del self.itens_por_id[download_id]
+                    self.download_table.removeRow(row)
+
+            # Adições: novas linhas no fim da tabela
+            adicionados = 0
+            for driver in novos:
+                if self.drivers.por_chave(chave_driver(driver)) is not None:
+                    continue
+                driver = self.drivers.append(driver)
+                self.add_driver_to_table(driver)
+                adicionados += 1
+        finally:
+            self.download_table.setUpdatesEnabled(True)
+
+        if adicionados or alterados or remover:
+            if salvar:
+                salvar_drivers(self.drivers)
+                self.catalogo_assinatura = self.assinatura_catalogo()
+            if self.search_bar.text():
+                self.filtrar_drivers(self.search_bar.text())
+        if adicionados or alterados:
+            self.sondar_metadados()
+        return adicionados, alterados, len(remover)
+
+    @RASTREADOR.rastrear("atualizar_table", "tabela")
+    @MONITOR_LATENCIA.medir
     def atualizar_table(self):
         self.download_table.setRowCount(0)
         self.download_id_counter = 0  # Resetar contador para IDs corretos
+        self.drivers_por_id.clear()
+        self.itens_por_id.clear()
+        # Todas as linhas criadas de uma vez e com a área da tabela oculta: com ela visível,
+        # cada widget de célula novo reposiciona os widgets de todas as linhas anteriores
+        viewport = self.download_table.viewport()
+        visivel = viewport.isVisible()
+        viewport.hide()
+        self.download_table.setRowCount(len(self.drivers))
+        for row, driver in enumerate(self.drivers):
+            self.add_driver_to_table(driver, row)
+        if visivel:
+            viewport.show()
+        self.restaurar_agenda()
+        self.sondar_metadados()
+
+    # Consulta em segundo plano os links sem metadados ou com metadados vencidos
+    def sondar_metadados(self, forcar=False):
+        if self.metadados_thread is not None:
+            self.sondagem_pendente = bool(self.sondagem_pendente) or forcar
+            return
+        limite = time.time() - self.config['metadados_ttl']
+        urls = []
+        vistas = set()
         for driver in self.drivers:
-            self.add_driver_to_table(driver)
+            info = self.metadados.get(driver['url'])
+            if (forcar or info is None or info['verificado_em'] < limite) and driver['url'] not in vistas:
+                vistas.add(driver['url'])
+                urls.append(driver['url'])
+        if not urls:
+            return
+        if forcar:
+            for url in urls:
+                self.metadados.pop(url, None)
+
+        thread = QThread()
+        worker = MetadadosWorker(urls, self.config)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.metadados_prontos.connect(self.metadados_recebidos)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(self.metadados_concluido)
+        self.metadados_thread = thread
+        self.metadados_worker = worker
+        self.atualizar_coluna_metadados(set(urls))
+        thread.start()
 
-    def add_driver_to_table(self, driver):
-        row_position = self.download_table.rowCount()
-        self.download_table.insertRow(row_position)
+    @MONITOR_LATENCIA.medir
+    def metadados_recebidos(self, resultados):
+        self.metadados.update(resultados)
+        self.atualizar_coluna_metadados(resultados)
+
+    def metadados_concluido(self):
+        self.metadados_thread.deleteLater()
+        self.metadados_worker.deleteLater()
+        self.metadados_thread = None
+        self.metadados_worker = None
+        salvar_metadados(self.metadados)
+        if self.sondagem_pendente is not None:
+            forcar = self.sondagem_pendente
+            self.sondagem_pendente = None
+            self.sondar_metadados(forcar)
+
+    @RASTREADOR.rastrear("atualizar_coluna_metadados", "tabela")
+    def atualizar_coluna_metadados(self, urls):
+        for row in range(self.download_table.rowCount()):
+            driver = self.get_driver_by_id(int(self.download_table.item(row, 0).text()))
+            if driver and driver['url'] in urls:
+                self.preencher_metadados(row, driver)
+
+    def preencher_metadados(self, row, driver):
+        info = self.metadados.get(driver['url'])
+        tamanho_item = QTableWidgetItem(formatar_tamanho(info['tamanho']) if info else "")
+        tamanho_item.setTextAlignment(Qt.AlignCenter)
+        self.download_table.setItem(row, 2, tamanho_item)
+
+        if info is None:
+            link_item = QTableWidgetItem("Verificando..." if self.metadados_thread is not None else "")
+        elif info['problema']:
+            link_item = QTableWidgetItem(info['problema'])
+            link_item.setForeground(QtGui.QColor('#D32F2F'))
+        else:
+            link_item = QTableWidgetItem("OK" if info['ranges'] else "OK (sem retomada)")
+        if info:
+            detalhes = [f"URL final: {info['url_final']}"]
+            if info['tipo']:
+                detalhes.append(f"Tipo: {info['tipo']}")
+            if info['modificado']:
+                detalhes.append(f"Modificado: {info['modificado']}")
+            link_item.setToolTip("\n".join(detalhes))
+        link_item.setTextAlignment(Qt.AlignCenter)
+        self.download_table.setItem(row, 3, link_item)
+
+    def add_driver_to_table(self, driver, row_position=None):
+        # Sem posição, a linha é acrescentada no fim da tabela
+        if row_position is None:
+            row_position = self.download_table.rowCount()
+            self.download_table.insertRow(row_position)
 
         # ID
         self.download_id_counter += 1
+        self.drivers_por_id[self.download_id_counter] = driver
         id_item = QTableWidgetItem(str(self.download_id_counter))
         id_item.setTextAlignment(Qt.AlignCenter)
         self.download_table.setItem(row_position, 0, id_item)
+        self.itens_por_id[self.download_id_counter] = id_item
 
         # Driver
         driver_item = QTableWidgetItem(driver['nome'])
         driver_item.setTextAlignment(Qt.AlignCenter)
         self.download_table.setItem(row_position, 1, driver_item)
 
+        # Tamanho e Link (preenchidos pela consulta em segundo plano)
+        self.preencher_metadados(row_position, driver)
+
         # Progresso
-        progress_bar = QProgressBar()
+        progress_bar = BarraLinha()
         progress_bar.setValue(0)
-        self.download_table.setCellWidget(row_position, 2, progress_bar)
+        self.download_table.setCellWidget(row_position, 4, progress_bar)
 
         # Status
         status_item = QTableWidgetItem("Aguardando")
         status_item.setTextAlignment(Qt.AlignCenter)
-        self.download_table.setItem(row_position, 3, status_item)
+        self.download_table.setItem(row_position, 5, status_item)
 
         # Ações
-        baixar_button = QPushButton("Baixar")
+        baixar_button = BotaoLinha("Baixar")
         baixar_button.setIcon(QIcon.fromTheme("download"))
-        baixar_button.clicked.connect(lambda _, id=self.download_id_counter, drv=driver, r=row_position: self.iniciar_download(id, drv, r))
+        baixar_button.clicked.connect(lambda _, id=self.download_id_counter: self.iniciar_download(id, self.get_driver_by_id(id)))
         baixar_button.setAccessibleName("Botão Baixar")
         baixar_button.setAccessibleDescription("Clique para iniciar o download deste driver")
-        self.download_table.setCellWidget(row_position, 4, baixar_button)
+        self.download_table.setCellWidget(row_position, 6, baixar_button)
+
+    def iniciar_download(self, download_id, driver):
+        # A conexão é aberta enquanto o diálogo está aberto
+        PRE_AQUECEDOR.aquecer(driver['url'], self.config)
 
-    def iniciar_download(self, download_id, driver, row):
         # Abrir diálogo para escolher onde salvar
         save_path, _ = QFileDialog.getSaveFileName(
             self, "Salvar Arquivo",
-            os.path.join(DOWNLOADS_DIR, os.path.basename(driver['url'])),
+            os.path.join(DOWNLOADS_DIR, nome_arquivo_driver(driver)),
             "Executáveis (*.exe);;ZIP (*.zip);;Todos os Arquivos (*)"
         )
 
         if not save_path:
             return  # Usuário cancelou
 
+        self.iniciar_download_em(download_id, driver, save_path)
+
+    def baixar_selecionados(self):
+        ids = []
+        for index in self.download_table.selectionModel().selectedRows():
+            if self.download_table.isRowHidden(index.row()):
+                continue
+            download_id = int(self.download_table.item(index.row(), 0).text())
+            if download_id not in self.current_workers:
+                ids.append(download_id)
+        if not ids:
+            QMessageBox.warning(self, "Aviso", "Selecione os drivers que deseja baixar.")
+            return
+
+        # Uma única pasta de destino para todo o lote
+        self.preaquecer_ids(ids)
+        pasta = QFileDialog.getExistingDirectory(self, "Pasta de Destino", DOWNLOADS_DIR)
+        if not pasta:
+            return
+
+        self.baixar_lote("Seleção", sorted(ids), pasta)
+
+    def baixar_grupo(self):
+        grupos = self.drivers.grupos()
+        if not grupos:
+            QMessageBox.warning(self, "Aviso", "Nenhum grupo cadastrado.")
+            return
+        grupo, ok = QInputDialog.getItem(self, "Baixar Grupo", "Grupo:", grupos, editable=False)
+        if not ok:
+            return
+
+        ids = [download_id for download_id, driver in sorted(self.drivers_por_id.items())
+               if driver.get('grupo') == grupo and download_id not in self.current_workers]
+        if not ids:
+            QMessageBox.warning(self, "Aviso", f"Todos os drivers do grupo '{grupo}' já estão sendo baixados.")
+            return
+
+        self.preaquecer_ids(ids)
+        pasta = QFileDialog.getExistingDirectory(self, "Pasta de Destino", DOWNLOADS_DIR)
+        if not pasta:
+            return
+        self.baixar_lote(f"Grupo '{grupo}'", ids, pasta)
+
+    def preaquecer_linhas(self, rows):
+        ids = []
+        for row in rows:
+            item = self.download_table.item(row, 0)
+            if item is not None:
+                ids.append(int(item.text()))
+        self.preaquecer_ids(ids)
+
+    def preaquecer_ids(self, ids):
+        for download_id in ids:
+            driver = self.get_driver_by_id(download_id)
+            if driver and download_id not in self.current_workers:
+                PRE_AQUECEDOR.aquecer(driver['url'], self.config)
+
+    # Enfileira um conjunto de downloads para uma pasta, com progresso e resumo agregados
+    def baixar_lote(self, nome_lote, ids, pasta, fora_pico=False):
+        self.lote_counter += 1
+        lote_id = self.lote_counter
+
+        label = QLabel()
+        barra = QProgressBar()
+        barra.setValue(0)
+        barra.setAccessibleName(f"Progresso do lote {nome_lote}")
+        lote_layout = QHBoxLayout()
+        lote_layout.setContentsMargins(0, 0, 0, 0)
+        lote_layout.addWidget(label)
+        lote_layout.addWidget(barra)
+        lote_widget = QWidget()
+        lote_widget.setLayout(lote_layout)
+        self.lotes_layout.addWidget(lote_widget)
+
+        self.lotes[lote_id] = {
+            "nome": nome_lote,
+            "total": len(ids),
+            "pendentes": set(ids),
+            "progresso": {},
+            "soma": 0,
+            "resultados": {'baixado': [], 'pulado': [], 'erro': [], 'cancelado': []},
+            "label": label,
+            "barra": barra,
+            "widget": lote_widget
+        }
+
+        usados = set()
+        for download_id in ids:
+            driver = self.get_driver_by_id(download_id)
+            nome, extensao = os.path.splitext(nome_arquivo_driver(driver))
+            save_path = os.path.join(pasta, nome + extensao)
+            contador = 1
+            while save_path in usados:
+                contador += 1
+                save_path = os.path.join(pasta, f"{nome} ({contador}){extensao}")
+            usados.add(save_path)
+            self.lote_por_id[download_id] = lote_id
+            self.enfileirar_download(download_id, driver, save_path, fora_pico)
+
+        self.atualizar_lote(lote_id)
+        self.notificar('info', f"{nome_lote}: {len(ids)} download(s) enfileirado(s) em '{pasta}'.")
+        self.processar_fila()
+
+    # Downloads de grupos marcados como fora de pico também vão para a agenda
+    def enfileirar_download(self, download_id, driver, save_path, fora_pico=False):
+        row = self.get_row_by_id(download_id)
+        if row is None:
+            return
+        if fora_pico or driver.get('grupo') in self.config['grupos_fora_pico']:
+            self.fora_pico[download_id] = save_path
+            self.salvar_agenda()
+            if janela_ativa(self.config['janelas_fora_pico']) is None:
+                self.marcar_agendado(download_id)
+                return
+        self.fila_downloads.append((download_id, driver, save_path))
+
+        status_item = QTableWidgetItem("Na fila")
+        status_item.setTextAlignment(Qt.AlignCenter)
+        self.download_table.setItem(row, 5, status_item)
+
+        cancel_button = BotaoLinha("Cancelar")
+        cancel_button.setIcon(QIcon.fromTheme("process-stop"))
+        cancel_button.clicked.connect(lambda: self.cancelar_download(download_id))
+        self.download_table.setCellWidget(row, 6, cancel_button)
+
+    def agendar_selecionados(self):
+        ids = []
+        for index in self.download_table.selectionModel().selectedRows():
+            if self.download_table.isRowHidden(index.row()):
+                continue
+            download_id = int(self.download_table.item(index.row(), 0).text())
+            if download_id in self.fora_pico or download_id in self.current_workers:
+                continue
+            # Já na fila: passa para a agenda com o mesmo destino
+            na_fila = [item for item in self.fila_downloads if item[0] == download_id]
+            if na_fila:
+                self.fila_downloads.remove(na_fila[0])
+                self.fora_pico[download_id] = na_fila[0][2]
+                self.marcar_agendado(download_id)
+            else:
+                ids.append(download_id)
+        self.salvar_agenda()
+        if ids:
+            pasta = QFileDialog.getExistingDirectory(self, "Pasta de Destino", DOWNLOADS_DIR)
+            if not pasta:
+                return
+            self.baixar_lote("Fora de pico", sorted(ids), pasta, fora_pico=True)
+        self.verificar_janelas()
+
+    def marcar_agendado(self, download_id):
+        row = self.get_row_by_id(download_id)
+        if row is None:
+            return
+        proxima = proxima_janela(self.config['janelas_fora_pico'])
+        status_item = QTableWidgetItem(f"Agendado para {proxima}" if proxima else "Agendado")
+        status_item.setTextAlignment(Qt.AlignCenter)
+        status_item.setToolTip("Download fora de pico: roda só nas janelas configuradas")
+        self.download_table.setItem(row, 5, status_item)
+
+        cancel_button = BotaoLinha("Cancelar")
+        cancel_button.setIcon(QIcon.fromTheme("process-stop"))
+        cancel_button.clicked.connect(lambda: self.cancelar_download(download_id))
+        self.download_table.setCellWidget(row, 6, cancel_button)
+
+    def salvar_agenda(self):
+        agenda = []
+        for download_id, save_path in self.fora_pico.items():
+            driver = self.get_driver_by_id(download_id)
+            if driver:
+                agenda.append({"nome": chave_driver(driver), "save_path": save_path})
+        with open(AGENDA_FILE, 'w', encoding='utf-8') as f:
+            json.dump(agenda, f, indent=4, ensure_ascii=False)
+
+    # Recria a agenda a partir do arquivo (na abertura e quando a tabela é reconstruída)
+    def restaurar_agenda(self):
+        self.fora_pico.clear()
+        if not os.path.exists(AGENDA_FILE):
+            return
+        with open(AGENDA_FILE, 'r', encoding='utf-8') as f:
+            try:
+                agenda = json.load(f)
+            except json.JSONDecodeError:
+                return
+        ids_por_chave = {chave_driver(driver): download_id for download_id, driver in self.drivers_por_id.items()}
+        for entrada in agenda:
+            download_id = ids_por_chave.get(entrada['nome'])
+            if download_id is not None:
+                self.fora_pico[download_id] = entrada['save_path']
+                self.marcar_agendado(download_id)
+
+    # Abre ou fecha as janelas fora de pico: na abertura os agendados entram na fila; no
+    # fechamento saem da fila e os que estão em andamento são suspensos. O arquivo parcial
+    # fica no disco e o download é retomado por Range na próxima janela.
+    @MONITOR_LATENCIA.medir
+    def verificar_janelas(self):
+        janela = janela_ativa(self.config['janelas_fora_pico'])
+        LIMITE_FORA_PICO.definir(janela.get('limite_kbps', 0) * 1024 if janela else 0)
+        na_fila = {item[0] for fila in (self.fila_downloads, self.aguardando_espaco) for item in fila}
+        if janela is not None:
+            for download_id, save_path in self.fora_pico.items():
+                if download_id in self.current_workers or download_id in na_fila:
+                    continue
+                driver = self.get_driver_by_id(download_id)
+                row = self.get_row_by_id(download_id)
+                if driver is None or row is None:
+                    continue
+                self.fila_downloads.append((download_id, driver, save_path))
+                status_item = QTableWidgetItem("Na fila")
+                status_item.setTextAlignment(Qt.AlignCenter)
+                self.download_table.setItem(row, 5, status_item)
+            self.processar_fila()
+            return
+
+        for item in [item for item in self.fila_downloads if item[0] in self.fora_pico]:
+            self.fila_downloads.remove(item)
+            self.marcar_agendado(item[0])
+        for download_id in self.fora_pico:
+            worker = self.current_workers.get(download_id)
+            if worker is not None and download_id not in self.suspensos:
+                self.suspensos.add(download_id)
+                worker.cancel()
+
+    # Duração estimada de um download pelo tamanho conhecido do link e pela vazão típica do host
+    def estimar_duracao(self, driver):
+        info = self.metadados.get(driver['url'])
+        host = urlparse(info['url_final'] if info else RESOLVEDOR_LINKS.url_direta(driver['url'])).netloc
+        vazao = self.vazao_por_host.get(host)
+        if not info or not info['tamanho'] or not vazao:
+            return None
+        return info['tamanho'] / vazao
+
+    # Inicia downloads da fila respeitando o limite de downloads simultâneos.
+    # Os mais rápidos pelas estimativas do histórico saem primeiro; sem estimativa, ordem de chegada.
+    @MONITOR_LATENCIA.medir
+    def processar_fila(self):
+        while self.fila_downloads and self.transferencias_ativas() < self.config['downloads_simultaneos']:
+            estimativas = [self.estimar_duracao(item[1]) for item in self.fila_downloads]
+            indice = min(range(len(estimativas)),
+                         key=lambda i: (estimativas[i] is None, estimativas[i] or 0, i))
+            download_id, driver, save_path = self.fila_downloads.pop(indice)
+            if not self.iniciar_download_em(download_id, driver, save_path, pular_existente=True):
+                # A linha foi removida enquanto aguardava na fila
+                self.registrar_resultado_lote(download_id, 'cancelado')
+
+    def atualizar_lote(self, lote_id):
+        lote = self.lotes[lote_id]
+        concluidos = lote["total"] - len(lote["pendentes"])
+        lote["label"].setText(f"{lote['nome']}: {concluidos}/{lote['total']}")
+        lote["barra"].setValue(int(lote["soma"] / lote["total"]))
+
+    def registrar_resultado_lote(self, download_id, resultado):
+        lote_id = self.lote_por_id.pop(download_id, None)
+        if lote_id is None:
+            return
+        lote = self.lotes[lote_id]
+        lote["pendentes"].discard(download_id)
+        lote["soma"] += 100 - lote["progresso"].pop(download_id, 0)
+        driver = self.get_driver_by_id(download_id)
+        lote["resultados"][resultado].append(driver['nome'] if driver else str(download_id))
+        self.atualizar_lote(lote_id)
+        if not lote["pendentes"]:
+            self.concluir_lote(lote_id)
+
+    def concluir_lote(self, lote_id):
+        lote = self.lotes.pop(lote_id)
+        self.lotes_layout.removeWidget(lote["widget"])
+        lote["widget"].deleteLater()
+
+        resultados = lote["resultados"]
+        resumo = (
+            f"{lote['nome']} finalizado: {len(resultados['baixado'])} baixado(s), "
+            f"{len(resultados['pulado'])} já presente(s), {len(resultados['erro'])} erro(s), "
+            f"{len(resultados['cancelado'])} cancelado(s)."
+        )
+        if resultados['erro']:
+            resumo += " Falharam: " + ", ".join(resultados['erro']) + "."
+        self.notificar('erro' if resultados['erro'] else 'sucesso', resumo)
+
+    # Downloads que acompanham outro não ocupam vaga
+    def transferencias_ativas(self):
+        return sum(1 for worker in self.current_workers.values() if not isinstance(worker, DownloadCompartilhado))
+
+    def transferencia_em_andamento(self, driver):
+        for chave in chaves_transferencia(driver):
+            lider = self.transferencias.get(chave)
+            if lider is not None and transferencias_compativeis(driver, self.current_workers[lider].driver):
+                return lider
+        return None
+
+    def registrar_transferencia(self, download_id, driver):
+        for chave in chaves_transferencia(driver):
+            self.transferencias.setdefault(chave, download_id)
+
+    def iniciar_download_em(self, download_id, driver, save_path, pular_existente=False):
+        pause_button = self.preparar_linha_download(download_id)
+        if pause_button is None:
+            return False
+
+        # Mesmo arquivo já sendo baixado por outra linha: acompanhar aquela transferência
+        lider = self.transferencia_em_andamento(driver)
+        if lider is not None:
+            self.current_workers[download_id] = DownloadCompartilhado(
+                download_id, driver, save_path, lider, self.sinais_download
+            )
+            self.seguidores.setdefault(lider, []).append(download_id)
+            self.update_status(download_id, f"Compartilhando o download de '{self.current_workers[lider].driver['nome']}'")
+            # A transferência é do líder: pausar esta linha não teria efeito
+            pause_button.setEnabled(False)
+            pause_button.setToolTip("Download compartilhado: pause o download de origem")
+            row_lider = self.get_row_by_id(lider)
+            progresso = self.download_table.cellWidget(row_lider, 4) if row_lider is not None else None
+            if isinstance(progresso, QProgressBar):
+                self.update_progress(download_id, progresso.value())
+            return True
+
         # Definir prioridade
         priority = self.priority_combo.currentIndex() + 1  # 1: Baixa, 2: Média, 3: Alta
 
-        # Iniciar download em uma thread separada usando QThread
-        progress_bar = QProgressBar()
+        # Os downloads fora de pico ficam no processo da interface, que os suspende e limita a banda
+        if self.daemon_pronto() and download_id not in self.fora_pico:
+            # Download no motor em processo separado
+            job = random.getrandbits(31) or 1
+            while job in self.jobs_remotos:
+                job = random.getrandbits(31) or 1
+            worker = DownloadRemoto(job, driver, os.path.abspath(save_path), self.daemon)
+            self.current_workers[download_id] = worker
+            self.jobs_remotos[job] = download_id
+            self.registrar_transferencia(download_id, driver)
+            self.daemon.enviar({
+                "cmd": "baixar", "job": job, "driver": dict(driver), "save_path": worker.save_path,
+                "extrair": self.config['extrair_zip'], "pular_existente": pular_existente, "config": self.config
+            })
+            return True
+
+        # Iniciar download em uma thread do pool
+        worker = DownloadWorker(
+            download_id, driver, save_path, priority,
+            self.config['extrair_zip'], pular_existente, self.config, self.sinais_download
+        )
+        if download_id in self.fora_pico:
+            worker.limitador = LIMITE_FORA_PICO
+        self.current_workers[download_id] = worker
+        self.registrar_transferencia(download_id, driver)
+        self.pool_downloads.start(worker)
+        return True
+
+    # Fim de uma transferência com linhas acompanhando: cada uma recebe o arquivo (hardlink ou
+    # cópia) se deu certo, herda o erro se falhou, ou volta para o início da fila se o líder
+    # foi cancelado, suspenso ou ficou sem espaço (a primeira assume a transferência)
+    def concluir_transferencia(self, download_id, success, message, worker):
+        if isinstance(worker, DownloadCompartilhado):
+            seguidores = self.seguidores.get(worker.lider, [])
+            if download_id in seguidores:
+                seguidores.remove(download_id)
+            return
+        for chave in [chave for chave, lider in self.transferencias.items() if lider == download_id]:
+            del self.transferencias[chave]
+        seguidores = [
+            self.current_workers[seguidor] for seguidor in self.seguidores.pop(download_id, [])
+            if isinstance(self.current_workers.get(seguidor), DownloadCompartilhado)
+            and not self.current_workers[seguidor]._is_canceled
+        ]
+        liberar = worker is None or not success and (worker.sem_espaco or "cancelado" in message.lower())
+        for seguidor in (reversed(seguidores) if liberar else seguidores):
+            if success:
+                copia = DownloadWorker(
+                    seguidor.download_id, seguidor.driver, seguidor.save_path, 1,
+                    self.config['extrair_zip'], False, self.config, self.sinais_download
+                )
+                copia.origem_compartilhada = worker.save_path
+                copia.origem_verificada = bool(seguidor.driver.get('checksum')) and \
+                    seguidor.driver.get('checksum') == worker.driver.get('checksum')
+                if not seguidor.driver.get('checksum'):
+                    copia.checksum_calculado = worker.checksum_calculado
+                self.current_workers[seguidor.download_id] = copia
+                self.pool_downloads.start(copia)
+            elif liberar:
+                del self.current_workers[seguidor.download_id]
+                self.fila_downloads.insert(0, (seguidor.download_id, seguidor.driver, seguidor.save_path))
+                self.update_status(seguidor.download_id, "Na fila")
+            else:
+                # A linha mantém o botão "Baixar" para tentar de novo
+                seguidor.erro_retomavel = True
+                seguidor.finalizar(False, f"Driver '{seguidor.driver['nome']}': o download compartilhado falhou. {message}")
+
+    # Barra de progresso, status e botões de pausar/cancelar de um download em andamento.
+    # Retorna o botão de pausa, ou None se a linha não existe mais.
+    def preparar_linha_download(self, download_id):
+        # A linha pode ter mudado de posição desde a criação do botão
+        row = self.get_row_by_id(download_id)
+        if row is None:
+            return None
+
+        progress_bar = BarraLinha()
         progress_bar.setValue(0)
-        self.download_table.setCellWidget(row, 2, progress_bar)
+        self.download_table.setCellWidget(row, 4, progress_bar)
 
         status_item = QTableWidgetItem("Baixando")
         status_item.setTextAlignment(Qt.AlignCenter)
-        self.download_table.setItem(row, 3, status_item)
+        self.download_table.setItem(row, 5, status_item)
 
         # Ações: Botões para pausar e cancelar
-        pause_button = QPushButton("Pausar")
+        pause_button = BotaoLinha("Pausar")
         pause_button.setIcon(QIcon.fromTheme("media-playback-pause"))
-        cancel_button = QPushButton("Cancelar")
+        cancel_button = BotaoLinha("Cancelar")
         cancel_button.setIcon(QIcon.fromTheme("process-stop"))
 
         action_layout = QHBoxLayout()
@@ -1405,31 +4675,144 @@ class DriverDownloaderApp(QMainWindow):
         action_layout.addWidget(cancel_button)
         action_widget = QWidget()
         action_widget.setLayout(action_layout)
-        self.download_table.setCellWidget(row, 4, action_widget)
+        self.download_table.setCellWidget(row, 6, action_widget)
 
         # Conectar botões
         pause_button.clicked.connect(lambda: self.pausar_download(download_id, pause_button))
         cancel_button.clicked.connect(lambda: self.cancelar_download(download_id))
+        return pause_button
 
-        # Iniciar download
-        thread = QThread()
-        worker = DownloadWorker(download_id, driver, save_path, priority)
-        worker.moveToThread(thread)
-
-        # Conectar sinais e slots
-        thread.started.connect(worker.run)
-        worker.progress_changed.connect(lambda id, progress: self.update_progress(id, progress))
-        worker.download_finished.connect(lambda id, success, message: self.download_finished(id, success, message))
-        worker.download_finished.connect(thread.quit)
-        worker.download_finished.connect(worker.deleteLater)
-        thread.finished.connect(thread.deleteLater)
-
-        # Manter referência às threads e workers
-        self.current_threads[download_id] = thread
-        self.current_workers[download_id] = worker
+    def toggle_daemon(self, checked):
+        self.config['daemon_ativo'] = checked
+        salvar_config(self.config)
+        # Desligar só vale para os próximos downloads: os que estão no motor continuam
+        if checked:
+            self.iniciar_daemon()
+
+    def daemon_pronto(self):
+        return self.config['daemon_ativo'] and self.daemon is not None and self.daemon_sessao
+
+    def iniciar_daemon(self):
+        if self.daemon is None:
+            self.daemon = ClienteDaemon(self.config['daemon_porta'], self)
+            self.daemon.conectado.connect(lambda: self.daemon.enviar({"cmd": "estado"}))
+            self.daemon.evento_recebido.connect(self.evento_daemon)
+            self.daemon.desconectado.connect(self.daemon_desconectado)
+            self.daemon.falhou.connect(self.daemon_falhou)
+        if not self.daemon.pronto:
+            self.daemon_tentativas = 0
+            self.daemon.conectar()
+
+    # Motor ainda não está rodando: iniciá-lo na primeira falha e tentar conectar de novo
+    def daemon_falhou(self):
+        self.daemon_tentativas += 1
+        if self.daemon_tentativas == 1:
+            opcoes = {}
+            if sys.platform == 'win32':
+                opcoes['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+            else:
+                opcoes['start_new_session'] = True
+            try:
+                subprocess.Popen(
+                    comando_daemon(), cwd=os.getcwd(), stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **opcoes
+                )
+            except OSError as e:
+                self.statusBar().showMessage(f"Não foi possível iniciar o motor de downloads: {e}", 10000)
+                return
+        if self.daemon_tentativas <= 20:
+            QTimer.singleShot(250, self.daemon.conectar)
+        else:
+            self.statusBar().showMessage("Motor de downloads indisponível; baixando no próprio processo.", 10000)
+
+    def daemon_desconectado(self):
+        self.daemon_timer.stop()
+        if self.progresso_daemon is not None:
+            self.progresso_daemon.close()
+            self.progresso_daemon = None
+        for job, download_id in list(self.jobs_remotos.items()):
+            del self.jobs_remotos[job]
+            worker = self.current_workers.get(download_id)
+            if worker is not None:
+                worker.erro_retomavel = True
+            self.download_finished(download_id, False, "Conexão com o motor de downloads perdida.")
+        # Depois de uma sessão normal, reconectar (iniciando o motor de novo se ele caiu)
+        if self.daemon_sessao:
+            self.daemon_tentativas = 0
+        self.daemon_sessao = False
+        if self.config['daemon_ativo']:
+            self.daemon_falhou()
+
+    @MONITOR_LATENCIA.medir
+    def evento_daemon(self, evento):
+        tipo = evento.get('evento')
+        if tipo == 'estado':
+            self.daemon_sessao = True
+            self.daemon_tentativas = 0
+            with open(evento['progresso'], 'rb') as f:
+                self.progresso_daemon = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # Downloads que continuaram no motor enquanto a interface estava fechada
+            por_chave = {chave_driver(driver): download_id for download_id, driver in self.drivers_por_id.items()}
+            for job in evento['jobs']:
+                download_id = por_chave.get(chave_driver(job['driver']))
+                if download_id is None or download_id in self.current_workers:
+                    continue
+                pause_button = self.preparar_linha_download(download_id)
+                worker = DownloadRemoto(job['job'], job['driver'], job['save_path'], self.daemon)
+                worker.slot = job['slot']
+                worker._is_paused = job['pausado']
+                self.current_workers[download_id] = worker
+                self.jobs_remotos[job['job']] = download_id
+                self.registrar_transferencia(download_id, job['driver'])
+                self.update_status(download_id, job['status'])
+                if job['pausado']:
+                    pause_button.setText("Retomar")
+                    pause_button.setIcon(QIcon.fromTheme("media-playback-start"))
+            for fim in evento['concluidos']:
+                self.notificar_fim_daemon(fim)
+            self.daemon_timer.start()
+            self.statusBar().showMessage("Conectado ao motor de downloads.", 5000)
+        elif tipo == 'iniciado':
+            worker = self.current_workers.get(self.jobs_remotos.get(evento['job']))
+            if worker is not None:
+                worker.slot = evento['slot']
+        elif tipo == 'status':
+            download_id = self.jobs_remotos.get(evento['job'])
+            if download_id is not None:
+                self.update_status(download_id, evento['status'])
+        elif tipo == 'fim':
+            download_id = self.jobs_remotos.pop(evento['job'], None)
+            if download_id is None:
+                self.notificar_fim_daemon(evento)
+                return
+            worker = self.current_workers.get(download_id)
+            if worker is not None:
+                worker.atualizar(evento)
+            if evento['sucesso']:
+                self.update_progress(download_id, 100)
+            self.download_finished(download_id, evento['sucesso'], evento['mensagem'])
+
+    def notificar_fim_daemon(self, evento):
+        if evento['sucesso']:
+            self.notificar('sucesso', evento['mensagem'])
+        elif "cancelado" in evento['mensagem'].lower():
+            self.notificar('info', evento['mensagem'])
+        else:
+            self.notificar('erro', evento['mensagem'])
 
-        thread.start()
-        QMessageBox.information(self, "Download Iniciado", f"Iniciando download do driver '{driver['nome']}'.")
+    # Progresso dos downloads no motor, lido da memória compartilhada
+    @MONITOR_LATENCIA.medir
+    def ler_progresso_daemon(self):
+        if self.progresso_daemon is None:
+            return
+        for job, download_id in list(self.jobs_remotos.items()):
+            worker = self.current_workers.get(download_id)
+            if worker is None or worker.slot is None:
+                continue
+            slot_job, progresso = SLOT_PROGRESSO.unpack_from(self.progresso_daemon, worker.slot * SLOT_PROGRESSO.size)
+            if slot_job == job and progresso != worker.progresso:
+                worker.progresso = progresso
+                self.update_progress(download_id, progresso)
 
     def pausar_download(self, download_id, button):
         if download_id in self.current_workers:
@@ -1438,20 +4821,36 @@ class DriverDownloaderApp(QMainWindow):
                 worker.pause()
                 button.setText("Retomar")
                 button.setIcon(QIcon.fromTheme("media-playback-start"))
-                self.download_table.setItem(self.get_row_by_id(download_id), 3, QTableWidgetItem("Pausado"))
+                self.download_table.setItem(self.get_row_by_id(download_id), 5, QTableWidgetItem("Pausado"))
             else:
                 worker.resume()
                 button.setText("Pausar")
                 button.setIcon(QIcon.fromTheme("media-playback-pause"))
-                self.download_table.setItem(self.get_row_by_id(download_id), 3, QTableWidgetItem("Baixando"))
+                self.download_table.setItem(self.get_row_by_id(download_id), 5, QTableWidgetItem("Baixando"))
 
     def cancelar_download(self, download_id):
-        if download_id in self.current_workers:
+        agendado = self.fora_pico.pop(download_id, None) is not None
+        if agendado:
+            self.salvar_agenda()
+        na_fila = [(fila, item) for fila in (self.fila_downloads, self.aguardando_espaco)
+                   for item in fila if item[0] == download_id]
+        if na_fila:
+            fila, item = na_fila[0]
+            fila.remove(item)
+            self.download_table.setItem(self.get_row_by_id(download_id), 5, QTableWidgetItem("Cancelado"))
+            self.restaurar_baixar(download_id)
+            self.registrar_resultado_lote(download_id, 'cancelado')
+        elif download_id in self.current_workers:
             worker = self.current_workers[download_id]
             worker.cancel()
-            self.download_table.setItem(self.get_row_by_id(download_id), 3, QTableWidgetItem("Cancelado"))
+            self.download_table.setItem(self.get_row_by_id(download_id), 5, QTableWidgetItem("Cancelado"))
             # Após cancelamento, restaurar o botão "Baixar"
             self.restaurar_baixar(download_id)
+        elif agendado:
+            # Aguardando a próxima janela fora de pico
+            self.download_table.setItem(self.get_row_by_id(download_id), 5, QTableWidgetItem("Cancelado"))
+            self.restaurar_baixar(download_id)
+            self.registrar_resultado_lote(download_id, 'cancelado')
 
     def restaurar_baixar(self, download_id):
         row = self.get_row_by_id(download_id)
@@ -1459,28 +4858,70 @@ class DriverDownloaderApp(QMainWindow):
             driver = self.get_driver_by_id(download_id)
             if driver:
                 # Remover os botões de pausa e cancelar
-                self.download_table.setCellWidget(row, 4, QWidget())
+                self.download_table.setCellWidget(row, 6, QWidget())
 
                 # Adicionar o botão "Baixar" novamente
-                baixar_button = QPushButton("Baixar")
+                baixar_button = BotaoLinha("Baixar")
                 baixar_button.setIcon(QIcon.fromTheme("download"))
-                baixar_button.clicked.connect(lambda _, id=download_id, drv=driver, r=row: self.iniciar_download(id, drv, r))
+                baixar_button.clicked.connect(lambda _, id=download_id: self.iniciar_download(id, self.get_driver_by_id(id)))
                 baixar_button.setAccessibleName("Botão Baixar")
                 baixar_button.setAccessibleDescription("Clique para iniciar o download deste driver")
-                self.download_table.setCellWidget(row, 4, baixar_button)
+                self.download_table.setCellWidget(row, 6, baixar_button)
 
                 # Resetar a barra de progresso
-                progress_bar = QProgressBar()
+                progress_bar = BarraLinha()
                 progress_bar.setValue(0)
-                self.download_table.setCellWidget(row, 2, progress_bar)
+                self.download_table.setCellWidget(row, 4, progress_bar)
 
+    @RASTREADOR.rastrear("sinal progress_changed", "sinal")
+    @MONITOR_LATENCIA.medir
     def update_progress(self, download_id, progress):
+        # As linhas que acompanham esta transferência mostram o mesmo progresso
+        for download_id in (download_id, *self.seguidores.get(download_id, ())):
+            row = self.get_row_by_id(download_id)
+            if row is not None:
+                progress_bar = self.download_table.cellWidget(row, 4)
+                progress_bar.setValue(progress)
+
+            lote_id = self.lote_por_id.get(download_id)
+            if lote_id is not None:
+                lote = self.lotes[lote_id]
+                lote["soma"] += progress - lote["progresso"].get(download_id, 0)
+                lote["progresso"][download_id] = progress
+                self.atualizar_lote(lote_id)
+
+    @RASTREADOR.rastrear("sinal status_changed", "sinal")
+    @MONITOR_LATENCIA.medir
+    def update_status(self, download_id, status):
         row = self.get_row_by_id(download_id)
         if row is not None:
-            progress_bar = self.download_table.cellWidget(row, 2)
-            progress_bar.setValue(progress)
+            status_item = self.download_table.item(row, 5)
+            status_item.setText(status)
+            status_item.setToolTip(status)
 
+    @RASTREADOR.rastrear("sinal download_finished", "sinal")
+    @MONITOR_LATENCIA.medir
     def download_finished(self, download_id, success, message):
+        worker = self.current_workers.get(download_id)
+        self.concluir_transferencia(download_id, success, message, worker)
+        if not success and worker is not None and worker.sem_espaco:
+            # Sem espaço: o job volta para a fila quando houver espaço suficiente
+            del self.current_workers[download_id]
+            self.aguardar_espaco(download_id, worker.driver, worker.save_path, worker.espaco_necessario, message)
+            self.processar_fila()
+            return
+
+        if download_id in self.suspensos:
+            self.suspensos.discard(download_id)
+            if not success and "cancelado" in message.lower() and download_id in self.fora_pico:
+                # Suspenso pelo fechamento da janela: volta para a agenda
+                del self.current_workers[download_id]
+                self.marcar_agendado(download_id)
+                self.processar_fila()
+                return
+        if self.fora_pico.pop(download_id, None) is not None:
+            self.salvar_agenda()
+
         row = self.get_row_by_id(download_id)
         if row is not None:
             if not success:
@@ -1488,38 +4929,247 @@ class DriverDownloaderApp(QMainWindow):
                     status_text = "Cancelado"
                     # Restaurar o botão "Baixar"
                     self.restaurar_baixar(download_id)
+                elif worker is not None and worker.erro_retomavel:
+                    status_text = "Erro"
+                    # Erro de disco: o arquivo parcial foi mantido e o download pode ser retomado
+                    self.restaurar_baixar(download_id)
                 else:
                     status_text = "Erro"
                     # Remover os botões apenas se for um erro
-                    self.download_table.setCellWidget(row, 4, QWidget())
+                    self.download_table.setCellWidget(row, 6, QWidget())
             else:
                 status_text = "Concluído"
                 # Remover os botões após conclusão bem-sucedida
-                self.download_table.setCellWidget(row, 4, QWidget())
+                self.download_table.setCellWidget(row, 6, QWidget())
 
-            status_item = self.download_table.item(row, 3)
+            status_item = self.download_table.item(row, 5)
             status_item.setText(status_text)
+            status_item.setToolTip(message)
 
-            QMessageBox.information(self, "Download Finalizado", message)
+        if success:
+            self.notificar('sucesso', message)
+        elif "cancelado" in message.lower():
+            self.notificar('info', message)
+        else:
+            self.notificar('erro', message)
 
-            # Limpar referências
-            if download_id in self.current_workers:
-                del self.current_workers[download_id]
-            if download_id in self.current_threads:
-                del self.current_threads[download_id]
+        if success:
+            pulado = download_id in self.current_workers and self.current_workers[download_id].pulado
+            resultado = 'pulado' if pulado else 'baixado'
+        else:
+            resultado = 'cancelado' if "cancelado" in message.lower() else 'erro'
+        self.registrar_resultado_lote(download_id, resultado)
+        if success and worker is not None and worker.checksum_calculado:
+            self.registrar_checksum(worker.driver, worker.checksum_calculado)
+        if isinstance(worker, DownloadRemoto):
+            # O motor grava o próprio histórico; aqui só as estimativas são atualizadas
+            if resultado == 'baixado':
+                self.vazao_por_host = self.historico.vazao_estimada()
+        elif worker is not None and worker.inicio is not None and not worker.compartilhado:
+            self.registrar_historico(worker, resultado)
+
+        # Limpar referências (a linha pode ter sido removida pela sincronização)
+        if download_id in self.current_workers:
+            del self.current_workers[download_id]
+        if download_id in self.remocao_adiada:
+            self.remocao_adiada.discard(download_id)
+            self.drivers_por_id.pop(download_id, None)
+            row = self.get_row_by_id(download_id)
+            self.itens_por_id.pop(download_id, None)
+            if row is not None:
+                self.download_table.removeRow(row)
+        self.processar_fila()
+
+    # Checksums calculados no primeiro download confiável de um driver que não tinha nenhum.
+    # Se o catálogo trocou o registro durante o download, o checksum não vale para o novo.
+    def registrar_checksum(self, driver, checksum):
+        if driver.get('checksum') or self.drivers.por_chave(chave_driver(driver)) is not driver:
+            return
+        driver.checksum = checksum
+        driver.extras = dict(driver.extras or {}, checksum_local=True)
+        salvar_drivers(self.drivers)
+        self.catalogo_assinatura = self.assinatura_catalogo()
+
+    def registrar_historico(self, worker, resultado):
+        duracao = time.monotonic() - worker.inicio
+        media = worker._recebidos / duracao if duracao > 0 else 0
+        try:
+            self.historico.registrar(
+                worker.driver['nome'], worker.host, worker._recebidos, duracao,
+                max(worker.vazao_pico, media), worker.tentativas, resultado
+            )
+        except sqlite3.Error as e:
+            self.statusBar().showMessage(f"Erro ao gravar o histórico: {e}", 10000)
+            return
+        if resultado == 'baixado':
+            self.vazao_por_host = self.historico.vazao_estimada()
+
+    def mostrar_historico(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Histórico e Estatísticas")
+        dialog.resize(900, 500)
+        layout = QVBoxLayout()
+        dialog.setLayout(layout)
+
+        periodo_layout = QHBoxLayout()
+        periodo_layout.addWidget(QLabel("Período (dias):"))
+        periodo_spin = QSpinBox()
+        periodo_spin.setRange(1, 3650)
+        periodo_spin.setValue(30)
+        periodo_layout.addWidget(periodo_spin)
+        periodo_layout.addStretch()
+        layout.addLayout(periodo_layout)
+
+        abas = QTabWidget()
+        layout.addWidget(abas)
+
+        hosts_table = QTableWidget()
+        hosts_table.setColumnCount(7)
+        hosts_table.setHorizontalHeaderLabels(
+            ["Host", "Transferências", "Falhas", "Volume", "Vazão p50", "Vazão p95", "Pico"]
+        )
+        hosts_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        hosts_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        abas.addTab(hosts_table, "Por Host")
+
+        recentes_table = QTableWidget()
+        recentes_table.setColumnCount(7)
+        recentes_table.setHorizontalHeaderLabels(
+            ["Quando", "Driver", "Host", "Tamanho", "Duração", "Vazão média", "Resultado"]
+        )
+        recentes_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        recentes_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        abas.addTab(recentes_table, "Transferências Recentes")
+
+        def vazao(valor):
+            return f"{formatar_tamanho(valor)}/s" if valor else "—"
+
+        def preencher(linha, valores, table):
+            for coluna, valor in enumerate(valores):
+                item = QTableWidgetItem(str(valor))
+                item.setTextAlignment(Qt.AlignCenter)
+                table.setItem(linha, coluna, item)
+
+        def atualizar():
+            estatisticas = self.historico.estatisticas_por_host(periodo_spin.value())
+            hosts_table.setRowCount(len(estatisticas))
+            for linha, item in enumerate(estatisticas):
+                preencher(linha, [
+                    item["host"], item["transferencias"], item["falhas"], formatar_tamanho(item["bytes"]),
+                    vazao(item["p50"]), vazao(item["p95"]), vazao(item["pico"])
+                ], hosts_table)
+
+        recentes = self.historico.recentes()
+        recentes_table.setRowCount(len(recentes))
+        for linha, item in enumerate(recentes):
+            preencher(linha, [
+                time.strftime("%d/%m/%Y %H:%M", time.localtime(item["quando"])), item["driver"], item["host"],
+                formatar_tamanho(item["bytes"]), f"{item['duracao']:.1f} s", vazao(item["vazao_media"]),
+                item["resultado"] + (f" ({item['tentativas']} tentativas)" if item["tentativas"] > 1 else "")
+            ], recentes_table)
+
+        periodo_spin.valueChanged.connect(atualizar)
+        atualizar()
+
+        botoes = QDialogButtonBox(QDialogButtonBox.Close)
+        botoes.rejected.connect(dialog.reject)
+        layout.addWidget(botoes)
+        dialog.exec_()
+
+    def aguardar_espaco(self, download_id, driver, save_path, necessario, message):
+        self.aguardando_espaco.append((download_id, driver, save_path, necessario))
+        row = self.get_row_by_id(download_id)
+        if row is not None:
+            status_item = QTableWidgetItem("Aguardando espaço")
+            status_item.setTextAlignment(Qt.AlignCenter)
+            status_item.setToolTip(message)
+            self.download_table.setItem(row, 5, status_item)
+
+            cancel_button = BotaoLinha("Cancelar")
+            cancel_button.setIcon(QIcon.fromTheme("process-stop"))
+            cancel_button.clicked.connect(lambda: self.cancelar_download(download_id))
+            self.download_table.setCellWidget(row, 6, cancel_button)
+        self.notificar('info', message)
+        if not self.espaco_timer.isActive():
+            self.espaco_timer.start()
+
+    # Devolve à fila os downloads que aguardavam espaço e agora cabem no disco
+    def verificar_espaco(self):
+        reserva = self.config['reserva_disco_mb'] * 2**20
+        cota = self.config['cota_mb'] * 2**20
+        liberados = []
+        for item in self.aguardando_espaco:
+            pasta = os.path.dirname(os.path.abspath(item[2]))
+            try:
+                cabe = shutil.disk_usage(pasta).free - reserva >= item[3]
+                if cabe and cota:
+                    cabe = tamanho_pasta(pasta) + item[3] <= cota
+            except OSError:
+                cabe = False
+            if cabe:
+                liberados.append(item)
+        for item in liberados:
+            self.aguardando_espaco.remove(item)
+            self.fila_downloads.insert(0, item[:3])
+            row = self.get_row_by_id(item[0])
+            if row is not None:
+                self.download_table.setItem(row, 5, QTableWidgetItem("Na fila"))
+        if not self.aguardando_espaco:
+            self.espaco_timer.stop()
+        self.processar_fila()
+
+    def notificar(self, tipo, mensagem):
+        icones = {
+            'sucesso': "dialog-ok",
+            'erro': "dialog-error",
+            'info': "dialog-information"
+        }
+        item = QListWidgetItem(QIcon.fromTheme(icones[tipo]), mensagem)
+        self.notification_list.insertItem(0, item)
+        self.notification_counts[tipo] += 1
+        self.atualizar_resumo_notificacoes()
+
+    def limpar_notificacoes(self):
+        self.notification_list.clear()
+        self.notification_counts = {'sucesso': 0, 'erro': 0, 'info': 0}
+        self.atualizar_resumo_notificacoes()
+
+    def atualizar_resumo_notificacoes(self):
+        self.notification_summary.setText(
+            f"Concluídos: {self.notification_counts['sucesso']}    Erros: {self.notification_counts['erro']}"
+        )
 
     def get_driver_by_name(self, nome):
-        for driver in self.drivers:
-            if driver['nome'] == nome:
-                return driver
-        return None
+        return self.drivers.por_chave(nome)
+
+    def closeEvent(self, event):
+        # Interromper a consulta dos links e os downloads antes de destruir as threads.
+        # Uma alteração no drivers.json depois disso não recarrega mais o catálogo.
+        self.catalogo_observador.blockSignals(True)
+        self.catalogo_timer.stop()
+        self.sondagem_pendente = None
+        if self.metadados_worker is not None:
+            self.metadados_worker.cancelar()
+            self.metadados_thread.quit()
+            self.metadados_thread.wait()
+        self.fila_downloads.clear()
+        MONITOR_LATENCIA.parar()
+        # Downloads fora de pico interrompidos continuam na agenda e são retomados na próxima abertura
+        self.suspensos.update(self.fora_pico)
+        # Os downloads no motor separado continuam com a interface fechada
+        for worker in self.current_workers.values():
+            if isinstance(worker, DownloadWorker):
+                worker.cancel()
+        self.pool_downloads.waitForDone()
+        CACHE_DNS.desinstalar()
+        super().closeEvent(event)
 
     def get_row_by_id(self, download_id):
-        for row in range(self.download_table.rowCount()):
-            item = self.download_table.item(row, 0)
-            if item and int(item.text()) == download_id:
-                return row
-        return None
+        item = self.itens_por_id.get(download_id)
+        if item is None or sip.isdeleted(item):
+            return None
+        row = self.download_table.row(item)
+        return row if row >= 0 else None
 
     def show_credits(self):
         credits_text = """
@@ -1529,145 +5179,73 @@ class DriverDownloaderApp(QMainWindow):
         """
         QMessageBox.information(self, "Créditos", credits_text)
 
+    @RASTREADOR.rastrear("filtrar_drivers", "tabela")
+    @MONITOR_LATENCIA.medir
     def filtrar_drivers(self, texto):
         texto = texto.lower()
-        for row in range(self.download_table.rowCount()):
-            driver_name = self.download_table.item(row, 1).text().lower()
-            download_id = int(self.download_table.item(row, 0).text())
-            driver = self.get_driver_by_id(download_id)
-            grupo = driver.get('grupo', '').lower() if driver else ''
-            if texto in driver_name or texto in grupo:
-                self.download_table.setRowHidden(row, False)
-            else:
-                self.download_table.setRowHidden(row, True)
+        tabela = self.download_table
+        # Só as linhas que mudam de estado: cada setRowHidden refaz o layout do cabeçalho
+        for download_id, item in self.itens_por_id.items():
+            driver = self.drivers_por_id.get(download_id)
+            if driver is None or sip.isdeleted(item):
+                continue
+            oculta = texto not in driver['nome'].lower() and texto not in driver.get('grupo', '').lower()
+            row = tabela.row(item)
+            if row >= 0 and tabela.isRowHidden(row) != oculta:
+                tabela.setRowHidden(row, oculta)
 
     def get_driver_by_id(self, download_id):
-        # Map download_id to driver index (download_id starts at 1)
-        index = download_id - 1
-        if 0 <= index < len(self.drivers):
-            return self.drivers[index]
-        return None
+        return self.drivers_por_id.get(download_id)
 
-    def toggle_theme(self, checked):
+    def toggle_extrair_zip(self, checked):
+        self.config['extrair_zip'] = checked
+        salvar_config(self.config)
+
+    def toggle_http2(self, checked):
+        self.config['http2'] = checked
+        salvar_config(self.config)
+
+    def toggle_rastreamento(self, checked):
+        self.config['rastreamento'] = checked
+        salvar_config(self.config)
         if checked:
-            # Tema Escuro
-            dark_stylesheet = """
-            QMainWindow {
-                background-color: #1E1E1E;
-                color: #FFFFFF;
-            }
-            QLabel {
-                color: #2E8B57;
-            }
-            QPushButton {
-                background-color: #333333;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-                border-radius: 5px;
-                padding: 5px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background-color: #555555;
-            }
-            QLineEdit {
-                background-color: #2E2E2E;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QComboBox {
-                background-color: #2E2E2E;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QTableWidget {
-                background-color: #2E2E2E;
-                color: #FFFFFF;
-                border: 1px solid #555555;
-            }
-            QHeaderView::section {
-                background-color: #444444;
-                color: #FFFFFF;
-                padding: 4px;
-                border: 1px solid #555555;
-            }
-            QProgressBar {
-                border: 1px solid #555555;
-                border-radius: 5px;
-                text-align: center;
-                height: 20px;
-            }
-            QProgressBar::chunk {
-                background-color: #2E8B57;
-                width: 20px;
-            }
-            """
-            self.setStyleSheet(dark_stylesheet)
+            RASTREADOR.iniciar(self.config['rastreamento_max_eventos'])
         else:
-            # Tema Claro
-            light_stylesheet = """
-            QMainWindow {
-                background-color: #F0F0F0;
-                color: #000000;
-            }
-            QLabel {
-                color: #2E8B57;
-            }
-            QPushButton {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                padding: 5px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background-color: #DDDDDD;
-            }
-            QLineEdit {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QComboBox {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QTableWidget {
-                background-color: #FFFFFF;
-                color: #000000;
-                border: 1px solid #CCCCCC;
-            }
-            QHeaderView::section {
-                background-color: #DDDDDD;
-                color: #000000;
-                padding: 4px;
-                border: 1px solid #CCCCCC;
-            }
-            QProgressBar {
-                border: 1px solid #CCCCCC;
-                border-radius: 5px;
-                text-align: center;
-                height: 20px;
-            }
-            QProgressBar::chunk {
-                background-color: #2E8B57;
-                width: 20px;
-            }
-            """
-            self.setStyleSheet(light_stylesheet)
+            RASTREADOR.parar()
+
+    def exportar_rastreamento(self):
+        if not RASTREADOR.eventos:
+            self.notificar('info', "Nenhum trecho rastreado ainda. Ative 'Rastrear Execução' no menu Ajuda.")
+            return
+        caminho, _ = QFileDialog.getSaveFileName(self, "Exportar Rastreamento", "rastreamento.json", "JSON Files (*.json)")
+        if not caminho:
+            return
+        try:
+            RASTREADOR.exportar(caminho)
+        except OSError as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao exportar o rastreamento: {e}")
+            return
+        self.notificar('info', f"{len(RASTREADOR.eventos)} trechos exportados para '{caminho}'.")
+
+    @MONITOR_LATENCIA.medir
+    def toggle_theme(self, checked):
+        self.config['tema'] = 'escuro' if checked else 'claro'
+        salvar_config(self.config)
+        self.aplicar_tema(self.config['tema'])
 
 # Executar a aplicação
 def main():
+    # Motor de downloads em processo separado, sem interface
+    if len(sys.argv) == 2 and sys.argv[1] == '--daemon':
+        executar_daemon(carregar_config())
+        return
+
+    # Publicação: gerar o manifesto de blocos de um driver sem abrir a interface
+    if len(sys.argv) == 3 and sys.argv[1] == '--gerar-manifesto':
+        with open(sys.argv[2] + '.manifesto.json', 'w', encoding='utf-8') as f:
+            json.dump(gerar_manifesto_blocos(sys.argv[2]), f)
+        return
+
     app = QApplication(sys.argv)
 
     # Definir ícones do tema (opcional, dependendo do SO)
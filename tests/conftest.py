@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import time
+
+# Interface sem tela: o offscreen precisa ser escolhido antes de importar o PyQt5
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PyQt5.QtWidgets import QApplication, QMessageBox, QInputDialog, QFileDialog, QDialog
+
+import main
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance() or QApplication(sys.argv)
+    yield app
+
+
+# O aplicativo grava catálogo, configuração e caches no diretório atual
+@pytest.fixture(scope="module")
+def pasta_isolada(tmp_path_factory):
+    anterior = os.getcwd()
+    pasta = tmp_path_factory.mktemp("geraldivers")
+    os.chdir(pasta)
+    yield pasta
+    os.chdir(anterior)
+
+
+# Diálogos modais travariam a execução sem ninguém para respondê-los: todos são
+# cancelados na hora, e as chamadas ficam registradas para conferência
+@pytest.fixture(scope="module")
+def dialogos_modais():
+    chamadas = []
+
+    def registrar(nome, resposta):
+        def dialogo(*args, **kwargs):
+            chamadas.append(nome)
+            return resposta
+        return dialogo
+
+    substituicoes = [
+        (QMessageBox, "information", QMessageBox.Ok),
+        (QMessageBox, "warning", QMessageBox.Ok),
+        (QMessageBox, "critical", QMessageBox.Ok),
+        (QMessageBox, "question", QMessageBox.No),
+        (QInputDialog, "getText", ("", False)),
+        (QInputDialog, "getItem", ("", False)),
+        (QInputDialog, "getInt", (0, False)),
+        (QFileDialog, "getOpenFileName", ("", "")),
+        (QFileDialog, "getSaveFileName", ("", "")),
+        (QFileDialog, "getExistingDirectory", ""),
+        (QDialog, "exec_", QDialog.Rejected),
+    ]
+    originais = [(classe, nome, getattr(classe, nome)) for classe, nome, _ in substituicoes]
+    for classe, nome, resposta in substituicoes:
+        setattr(classe, nome, registrar(f"{classe.__name__}.{nome}", resposta))
+    yield chamadas
+    for classe, nome, original in originais:
+        setattr(classe, nome, original)
+
+
+# Catálogo sintético com n drivers em grupos de 50, já com metadados recentes
+# (sem a consulta dos links em segundo plano, que dependeria da rede)
+@pytest.fixture(scope="module")
+def catalogo_sintetico(pasta_isolada):
+    return gerar_catalogo
+
+
+def gerar_catalogo(n):
+    drivers = [
+        {"nome": f"Driver {i:05d}", "url": f"https://exemplo.invalid/drivers/{i}.exe", "grupo": f"Grupo {i % 50:02d}"}
+        for i in range(n)
+    ]
+    agora = time.time()
+    metadados = {
+        driver["url"]: {
+            "verificado_em": agora, "alcancavel": True, "tamanho": 1024 * (i + 1), "ranges": True,
+            "url_final": driver["url"], "modificado": "", "tipo": "application/octet-stream", "problema": ""
+        }
+        for i, driver in enumerate(drivers)
+    }
+    with open(main.DRIVERS_FILE, "w", encoding="utf-8") as f:
+        json.dump(drivers, f)
+    with open(main.METADADOS_FILE, "w", encoding="utf-8") as f:
+        json.dump(metadados, f)
+    return drivers
@@ -0,0 +1,131 @@
+import os
+import json
+import hashlib
+import threading
+import http.server
+
+import pytest
+
+import main
+
+BLOCO = 4096
+ANTIGO = os.urandom(BLOCO * 8)
+NOVO = ANTIGO[:BLOCO * 5] + os.urandom(BLOCO) + ANTIGO[BLOCO * 6:]
+
+
+# O cache entre pares global guardaria a versão nova para os testes seguintes
+@pytest.fixture(autouse=True)
+def cache_pares(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "CACHE_PARES", main.CachePares(str(tmp_path / "pares_cache.json")))
+
+
+# Origem com Range e manifesto de blocos; registra os pedidos (método, caminho, Range)
+@pytest.fixture
+def servidor(tmp_path):
+    caminho = tmp_path / "manifesto_origem.exe"
+    caminho.write_bytes(NOVO)
+    estado = {
+        "manifesto": json.dumps(main.gerar_manifesto_blocos(str(caminho), BLOCO)).encode("utf-8"),
+        "status_manifesto": 200,
+        "falhas_get": [],
+        "pedidos": [],
+    }
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(NOVO)))
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+
+        def do_GET(self):
+            estado["pedidos"].append((self.path, self.headers.get("Range")))
+            if self.path == "/manifesto.json":
+                if estado["status_manifesto"] != 200:
+                    self.send_error(estado["status_manifesto"])
+                    return
+                self._enviar(200, estado["manifesto"])
+                return
+            if estado["falhas_get"]:
+                self.send_error(estado["falhas_get"].pop(0))
+                return
+            intervalo = self.headers.get("Range")
+            if intervalo:
+                inicio, fim = (int(parte) for parte in intervalo[len("bytes="):].split("-"))
+                self._enviar(206, NOVO[inicio:fim + 1], {"Content-Range": f"bytes {inicio}-{fim}/{len(NOVO)}"})
+            else:
+                self._enviar(200, NOVO)
+
+        def _enviar(self, status, corpo, cabecalhos=None):
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.send_header("Accept-Ranges", "bytes")
+            for nome, valor in (cabecalhos or {}).items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}", estado
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def executar(base, destino, checksum=None, **config):
+    destino.write_bytes(ANTIGO)
+    driver = main.Driver("Driver", f"{base}/driver.exe", "Grupo",
+                         checksum or f"sha256:{hashlib.sha256(NOVO).hexdigest()}",
+                         {"manifesto": f"{base}/manifesto.json"})
+    config = dict({"tentativas_max": 2, "backoff_base": 0.05, "backoff_max": 0.1}, **config)
+    worker = main.DownloadWorker(1, driver, str(destino), config=config)
+    fins = []
+    worker.download_finished.connect(lambda download_id, sucesso, mensagem: fins.append((sucesso, mensagem)))
+    worker.run()
+    return worker, fins
+
+
+def test_blocos_inalterados_nao_sao_baixados(servidor, tmp_path):
+    base, estado = servidor
+    # A primeira requisição por Range falha: a nova tentativa continua o mesmo trecho
+    estado["falhas_get"] = [503]
+    worker, fins = executar(base, tmp_path / "driver.exe")
+    assert fins[0][0], fins
+    assert (tmp_path / "driver.exe").read_bytes() == NOVO
+    assert estado["pedidos"] == [
+        ("/manifesto.json", None),
+        ("/driver.exe", f"bytes={BLOCO * 5}-{BLOCO * 6 - 1}"),
+        ("/driver.exe", f"bytes={BLOCO * 5}-{BLOCO * 6 - 1}"),
+    ]
+    assert worker.delta == (BLOCO, len(NOVO))
+    assert not os.path.exists(tmp_path / "driver.exe.parcial")
+
+
+def test_manifesto_indisponivel_baixa_a_versao_completa(servidor, tmp_path):
+    base, estado = servidor
+    estado["status_manifesto"] = 404
+    _, fins = executar(base, tmp_path / "driver.exe")
+    assert fins[0][0], fins
+    assert estado["pedidos"] == [("/manifesto.json", None), ("/driver.exe", None)]
+    assert (tmp_path / "driver.exe").read_bytes() == NOVO
+    assert not os.path.exists(tmp_path / "driver.exe.novo")
+
+
+@pytest.mark.parametrize("falha", ["download", "checksum"])
+def test_falha_mantem_a_copia_antiga(servidor, tmp_path, falha):
+    base, estado = servidor
+    estado["status_manifesto"] = 500
+    checksum = None
+    if falha == "download":
+        estado["falhas_get"] = [500, 500]
+    else:
+        checksum = "sha256:" + "0" * 64
+    _, fins = executar(base, tmp_path / "driver.exe", checksum)
+    assert not fins[0][0]
+    assert (tmp_path / "driver.exe").read_bytes() == ANTIGO
+    if falha == "checksum":
+        assert fins[0][1].endswith("A versão anterior foi mantida.")
+        assert not os.path.exists(tmp_path / "driver.exe.novo")
@@ -0,0 +1,29 @@
+import socket
+
+import main
+
+
+def test_cache_limitado_e_desinstalavel(monkeypatch):
+    consultas = []
+
+    def resolver(host, port, family=0, type=0, proto=0, flags=0):
+        consultas.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", resolver)
+    monkeypatch.setattr(main.CacheDns, "MAXIMO", 2)
+    cache = main.CacheDns()
+    cache.instalar(300)
+    assert socket.getaddrinfo == cache.getaddrinfo
+
+    for host in ("a.example", "b.example", "a.example", "c.example"):
+        socket.getaddrinfo(host, 443)
+    # "a" foi usado depois de "b": é "b" que sai quando "c" entra
+    assert consultas == ["a.example", "b.example", "c.example"]
+    assert [chave[0] for chave in cache._entradas] == ["a.example", "c.example"]
+    socket.getaddrinfo("b.example", 443)
+    assert consultas[-1] == "b.example"
+
+    cache.desinstalar()
+    assert socket.getaddrinfo is resolver
+    assert not cache._entradas
@@ -0,0 +1,123 @@
+import io
+import os
+import hashlib
+import zipfile
+import threading
+import http.server
+
+import pytest
+
+import main
+
+CONTEUDO = os.urandom(128 * 1024)
+SHA256 = hashlib.sha256(CONTEUDO).hexdigest()
+
+
+# Duas instâncias do cache na mesma máquina, cada uma com o próprio registro
+@pytest.fixture
+def pares(tmp_path, monkeypatch):
+    origem = main.CachePares(str(tmp_path / "origem.json"))
+    destino = main.CachePares(str(tmp_path / "destino.json"))
+    monkeypatch.setattr(main, "CACHE_PARES", destino)
+    yield origem, destino
+    origem.parar()
+    destino.parar()
+
+
+def test_escuta_apenas_no_loopback_por_padrao(pares):
+    origem, _ = pares
+    origem.iniciar()
+    assert origem._servidor.server_address[0] == "127.0.0.1"
+    assert main.DEFAULT_CONFIG["pares_endereco"] == "127.0.0.1"
+
+
+def test_download_de_outro_par_pelo_sha256(pares, tmp_path):
+    origem, destino = pares
+    arquivo = tmp_path / "compartilhado" / "driver.exe"
+    arquivo.parent.mkdir()
+    arquivo.write_bytes(CONTEUDO)
+    origem.registrar(SHA256, str(arquivo))
+    origem.iniciar()
+    destino.iniciar()
+
+    # A origem do catálogo é inalcançável: o arquivo só pode vir do par
+    driver = main.Driver("Driver", "http://127.0.0.1:9/driver.exe", "Grupo", f"sha256:{SHA256}")
+    salvo = tmp_path / "baixado" / "driver.exe"
+    salvo.parent.mkdir()
+    config = {"pares_ativo": True, "pares_descoberta": False,
+              "pares_lista": [f"127.0.0.1:{origem.porta}"], "tentativas_max": 1}
+    worker = main.DownloadWorker(1, driver, str(salvo), config=config)
+    fins = []
+    worker.download_finished.connect(lambda download_id, sucesso, mensagem: fins.append(sucesso))
+    worker.run()
+
+    assert fins == [True]
+    assert worker.par == f"127.0.0.1:{origem.porta}"
+    assert salvo.read_bytes() == CONTEUDO
+    # O arquivo verificado passa a ser servido também pela segunda instância
+    assert destino.caminho(SHA256) == str(salvo)
+
+
+def zip_valido():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("driver.inf", os.urandom(4096) * 4)
+    return buf.getvalue()
+
+
+# Servidor que entrega o mesmo corpo em qualquer caminho, contando os GETs
+def servir(corpo):
+    pedidos = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self._cabecalhos()
+
+        def do_GET(self):
+            pedidos.append(self.path)
+            self._cabecalhos()
+            self.wfile.write(corpo)
+
+        def _cabecalhos(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.send_header("Content-Type", "application/octet-stream")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, pedidos
+
+
+def test_par_com_zip_corrompido_cai_para_a_origem(pares, tmp_path):
+    valido = zip_valido()
+    corrompido = bytearray(valido)
+    for i in range(60, 400):
+        corrompido[i] ^= 0x5A
+    par, pedidos_par = servir(bytes(corrompido))
+    origem, pedidos_origem = servir(valido)
+    try:
+        driver = main.Driver("Driver", f"http://127.0.0.1:{origem.server_port}/driver.zip", "Grupo",
+                             f"sha256:{hashlib.sha256(valido).hexdigest()}")
+        salvo = tmp_path / "driver.zip"
+        config = {"pares_ativo": True, "pares_descoberta": False,
+                  "pares_lista": [f"127.0.0.1:{par.server_port}"], "tentativas_max": 1}
+        worker = main.DownloadWorker(1, driver, str(salvo), extrair=True, config=config)
+        fins = []
+        worker.download_finished.connect(lambda download_id, sucesso, mensagem: fins.append((sucesso, mensagem)))
+        worker.run()
+    finally:
+        for httpd in (par, origem):
+            httpd.shutdown()
+            httpd.server_close()
+
+    assert fins[0][0], fins
+    assert len(pedidos_par) == 1 and len(pedidos_origem) == 1
+    assert worker.par is None
+    assert salvo.read_bytes() == valido
+    assert not os.path.exists(str(salvo) + ".par")
+    with zipfile.ZipFile(io.BytesIO(valido)) as z:
+        assert (tmp_path / "driver" / "driver.inf").read_bytes() == z.read("driver.inf")
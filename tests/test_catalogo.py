@@ -0,0 +1,166 @@
+import json
+import time
+import threading
+import http.server
+
+import pytest
+
+import main
+
+
+def catalogo():
+    return main.CatalogoDrivers([
+        {"nome": "A", "url": "https://a.example/a.exe", "grupo": "Fiscal"},
+        {"nome": "B", "url": "https://b.example/b.exe", "grupo": "Fiscal"},
+    ])
+
+
+def test_delta_compara_os_dados_dos_drivers():
+    locais = catalogo()
+    remotos = [dict(driver) for driver in locais]
+    remotos[1]["url"] = "https://b.example/b2.exe"
+    delta = main.calcular_delta_catalogo(locais, remotos)
+    assert delta == {"adicionados": [], "alterados": [remotos[1]], "removidos": []}
+    assert main.calcular_delta_catalogo(locais, list(locais))["alterados"] == []
+
+
+def test_substituir_troca_o_objeto_sem_alterar_o_antigo():
+    drivers = catalogo()
+    atual = drivers[1]
+    novo = drivers.substituir(atual, {"nome": "B", "url": "https://b.example/b2.exe", "grupo": "Fiscal"})
+    assert novo is not atual and atual.url == "https://b.example/b.exe"
+    assert drivers[1] is novo
+    assert drivers.por_chave(main.chave_driver(novo)) is novo
+    assert drivers.por_grupo("Fiscal") == [drivers[0], novo]
+    assert drivers.por_host("b.example") == [novo]
+
+
+def test_alteracao_no_catalogo_atualiza_a_tabela(qapp, pasta_isolada, dialogos_modais):
+    janela = main.DriverDownloaderApp()
+    janela.drivers = catalogo()
+    janela.atualizar_table()
+    download_id = next(i for i, driver in janela.drivers_por_id.items() if driver["nome"] == "B")
+    antigo = janela.get_driver_by_id(download_id)
+    remotos = [dict(driver) for driver in janela.drivers]
+    remotos[1]["url"] = "https://b.example/b2.exe"
+
+    assert janela.aplicar_delta_catalogo(main.calcular_delta_catalogo(janela.drivers, remotos), salvar=False) == (0, 1, 0)
+    assert janela.get_driver_by_id(download_id)["url"] == "https://b.example/b2.exe"
+    assert antigo["url"] == "https://b.example/b.exe"
+    janela.close()
+
+
+def test_checksum_calculado_localmente_nao_vira_alteracao():
+    locais = catalogo()
+    locais[0].checksum = "sha256:" + "ab" * 32
+    locais[0].extras = {"checksum_local": True}
+    remotos = [{campo: valor for campo, valor in dict(driver).items() if campo != "checksum_local"}
+               for driver in locais]
+    remotos[0]["checksum"] = ""
+    assert main.calcular_delta_catalogo(locais, remotos)["alterados"] == []
+
+    # Uma alteração real mantém o checksum local enquanto a URL for a mesma
+    remotos[0]["grupo"] = "Não Fiscal"
+    delta = main.calcular_delta_catalogo(locais, remotos)
+    assert delta["alterados"] == [remotos[0]]
+    novo = locais.substituir(locais[0], remotos[0])
+    assert novo.grupo == "Não Fiscal" and novo.checksum == "sha256:" + "ab" * 32
+    assert novo["checksum_local"] is True
+
+
+def test_checksum_que_veio_do_catalogo_segue_o_catalogo():
+    locais = catalogo()
+    locais[0].checksum = "sha256:" + "ab" * 32
+    remotos = [dict(driver) for driver in locais]
+    remotos[0]["checksum"] = ""
+    # Sem a marca de checksum local, o remoto que retirou o checksum é uma alteração
+    assert main.calcular_delta_catalogo(locais, remotos)["alterados"] == [remotos[0]]
+    assert not locais.substituir(locais[0], remotos[0]).checksum
+
+    # Com a marca, uma URL nova invalida o checksum calculado para a antiga
+    locais[1].checksum = "sha256:" + "cd" * 32
+    locais[1].extras = {"checksum_local": True}
+    remoto = {"nome": "B", "url": "https://b.example/b2.exe", "grupo": "Fiscal"}
+    assert main.mesclar_campos_locais(locais[1], remoto) == remoto
+
+
+def test_checksum_registrado_fica_marcado_como_local(qapp, pasta_isolada, dialogos_modais):
+    janela = main.DriverDownloaderApp()
+    janela.drivers = catalogo()
+    driver = janela.drivers[0]
+    janela.registrar_checksum(driver, "sha256:" + "ef" * 32)
+    assert driver["checksum_local"] is True
+    with open(main.DRIVERS_FILE, encoding="utf-8") as f:
+        salvo = json.load(f)[0]
+    assert salvo["checksum"] == "sha256:" + "ef" * 32 and salvo["checksum_local"] is True
+
+    # O catálogo remoto sem checksum não desfaz o registro
+    remotos = [{"nome": "A", "url": "https://a.example/a.exe", "grupo": "Fiscal"},
+               {"nome": "B", "url": "https://b.example/b.exe", "grupo": "Fiscal"}]
+    assert main.calcular_delta_catalogo(janela.drivers, remotos)["alterados"] == []
+    # Um checksum já presente não é sobrescrito
+    janela.registrar_checksum(driver, "sha256:" + "00" * 32)
+    assert driver.checksum == "sha256:" + "ef" * 32
+    janela.close()
+
+
+# Endpoint do catálogo remoto com ETag: responde 304 quando If-None-Match confere
+@pytest.fixture
+def endpoint_catalogo():
+    respostas = []
+    corpo = json.dumps([dict(driver) for driver in catalogo()]).encode("utf-8")
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == '"v1"':
+                respostas.append(304)
+                self.send_response(304)
+                self.end_headers()
+                return
+            respostas.append(200)
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/catalogo.json", respostas
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_catalogo_inalterado_responde_304_sem_refazer_a_tabela(qapp, pasta_isolada, dialogos_modais,
+                                                              endpoint_catalogo, monkeypatch):
+    url, respostas = endpoint_catalogo
+    janela = main.DriverDownloaderApp()
+    janela.drivers = catalogo()
+    janela.atualizar_table()
+    janela.config["catalogo_url"] = url
+
+    def sincronizar():
+        janela.sincronizar_catalogo()
+        fim = time.monotonic() + 10
+        while janela.sync_thread is not None and time.monotonic() < fim:
+            qapp.processEvents()
+            time.sleep(0.005)
+        assert janela.sync_thread is None
+
+    sincronizar()
+    assert respostas == [200]
+    assert janela.config["catalogo_etag"] == '"v1"'
+
+    itens = dict(janela.itens_por_id)
+    aplicados = []
+    monkeypatch.setattr(janela, "aplicar_delta_catalogo", lambda *args, **kwargs: aplicados.append(args))
+    monkeypatch.setattr(janela, "atualizar_table", lambda: aplicados.append("atualizar_table"))
+    sincronizar()
+    assert respostas == [200, 304]
+    assert aplicados == []
+    assert janela.itens_por_id == itens
+    janela.close()
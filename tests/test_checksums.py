@@ -0,0 +1,79 @@
+import hashlib
+
+import pytest
+
+import main
+
+CONTEUDO = b"driver" * 1000
+
+
+@pytest.fixture
+def arquivo(tmp_path):
+    caminho = tmp_path / "driver.exe"
+    caminho.write_bytes(CONTEUDO)
+    return str(caminho)
+
+
+def digest(algoritmo, dados=CONTEUDO):
+    return hashlib.new(algoritmo, dados).hexdigest()
+
+
+def test_ler_checksums_tipados():
+    assert main.ler_checksums("") == {}
+    assert main.ler_checksums(None) == {}
+    # Sem prefixo é sha256, como nos catálogos antigos
+    assert main.ler_checksums("ABCDEF") == {"sha256": "abcdef"}
+    assert main.ler_checksums("SHA512:AA blake2b:bb") == {"sha512": "aa", "blake2b": "bb"}
+    assert main.ler_checksums("sha256:aa, sha3-256:bb; md5:cc") == {"sha256": "aa", "sha3_256": "bb", "md5": "cc"}
+    assert main.ler_checksums(["sha256:aa", "", "blake2s:bb"]) == {"sha256": "aa", "blake2s": "bb"}
+
+
+def test_formatar_e_ler_ida_e_volta():
+    digests = {"sha256": "aa" * 32, "blake2b": "bb" * 64}
+    assert main.formatar_checksums(digests) == f"sha256:{'aa' * 32} blake2b:{'bb' * 64}"
+    assert main.ler_checksums(main.formatar_checksums(digests)) == digests
+
+
+def test_verificacao_completa_exige_todos_os_digests(arquivo):
+    certo = f"sha256:{digest('sha256')} blake2b:{digest('blake2b')}"
+    assert main.verificar_checksums(arquivo, certo)
+    assert main.verificar_checksums(arquivo, digest("sha256").upper())
+    errado = f"sha256:{digest('sha256')} blake2b:{'0' * 128}"
+    assert not main.verificar_checksums(arquivo, errado)
+
+
+def test_verificacao_rapida_usa_so_o_digest_mais_rapido(arquivo, monkeypatch):
+    calculados = []
+    original = main.calcular_digests
+    monkeypatch.setattr(main, "calcular_digests",
+                        lambda caminho, algoritmos: (calculados.append(list(algoritmos)), original(caminho, algoritmos))[1])
+    # sha256 errado não pesa: no modo rápido só o blake2b é conferido
+    valor = f"sha256:{'0' * 64} blake2b:{digest('blake2b')}"
+    assert main.verificar_checksums(arquivo, valor, rapido=True)
+    assert calculados == [["blake2b"]]
+    assert not main.verificar_checksums(arquivo, valor)
+
+    # Sem nenhum dos rápidos, vale o primeiro conhecido
+    calculados.clear()
+    assert main.verificar_checksums(arquivo, f"sha3_512:{digest('sha3_512')}", rapido=True)
+    assert calculados == [["sha3_512"]]
+
+
+def test_algoritmos_desconhecidos_nao_contam(arquivo):
+    assert not main.verificar_checksums(arquivo, "xyz:00")
+    assert not main.verificar_checksums(arquivo, "")
+    assert main.verificar_checksums(arquivo, f"xyz:00 sha256:{digest('sha256')}")
+    assert main.verificar_checksums(arquivo, f"xyz:00 sha256:{digest('sha256')}", rapido=True)
+
+
+def test_digests_de_arquivo_vazio_e_em_varias_fatias(tmp_path, monkeypatch):
+    vazio = tmp_path / "vazio.bin"
+    vazio.write_bytes(b"")
+    assert main.calcular_digests(str(vazio), ["sha256"]) == {"sha256": digest("sha256", b"")}
+
+    monkeypatch.setattr(main, "LEITURA_HASH", 1000)
+    grande = tmp_path / "grande.bin"
+    grande.write_bytes(CONTEUDO * 3 + b"x")
+    assert main.calcular_digests(str(grande), ["sha256", "blake2b"]) == {
+        "sha256": digest("sha256", CONTEUDO * 3 + b"x"), "blake2b": digest("blake2b", CONTEUDO * 3 + b"x")
+    }
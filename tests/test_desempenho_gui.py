@@ -0,0 +1,212 @@
+import os
+import gc
+import json
+import time
+import threading
+
+import pytest
+from PyQt5.QtCore import QEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QProgressBar, QPushButton
+
+import main
+
+# Testes de regressão de desempenho da janela principal com catálogos sintéticos.
+# Cada medida tem um orçamento em orcamento_desempenho.json: um valor fixo mais um custo
+# por linha do catálogo, então um custo que deixa de ser linear estoura nos tamanhos maiores.
+# Os orçamentos de tempo são escalados pela calibração: uma carga fixa de widgets Qt medida
+# nesta máquina, comparada com a mesma carga na máquina de referência.
+# O catálogo de 50 mil drivers é lento e só roda com DESEMPENHO_LENTO=1.
+# Para regravar a calibração de referência: DESEMPENHO_CALIBRAR=1 python -m pytest tests
+TAMANHOS = (
+    100, 1000, 10000,
+    pytest.param(50000, marks=pytest.mark.skipif(
+        os.environ.get("DESEMPENHO_LENTO") != "1", reason="catálogo lento: DESEMPENHO_LENTO=1 para rodar"
+    )),
+)
+ORCAMENTO_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "orcamento_desempenho.json")
+TOLERANCIA = float(os.environ.get("DESEMPENHO_TOLERANCIA", "1.0"))
+CALIBRAR = os.environ.get("DESEMPENHO_CALIBRAR") == "1"
+LINHAS_CALIBRACAO = 2000
+# Abaixo disto a memória por linha é dominada pela janela em si e pelo alocador
+MEMORIA_MINIMO_LINHAS = 1000
+DOWNLOADS_SIMULTANEOS = 20
+PASSOS_PROGRESSO = 25
+BUSCA = "driver 00042"
+
+
+# Memória residente do processo (Linux); None onde /proc não existe
+def memoria_residente():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+# Fora do loop de eventos o processEvents não executa os deleteLater: os widgets descartados
+# continuariam vivos e entrariam nas medidas seguintes (a troca de paleta passa por todos)
+def descartar_excluidos(qapp):
+    qapp.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+# Tabela com os mesmos widgets por linha da janela, sem a lógica do aplicativo
+def carga_calibracao(qapp):
+    inicio = time.perf_counter()
+    tabela = QTableWidget(0, 4)
+    tabela.show()
+    tabela.setRowCount(LINHAS_CALIBRACAO)
+    for row in range(LINHAS_CALIBRACAO):
+        tabela.setItem(row, 0, QTableWidgetItem(str(row)))
+        tabela.setItem(row, 1, QTableWidgetItem(f"Driver {row}"))
+        tabela.setCellWidget(row, 2, QProgressBar())
+        tabela.setCellWidget(row, 3, QPushButton("Baixar"))
+    qapp.processEvents()
+    duracao = time.perf_counter() - inicio
+    tabela.close()
+    tabela.deleteLater()
+    descartar_excluidos(qapp)
+    return duracao
+
+
+@pytest.fixture(scope="module")
+def orcamento(qapp):
+    with open(ORCAMENTO_FILE, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    carga_calibracao(qapp)  # Aquecimento: a primeira execução inclui a carga de plugins e fontes
+    calibracao = min(carga_calibracao(qapp) for _ in range(3))
+    if CALIBRAR:
+        dados["calibracao_referencia"] = round(calibracao, 4)
+        with open(ORCAMENTO_FILE, "w", encoding="utf-8") as f:
+            json.dump(dados, f, indent=4, sort_keys=True)
+            f.write("\n")
+    dados["escala"] = calibracao / dados["calibracao_referencia"]
+    return dados
+
+
+# Uma janela por tamanho de catálogo, com todas as medidas feitas em sequência
+@pytest.fixture(scope="module", params=TAMANHOS, ids=lambda n: f"{n}_drivers")
+def medidas(request, qapp, pasta_isolada, dialogos_modais, catalogo_sintetico):
+    n = request.param
+    catalogo_sintetico(n)
+    resultado = {"n": n}
+
+    # Tempo até a janela aparecer com a tabela preenchida
+    gc.collect()
+    memoria_antes = memoria_residente()
+    inicio = time.perf_counter()
+    janela = main.DriverDownloaderApp()
+    janela.show()
+    qapp.processEvents()
+    resultado["tempo_janela"] = time.perf_counter() - inicio
+    memoria_depois = memoria_residente()
+    if memoria_antes is not None and n >= MEMORIA_MINIMO_LINHAS:
+        resultado["memoria_por_linha"] = (memoria_depois - memoria_antes) / n
+    assert janela.download_table.rowCount() == n
+
+    # Recarga da tabela com a janela visível (importação, sincronização do catálogo)
+    inicio = time.perf_counter()
+    janela.atualizar_table()
+    qapp.processEvents()
+    resultado["atualizar_table"] = time.perf_counter() - inicio
+    assert janela.download_table.rowCount() == n
+    descartar_excluidos(qapp)
+
+    # Filtro: uma medida por tecla digitada, incluindo o repaint
+    tempos = []
+    for letra in BUSCA:
+        inicio = time.perf_counter()
+        QTest.keyClick(janela.search_bar, letra)
+        qapp.processEvents()
+        tempos.append(time.perf_counter() - inicio)
+    visiveis = [row for row in range(n) if not janela.download_table.isRowHidden(row)]
+    assert len(visiveis) == 1
+    janela.search_bar.clear()
+    qapp.processEvents()
+    tempos.sort()
+    resultado["tecla_p95"] = main.percentil(tempos, 0.95)
+    resultado["tecla_max"] = tempos[-1]
+
+    # Progresso de downloads simultâneos, emitido de outras threads como nos workers
+    ids = [1 + i * n // DOWNLOADS_SIMULTANEOS for i in range(DOWNLOADS_SIMULTANEOS)]
+    recebidas = []
+    janela.sinais_download.progress_changed.connect(lambda download_id, progresso: recebidas.append(download_id))
+
+    def simular_download(download_id):
+        for passo in range(1, PASSOS_PROGRESSO + 1):
+            janela.sinais_download.progress_changed.emit(download_id, passo * 100 // PASSOS_PROGRESSO)
+
+    threads = [threading.Thread(target=simular_download, args=(download_id,)) for download_id in ids]
+    total = DOWNLOADS_SIMULTANEOS * PASSOS_PROGRESSO
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    while len(recebidas) < total:
+        qapp.processEvents()
+    resultado["progresso_por_atualizacao"] = (time.perf_counter() - inicio) / total
+    for thread in threads:
+        thread.join()
+    for download_id in ids:
+        row = janela.get_row_by_id(download_id)
+        assert janela.download_table.cellWidget(row, 4).value() == 100
+
+    # Troca de tema até a janela ser redesenhada (as linhas não são repolidas)
+    trocas = []
+    for nome in ("escuro", "claro"):
+        inicio = time.perf_counter()
+        janela.aplicar_tema(nome)
+        janela.repaint()
+        qapp.processEvents()
+        trocas.append(time.perf_counter() - inicio)
+    resultado["troca_tema"] = max(trocas)
+
+    yield resultado
+
+    janela.close()
+    janela.deleteLater()
+    descartar_excluidos(qapp)
+    gc.collect()
+
+
+def comparar(medidas, orcamento, nome):
+    n = medidas["n"]
+    valor = medidas[nome]
+    limite = orcamento["orcamentos"][nome]
+    permitido = (limite["fixo"] + limite["por_linha"] * n) * TOLERANCIA
+    if limite["escalar"]:
+        permitido *= orcamento["escala"]
+    assert valor <= permitido, (
+        f"{nome} com {n} drivers: {valor:.6f} acima do orçamento {permitido:.6f} "
+        f"(calibração {orcamento['escala']:.2f}x a referência)"
+    )
+
+
+def test_tempo_ate_janela(medidas, orcamento):
+    comparar(medidas, orcamento, "tempo_janela")
+
+
+def test_atualizar_table(medidas, orcamento):
+    comparar(medidas, orcamento, "atualizar_table")
+
+
+def test_latencia_filtro_por_tecla(medidas, orcamento):
+    comparar(medidas, orcamento, "tecla_p95")
+    comparar(medidas, orcamento, "tecla_max")
+
+
+def test_progresso_downloads_simultaneos(medidas, orcamento):
+    comparar(medidas, orcamento, "progresso_por_atualizacao")
+
+
+def test_troca_de_tema(medidas, orcamento):
+    comparar(medidas, orcamento, "troca_tema")
+
+
+def test_memoria_por_linha(medidas, orcamento):
+    if "memoria_por_linha" not in medidas:
+        pytest.skip("memória por linha só medida com /proc e catálogos a partir de %d linhas" % MEMORIA_MINIMO_LINHAS)
+    comparar(medidas, orcamento, "memoria_por_linha")
+
+
+def test_nenhum_dialogo_modal(medidas, dialogos_modais):
+    assert dialogos_modais == []
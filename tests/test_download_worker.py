@@ -0,0 +1,143 @@
+import io
+import os
+import time
+import zipfile
+import threading
+import http.server
+
+import pytest
+
+import main
+
+
+# Servidor local com a resposta definida por cada teste: cabeçalhos, corpo, códigos de erro
+# devolvidos aos próximos GETs e intervalo entre os bytes (servidor lento)
+@pytest.fixture
+def servidor():
+    resposta = {"cabecalhos": {}, "corpo": b"", "falhas": [], "intervalo": 0}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self._cabecalhos()
+
+        def do_GET(self):
+            if resposta["falhas"]:
+                self.send_error(resposta["falhas"].pop(0))
+                return
+            self._cabecalhos()
+            if not resposta["intervalo"]:
+                self.wfile.write(resposta["corpo"])
+                return
+            try:
+                for i in range(len(resposta["corpo"])):
+                    self.wfile.write(resposta["corpo"][i:i + 1])
+                    self.wfile.flush()
+                    time.sleep(resposta["intervalo"])
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _cabecalhos(self):
+            self.send_response(200)
+            cabecalhos = {"Content-Length": str(len(resposta["corpo"])), "Content-Type": "application/octet-stream"}
+            cabecalhos.update(resposta["cabecalhos"])
+            for nome, valor in cabecalhos.items():
+                self.send_header(nome, valor)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/driver.zip", resposta
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def executar(url, destino, **kwargs):
+    worker = main.DownloadWorker(1, main.Driver("Driver", url, "Grupo"), str(destino), **kwargs)
+    fins = []
+    worker.download_finished.connect(lambda download_id, sucesso, mensagem: fins.append((sucesso, mensagem)))
+    worker.run()
+    return fins
+
+
+def zip_corrompido():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("driver.inf", os.urandom(4096) * 4)
+    dados = bytearray(buf.getvalue())
+    for i in range(60, 400):
+        dados[i] ^= 0x5A
+    return bytes(dados)
+
+
+def test_zip_corrompido_falha_o_download(servidor, tmp_path):
+    url, resposta = servidor
+    resposta["corpo"] = zip_corrompido()
+    fins = executar(url, tmp_path / "driver.zip", extrair=True, config={"tentativas_max": 1})
+    assert len(fins) == 1
+    sucesso, mensagem = fins[0]
+    assert not sucesso and "extração falhou" in mensagem
+
+
+def test_erro_inesperado_vira_falha_do_download(servidor, tmp_path, monkeypatch, capsys):
+    url, resposta = servidor
+    resposta["corpo"] = b"conteudo"
+
+    def quebrado(self, *args, **kwargs):
+        raise ValueError("Content-Length inválido")
+
+    monkeypatch.setattr(main.DownloadWorker, "_transferir", quebrado)
+    fins = executar(url, tmp_path / "driver.zip")
+    assert fins == [(False, "Erro inesperado ao baixar o driver 'Driver': Content-Length inválido")]
+    # Nada é impresso no stderr a partir da thread do worker
+    assert capsys.readouterr().err == ""
+
+
+def test_falhas_temporarias_sao_repetidas_com_backoff(servidor, tmp_path):
+    url, resposta = servidor
+    resposta["corpo"] = b"conteudo" * 100
+    resposta["falhas"] = [503, 500]
+    config = {"tentativas_max": 3, "backoff_base": 0.05, "backoff_max": 0.1}
+    inicio = time.monotonic()
+    fins = executar(url, tmp_path / "driver.exe", config=config)
+    assert fins[0][0] and fins[0][1].endswith("(3 tentativas)")
+    assert time.monotonic() - inicio >= 0.05
+    assert (tmp_path / "driver.exe").read_bytes() == resposta["corpo"]
+
+
+def test_erro_definitivo_nao_e_repetido(servidor, tmp_path):
+    url, resposta = servidor
+    resposta["falhas"] = [404, 404]
+    fins = executar(url, tmp_path / "driver.exe", config={"tentativas_max": 5, "backoff_base": 0.05})
+    assert fins == [(False, fins[0][1])] and "após 1 tentativa(s)" in fins[0][1]
+    assert resposta["falhas"] == [404]
+
+
+def test_watchdog_interrompe_transferencia_lenta(servidor, tmp_path):
+    url, resposta = servidor
+    resposta["corpo"] = b"x" * 1000
+    resposta["intervalo"] = 0.05
+    config = {"tentativas_max": 1, "watchdog_bps": 1000, "watchdog_segundos": 1, "timeout_leitura": 30}
+    inicio = time.monotonic()
+    fins = executar(url, tmp_path / "driver.exe", config=config)
+    assert not fins[0][0] and "Transferência travada" in fins[0][1]
+    assert time.monotonic() - inicio < 10
+
+
+def test_backoff_e_classificacao_dos_erros():
+    for tentativa in range(1, 8):
+        espera = main.calcular_backoff(tentativa, 2.0, 60.0)
+        assert min(60.0, 2.0 * 2 ** (tentativa - 1)) * 0.5 <= espera <= min(60.0, 2.0 * 2 ** (tentativa - 1))
+
+    def erro_http(status):
+        resposta = main.requests.Response()
+        resposta.status_code = status
+        return main.requests.exceptions.HTTPError(response=resposta)
+
+    assert [main.erro_retentavel(erro_http(status)) for status in (404, 410, 429, 500, 503)] == \
+        [False, False, True, True, True]
+    assert main.erro_retentavel(main.TransferenciaTravada("lento"))
+    assert main.descrever_erro(erro_http(503)) == "HTTP 503"
+    assert main.descrever_erro(main.requests.exceptions.ReadTimeout()) == "Timeout de leitura"
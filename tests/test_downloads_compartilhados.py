@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+import http.server
+
+import pytest
+from PyQt5.QtWidgets import QPushButton
+
+import main
+
+CONTEUDO = os.urandom(256 * 1024)
+
+
+# Servidor local que conta os GETs recebidos
+@pytest.fixture
+def servidor():
+    pedidos = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self._cabecalhos()
+
+        def do_GET(self):
+            pedidos.append(self.path)
+            self._cabecalhos()
+            for i in range(0, len(CONTEUDO), 16384):
+                self.wfile.write(CONTEUDO[i:i + 16384])
+                time.sleep(0.01)
+
+        def _cabecalhos(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(CONTEUDO)))
+            self.send_header("Content-Type", "application/octet-stream")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/driver.exe", pedidos
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def janela(qapp, pasta_isolada, dialogos_modais, servidor):
+    url, _ = servidor
+    catalogo = [{"nome": f"Cópia {i}", "url": url, "grupo": "Duplicados"} for i in range(3)]
+    janela = main.DriverDownloaderApp()
+    janela.drivers = main.CatalogoDrivers(catalogo)
+    janela.atualizar_table()
+    yield janela
+    janela.close()
+
+
+def aguardar(qapp, condicao, limite=20):
+    fim = time.monotonic() + limite
+    while not condicao() and time.monotonic() < fim:
+        qapp.processEvents()
+        time.sleep(0.005)
+    assert condicao()
+
+
+def status(janela, download_id):
+    return janela.download_table.item(janela.get_row_by_id(download_id), 5).text()
+
+
+def botao_pausar(janela, download_id):
+    acoes = janela.download_table.cellWidget(janela.get_row_by_id(download_id), 6)
+    return next(botao for botao in acoes.findChildren(QPushButton) if botao.text() == "Pausar")
+
+
+def test_downloads_identicos_compartilham_a_transferencia(qapp, janela, servidor, tmp_path):
+    _, pedidos = servidor
+    destinos = {download_id: str(tmp_path / f"copia{download_id}.exe") for download_id in (1, 2, 3)}
+    for download_id, destino in destinos.items():
+        assert janela.iniciar_download_em(download_id, janela.get_driver_by_id(download_id), destino)
+    assert isinstance(janela.current_workers[2], main.DownloadCompartilhado)
+    assert janela.transferencias_ativas() == 1
+    assert not botao_pausar(janela, 2).isEnabled()
+
+    aguardar(qapp, lambda: not janela.current_workers)
+    assert len(pedidos) == 1
+    for download_id, destino in destinos.items():
+        assert status(janela, download_id) == "Concluído"
+        with open(destino, "rb") as f:
+            assert f.read() == CONTEUDO
+    assert not janela.transferencias and not janela.seguidores
+
+
+def test_lider_cancelado_passa_a_transferencia_adiante(qapp, janela, servidor, tmp_path):
+    _, pedidos = servidor
+    for download_id in (1, 2):
+        janela.iniciar_download_em(download_id, janela.get_driver_by_id(download_id), str(tmp_path / f"{download_id}.exe"))
+    janela.cancelar_download(1)
+
+    aguardar(qapp, lambda: not janela.current_workers and not janela.fila_downloads)
+    assert status(janela, 1) == "Cancelado"
+    assert status(janela, 2) == "Concluído"
+    with open(tmp_path / "2.exe", "rb") as f:
+        assert f.read() == CONTEUDO
+    assert len(pedidos) == 2
+
+
+def test_lider_sem_linha_na_tabela(qapp, janela, servidor, tmp_path):
+    janela.iniciar_download_em(1, janela.get_driver_by_id(1), str(tmp_path / "1.exe"))
+    # Linha do líder removida (ex.: recarga do catálogo) com a transferência ainda em andamento
+    janela.download_table.removeRow(janela.get_row_by_id(1))
+    assert janela.iniciar_download_em(2, janela.get_driver_by_id(2), str(tmp_path / "2.exe"))
+    assert janela.current_workers[2].lider == 1
+
+    aguardar(qapp, lambda: not janela.current_workers)
+    assert status(janela, 2) == "Concluído"
@@ -0,0 +1,77 @@
+import io
+import os
+import struct
+import zipfile
+
+import pytest
+
+import main
+
+ARQUIVOS = {"driver.inf": os.urandom(2048) * 8, "pasta/setup.exe": os.urandom(70000)}
+
+
+# Fluxo sem seek: o zipfile grava cada entrada com descritor de dados após o conteúdo
+class SemSeek(io.RawIOBase):
+    def __init__(self):
+        self.dados = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.dados += b
+        return len(b)
+
+
+def zip_em_fluxo():
+    saida = SemSeek()
+    with zipfile.ZipFile(saida, "w", zipfile.ZIP_DEFLATED) as z:
+        for nome, conteudo in ARQUIVOS.items():
+            with z.open(nome, "w") as f:
+                f.write(conteudo)
+    return bytes(saida.dados)
+
+
+def alimentar(extrator, dados, bloco=1000):
+    for i in range(0, len(dados), bloco):
+        extrator.alimentar(dados[i:i + bloco])
+
+
+def test_entradas_com_descritor_extraidas_durante_o_fluxo(tmp_path):
+    dados = zip_em_fluxo()
+    assert struct.unpack("<H", dados[6:8])[0] & 0x08
+    extrator = main.ExtratorZip(str(tmp_path / "destino"))
+    alimentar(extrator, dados)
+    assert extrator.adiado_em is None
+    caminho = tmp_path / "driver.zip"
+    caminho.write_bytes(dados)
+    extrator.finalizar(str(caminho))
+    assert extrator.extraidos == list(ARQUIVOS)
+    for nome, conteudo in ARQUIVOS.items():
+        assert (tmp_path / "destino" / nome).read_bytes() == conteudo
+
+
+# ZIP com uma entrada armazenada cujos cabeçalhos (local e central) recebem flags/método alterados
+def zip_alterado(flags=0, metodo=zipfile.ZIP_STORED):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as z:
+        z.writestr("driver.inf", b"conteudo")
+    dados = bytearray(buf.getvalue())
+    central = dados.find(main.ExtratorZip.ASSINATURA_CENTRAL)
+    for pos_flags in (6, central + 8):
+        dados[pos_flags:pos_flags + 4] = struct.pack("<HH", flags, metodo)
+    return bytes(dados)
+
+
+@pytest.mark.parametrize("flags, metodo", [(0x01, zipfile.ZIP_STORED), (0, 9)], ids=["criptografado", "deflate64"])
+def test_entrada_nao_extraivel_vira_badzipfile(tmp_path, flags, metodo):
+    dados = zip_alterado(flags, metodo)
+    extrator = main.ExtratorZip(str(tmp_path / "destino"))
+    alimentar(extrator, dados)
+    assert extrator.adiado_em == 0
+    caminho = tmp_path / "driver.zip"
+    caminho.write_bytes(dados)
+    with pytest.raises(zipfile.BadZipFile, match="driver.inf"):
+        extrator.finalizar(str(caminho))
+    assert not (tmp_path / "destino" / "driver.inf").exists()
+    assert caminho.exists()
@@ -0,0 +1,83 @@
+import pytest
+
+import main
+
+DIA = 86400
+
+
+def test_percentil_interpola_entre_vizinhos():
+    assert main.percentil([], 0.5) is None
+    assert main.percentil([7.0], 0.95) == 7.0
+    assert main.percentil([100, 200, 300, 400], 0.5) == 250
+    assert main.percentil([100, 200, 300, 400, 500], 0.95) == pytest.approx(480)
+
+
+@pytest.fixture
+def historico(tmp_path, monkeypatch):
+    relogio = {"agora": 1_700_000_000.0}
+    monkeypatch.setattr(main.time, "time", lambda: relogio["agora"])
+    historico = main.HistoricoDownloads(str(tmp_path / "historico.db"))
+    yield historico, relogio
+    historico.conexao.close()
+
+
+def test_p50_p95_por_host_so_com_downloads_concluidos(historico):
+    historico, relogio = historico
+    agora = relogio["agora"]
+
+    # Fora da janela de 30 dias: não entra nas estatísticas
+    relogio["agora"] = agora - 31 * DIA
+    historico.registrar("Antigo", "a.example", 10**9, 1, 10**9, 1, "baixado")
+
+    relogio["agora"] = agora - DIA
+    for vazao in (500, 100, 400, 200, 300):
+        historico.registrar("Driver", "a.example", vazao * 10, 10, vazao * 2, 1, "baixado")
+    historico.registrar("Driver", "a.example", 50, 1, 50, 3, "erro")
+    historico.registrar("Driver", "a.example", 10**6, 1, 10**6, 1, "pulado")
+    historico.registrar("Outro", "b.example", 0, 2, 0, 3, "erro")
+    relogio["agora"] = agora
+
+    a, b = historico.estatisticas_por_host()
+    assert a["host"] == "a.example"
+    assert a["transferencias"] == 7 and a["falhas"] == 1
+    assert a["bytes"] == 15000 + 50 + 10**6
+    assert a["pico"] == 10**6
+    # A média de cada download é bytes/duração; erro e pulado ficam de fora dos percentis
+    assert a["p50"] == pytest.approx(300)
+    assert a["p95"] == pytest.approx(480)
+
+    assert b["host"] == "b.example"
+    assert b["transferencias"] == 1 and b["falhas"] == 1 and b["bytes"] == 0
+    assert b["p50"] is None and b["p95"] is None
+
+    # Só hosts com vazão conhecida entram nas estimativas da fila
+    assert historico.vazao_estimada() == {"a.example": pytest.approx(300)}
+    # Uma janela maior passa a incluir o download antigo
+    assert historico.estatisticas_por_host(dias=60)[0]["transferencias"] == 8
+
+
+def test_historico_persiste_e_lista_os_mais_recentes(historico, tmp_path):
+    historico, relogio = historico
+    for i in range(3):
+        relogio["agora"] += 1
+        historico.registrar(f"Driver {i}", "a.example", 1000, 0, 0, 1, "baixado")
+
+    reaberto = main.HistoricoDownloads(str(tmp_path / "historico.db"))
+    try:
+        recentes = reaberto.recentes(limite=2)
+        assert [item["driver"] for item in recentes] == ["Driver 2", "Driver 1"]
+        # Duração zero não gera vazão média nem pico
+        assert recentes[0]["vazao_media"] is None and recentes[0]["vazao_pico"] is None
+    finally:
+        reaberto.conexao.close()
+
+
+def test_consultas_usam_os_indices(historico):
+    historico, _ = historico
+    plano = " ".join(
+        str(linha[-1]) for linha in historico.conexao.execute(
+            "EXPLAIN QUERY PLAN SELECT host, vazao_media FROM transferencias "
+            "WHERE host = ? AND quando >= ?", ("a.example", 0)
+        )
+    )
+    assert "idx_transferencias_host" in plano
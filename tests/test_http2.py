@@ -0,0 +1,289 @@
+import http.server
+import select
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+
+import pytest
+import requests
+
+import main
+
+pytestmark = pytest.mark.skipif(not main.HTTP2_DISPONIVEL, reason="httpx[http2] não instalado")
+
+CORPO = bytes(range(256)) * 256  # 64 KiB: passa da janela inicial de controle de fluxo
+
+
+# Proxy HTTP local que responde ele mesmo, registrando a URL absoluta pedida
+@pytest.fixture
+def proxy():
+    pedidos = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            pedidos.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}", pedidos
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_proxy_da_sessao_chega_ao_httpx(proxy):
+    endereco, pedidos = proxy
+    sessao = requests.Session()
+    sessao.trust_env = False
+    sessao.mount("http://", main.AdaptadorHttp2())
+    resposta = sessao.get("http://drivers.invalid/driver.exe", proxies={"http": endereco}, timeout=5)
+    assert resposta.content == b"ok"
+    assert pedidos == ["http://drivers.invalid/driver.exe"]
+
+
+def test_um_cliente_por_configuracao_de_tls():
+    padrao = main.AdaptadorHttp2.cliente()
+    assert main.AdaptadorHttp2.cliente() is padrao
+    assert main.AdaptadorHttp2.cliente(verify=False) is not padrao
+
+
+# Certificado autoassinado para 127.0.0.1, gerado pelo openssl da máquina
+@pytest.fixture(scope="module")
+def certificado(tmp_path_factory):
+    if not shutil.which("openssl"):
+        pytest.skip("openssl não instalado")
+    pasta = tmp_path_factory.mktemp("tls")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", str(pasta / "chave.pem"), "-out", str(pasta / "cert.pem"),
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True, capture_output=True,
+    )
+    return str(pasta / "cert.pem"), str(pasta / "chave.pem")
+
+
+def contexto_tls(certificado, protocolos):
+    contexto = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    contexto.load_cert_chain(*certificado)
+    contexto.set_alpn_protocols(protocolos)
+    return contexto
+
+
+# Servidor HTTP/2 mínimo sobre o pacote h2. responder(metodo, caminho) devolve
+# (status, cabeçalhos, partes); uma parte threading.Event segura o envio do
+# resto do corpo até ser sinalizada. Conta as conexões TLS aceitas.
+class ServidorH2:
+    def __init__(self, certificado, responder):
+        self.contexto = contexto_tls(certificado, ["h2"])
+        self.responder = responder
+        self.conexoes = 0
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.url = f"https://127.0.0.1:{self.sock.getsockname()[1]}"
+        threading.Thread(target=self._aceitar, daemon=True).start()
+
+    def _aceitar(self):
+        while True:
+            try:
+                conexao, _ = self.sock.accept()
+            except OSError:
+                return
+            self.conexoes += 1
+            threading.Thread(target=self._atender, args=(conexao,), daemon=True).start()
+
+    def _atender(self, conexao):
+        import h2.config
+        import h2.connection
+        import h2.events
+        import h2.exceptions
+
+        try:
+            tls = self.contexto.wrap_socket(conexao, server_side=True)
+        except (ssl.SSLError, OSError):
+            conexao.close()
+            return
+        h2c = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        h2c.initiate_connection()
+        pendentes = {}
+        with tls:
+            try:
+                tls.sendall(h2c.data_to_send())
+                while True:
+                    legivel, _, _ = select.select([tls], [], [], 0.02)
+                    if legivel or tls.pending():
+                        dados = tls.recv(65536)
+                        if not dados:
+                            return
+                        for evento in h2c.receive_data(dados):
+                            if isinstance(evento, h2.events.RequestReceived):
+                                cabecalhos = dict(evento.headers)
+                                status, extras, partes = self.responder(cabecalhos[":method"], cabecalhos[":path"])
+                                h2c.send_headers(
+                                    evento.stream_id, [(":status", str(status))] + extras, end_stream=not partes
+                                )
+                                if partes:
+                                    pendentes[evento.stream_id] = list(partes)
+                            elif isinstance(evento, h2.events.StreamReset):
+                                pendentes.pop(evento.stream_id, None)
+                            elif isinstance(evento, h2.events.ConnectionTerminated):
+                                return
+                    for stream_id, partes in list(pendentes.items()):
+                        try:
+                            self._enviar(h2c, stream_id, partes)
+                        except h2.exceptions.StreamClosedError:
+                            partes.clear()
+                        if not partes:
+                            del pendentes[stream_id]
+                    dados = h2c.data_to_send()
+                    if dados:
+                        tls.sendall(dados)
+            except (ssl.SSLError, OSError):
+                return
+
+    @staticmethod
+    def _enviar(h2c, stream_id, partes):
+        while partes:
+            parte = partes[0]
+            if isinstance(parte, threading.Event):
+                if not parte.is_set():
+                    return
+                partes.pop(0)
+                continue
+            janela = min(h2c.local_flow_control_window(stream_id), h2c.max_outbound_frame_size)
+            if janela <= 0:
+                return
+            h2c.send_data(stream_id, parte[:janela])
+            if len(parte) > janela:
+                partes[0] = parte[janela:]
+            else:
+                partes.pop(0)
+        h2c.end_stream(stream_id)
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture
+def tls_local(certificado, monkeypatch, tmp_path):
+    # O requests repassa o REQUESTS_CA_BUNDLE como verify ao adaptador
+    monkeypatch.setenv("REQUESTS_CA_BUNDLE", certificado[0])
+    monkeypatch.setattr(main, "CACHE_PARES", main.CachePares(str(tmp_path / "pares_cache.json")))
+    return certificado
+
+
+def test_downloads_simultaneos_dividem_uma_conexao(qapp, tls_local, tmp_path):
+    total = 3
+    gets = []
+    todos_abertos = threading.Event()
+    lock = threading.Lock()
+
+    # Nenhum corpo é enviado antes de os três GET chegarem: em HTTP/1.1 isso
+    # exigiria três conexões, em HTTP/2 são três streams da mesma
+    def responder(metodo, caminho):
+        cabecalhos = [("content-type", "application/octet-stream"), ("content-length", str(len(CORPO)))]
+        if metodo == "HEAD":
+            return 200, cabecalhos, []
+        with lock:
+            gets.append(caminho)
+            if len(gets) == total:
+                todos_abertos.set()
+        return 200, cabecalhos, [todos_abertos, CORPO]
+
+    servidor = ServidorH2(tls_local, responder)
+    workers, fins = [], []
+    try:
+        for i in range(total):
+            worker = main.DownloadWorker(
+                i, main.Driver(f"Driver {i}", f"{servidor.url}/driver{i}.exe", "Grupo"),
+                str(tmp_path / f"driver{i}.exe"), config={"http2": True},
+            )
+            worker.download_finished.connect(lambda download_id, sucesso, mensagem: fins.append(sucesso))
+            workers.append(worker)
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        # Os sinais emitidos fora da thread principal chegam pela fila de eventos
+        qapp.processEvents()
+    finally:
+        servidor.close()
+
+    assert fins == [True] * total
+    assert todos_abertos.is_set()
+    assert servidor.conexoes == 1
+    assert all(worker.http2 for worker in workers)
+    for i in range(total):
+        assert (tmp_path / f"driver{i}.exe").read_bytes() == CORPO
+
+
+# Servidor TLS que só anuncia http/1.1 no ALPN
+@pytest.fixture
+def servidor_http11(tls_local):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(CORPO)))
+            self.end_headers()
+
+        def do_GET(self):
+            self.do_HEAD()
+            self.wfile.write(CORPO)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.socket = contexto_tls(tls_local, ["http/1.1"]).wrap_socket(httpd.socket, server_side=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"https://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_sem_h2_no_alpn_o_download_segue_em_http11(servidor_http11, tmp_path):
+    destino = tmp_path / "driver.exe"
+    worker = main.DownloadWorker(
+        1, main.Driver("Driver", f"{servidor_http11}/driver.exe", "Grupo"), str(destino), config={"http2": True}
+    )
+    fins = []
+    worker.download_finished.connect(lambda download_id, sucesso, mensagem: fins.append(sucesso))
+    worker.run()
+
+    assert fins == [True]
+    assert worker.http2 is False
+    assert destino.read_bytes() == CORPO
+
+
+def test_corpo_http2_chega_em_partes_sem_esperar_o_fim(tls_local):
+    liberar = threading.Event()
+    primeira = CORPO[:16384]
+
+    def responder(metodo, caminho):
+        return 200, [("content-length", str(len(CORPO)))], [primeira, liberar, CORPO[len(primeira):]]
+
+    servidor = ServidorH2(tls_local, responder)
+    try:
+        sessao = requests.Session()
+        sessao.mount("https://", main.AdaptadorHttp2())
+        resposta = sessao.get(f"{servidor.url}/driver.exe", stream=True, timeout=10)
+        assert resposta.raw.versao == "HTTP/2"
+        partes = resposta.iter_content(len(primeira))
+        # O servidor ainda segura o resto do corpo: a primeira parte veio sozinha
+        assert next(partes) == primeira
+        assert not liberar.is_set()
+        liberar.set()
+        assert primeira + b"".join(partes) == CORPO
+    finally:
+        liberar.set()
+        servidor.close()
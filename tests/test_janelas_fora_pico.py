@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+import main
+
+NOITE = {"inicio": "22:00", "fim": "06:00", "limite_kbps": 0}
+ALMOCO = {"inicio": "12:00", "fim": "13:30", "limite_kbps": 256}
+
+
+# Instante no horário local, num dia fixo, para testar as bordas da janela
+def as_(horario, segundos=0):
+    horas, minutos = map(int, horario.split(":"))
+    return time.mktime((2026, 3, 10, horas, minutos, segundos, 0, 0, -1))
+
+
+@pytest.mark.parametrize("horario, segundos, aberta", [
+    ("21:59", 59, False),
+    ("22:00", 0, True),
+    ("23:59", 59, True),
+    ("00:00", 0, True),
+    ("05:59", 59, True),
+    ("06:00", 0, False),
+    ("12:00", 0, False),
+])
+def test_janela_que_passa_da_meia_noite(horario, segundos, aberta):
+    assert (main.janela_ativa([NOITE], agora=as_(horario, segundos)) is NOITE) is aberta
+
+
+@pytest.mark.parametrize("horario, aberta", [
+    ("11:59", False), ("12:00", True), ("13:29", True), ("13:30", False), ("00:00", False),
+])
+def test_janela_no_mesmo_dia_inclui_o_inicio_e_exclui_o_fim(horario, aberta):
+    assert (main.janela_ativa([ALMOCO], agora=as_(horario)) is ALMOCO) is aberta
+
+
+def test_varias_janelas_e_lista_vazia():
+    janelas = [NOITE, ALMOCO]
+    assert main.janela_ativa(janelas, agora=as_("12:15")) is ALMOCO
+    assert main.janela_ativa(janelas, agora=as_("03:00")) is NOITE
+    assert main.janela_ativa(janelas, agora=as_("09:00")) is None
+    assert main.janela_ativa([], agora=as_("03:00")) is None
+
+
+def test_inicio_igual_ao_fim_cobre_o_dia_todo():
+    dia_todo = {"inicio": "08:00", "fim": "08:00", "limite_kbps": 0}
+    for horario in ("07:59", "08:00", "20:00", "00:00"):
+        assert main.janela_ativa([dia_todo], agora=as_(horario)) is dia_todo
+
+
+def test_proxima_janela_vira_o_dia():
+    janelas = [NOITE, ALMOCO]
+    assert main.proxima_janela(janelas, agora=as_("09:00")) == "12:00"
+    assert main.proxima_janela(janelas, agora=as_("12:00")) == "22:00"
+    # Depois da última abertura do dia, vale a primeira do dia seguinte
+    assert main.proxima_janela(janelas, agora=as_("22:00")) == "12:00"
+    assert main.proxima_janela(janelas, agora=as_("23:30")) == "12:00"
+    assert main.proxima_janela([], agora=as_("09:00")) is None
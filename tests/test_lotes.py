@@ -0,0 +1,102 @@
+import os
+import time
+import threading
+import http.server
+
+import pytest
+
+import main
+
+CONTEUDO = os.urandom(64 * 1024)
+
+
+# Servidor local: /falta.exe responde 404, o resto entrega CONTEUDO
+@pytest.fixture
+def servidor():
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self._responder(False)
+
+        def do_GET(self):
+            self._responder(True)
+
+        def _responder(self, corpo):
+            if self.path.endswith("/falta.exe"):
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(CONTEUDO)))
+            self.send_header("Content-Type", "application/octet-stream")
+            self.end_headers()
+            if corpo:
+                self.wfile.write(CONTEUDO)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def janela(qapp, pasta_isolada, dialogos_modais, servidor):
+    catalogo = [
+        {"nome": "Elgin A", "url": f"{servidor}/a/driver.exe", "grupo": "Fiscal"},
+        {"nome": "Elgin B", "url": f"{servidor}/b/driver.exe", "grupo": "Fiscal"},
+        {"nome": "Sumido", "url": f"{servidor}/falta.exe", "grupo": "Fiscal"},
+        {"nome": "Outro", "url": f"{servidor}/outro.exe", "grupo": "Não Fiscal"},
+    ]
+    janela = main.DriverDownloaderApp()
+    janela.config["tentativas_max"] = 1
+    janela.drivers = main.CatalogoDrivers(catalogo)
+    janela.atualizar_table()
+    yield janela
+    janela.close()
+
+
+def aguardar(qapp, condicao, limite=20):
+    fim = time.monotonic() + limite
+    while not condicao() and time.monotonic() < fim:
+        qapp.processEvents()
+        time.sleep(0.005)
+    assert condicao()
+
+
+def ids_por_nome(janela):
+    return {driver["nome"]: download_id for download_id, driver in janela.drivers_por_id.items()}
+
+
+def test_lote_sem_dialogos_com_resumo_no_painel(qapp, janela, dialogos_modais, tmp_path):
+    ids = ids_por_nome(janela)
+    dialogos = len(dialogos_modais)
+    janela.baixar_lote("Seleção", sorted(ids[nome] for nome in ("Elgin A", "Elgin B", "Sumido")), str(tmp_path))
+    assert janela.lotes
+
+    aguardar(qapp, lambda: not janela.lotes)
+    # Nenhum diálogo modal por download: só o painel de notificações
+    assert len(dialogos_modais) == dialogos
+    # Nomes de arquivo repetidos no mesmo lote não se sobrescrevem
+    assert sorted(os.listdir(tmp_path)) == ["driver (2).exe", "driver.exe"]
+    resumo = janela.notification_list.item(0).text()
+    assert resumo.startswith("Seleção finalizado: 2 baixado(s), 0 já presente(s), 1 erro(s), 0 cancelado(s).")
+    assert resumo.endswith("Falharam: Sumido.")
+    assert janela.notification_counts["erro"] >= 1
+
+
+def test_baixar_grupo_enfileira_so_o_grupo_escolhido(qapp, janela, monkeypatch, tmp_path):
+    ids = ids_por_nome(janela)
+    monkeypatch.setattr(main.QInputDialog, "getItem", lambda *args, **kwargs: ("Fiscal", True))
+    monkeypatch.setattr(main.QFileDialog, "getExistingDirectory", lambda *args, **kwargs: str(tmp_path))
+    # Um driver do grupo já em andamento fica fora do lote
+    janela.iniciar_download_em(ids["Elgin A"], janela.get_driver_by_id(ids["Elgin A"]), str(tmp_path / "a.exe"))
+    janela.baixar_grupo()
+
+    (lote,) = janela.lotes.values()
+    assert lote["nome"] == "Grupo 'Fiscal'"
+    assert lote["pendentes"] == {ids["Elgin B"], ids["Sumido"]}
+    aguardar(qapp, lambda: not janela.lotes and not janela.current_workers)
+    assert sorted(os.listdir(tmp_path)) == ["a.exe", "driver.exe"]
+    assert janela.drivers.grupos() == ["Fiscal", "Não Fiscal"]
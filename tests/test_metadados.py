@@ -0,0 +1,171 @@
+import json
+import time
+import threading
+import http.server
+
+import pytest
+
+import main
+
+TAMANHO = 5000
+
+
+# Servidor local com um caso de sondagem por caminho; conta os pedidos e o
+# máximo de HEAD atendidos ao mesmo tempo
+@pytest.fixture
+def servidor():
+    estado = {"pedidos": [], "ativos": 0, "maximo": 0, "atraso": 0}
+    lock = threading.Lock()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            with lock:
+                estado["pedidos"].append(("HEAD", self.path))
+                estado["ativos"] += 1
+                estado["maximo"] = max(estado["maximo"], estado["ativos"])
+            try:
+                time.sleep(estado["atraso"])
+                if self.path == "/sem-head.exe":
+                    self.send_error(405)
+                elif self.path == "/antigo.exe":
+                    self.send_response(301)
+                    self.send_header("Location", "/novo.exe")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                elif self.path == "/falta.exe":
+                    self.send_error(404)
+                else:
+                    self._cabecalhos(200, TAMANHO)
+            finally:
+                with lock:
+                    estado["ativos"] -= 1
+
+        def do_GET(self):
+            estado["pedidos"].append(("GET", self.path, self.headers.get("Range")))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes 0-0/{TAMANHO}")
+            self.send_header("Content-Length", "1")
+            self.send_header("Content-Type", "application/octet-stream")
+            self.end_headers()
+            self.wfile.write(b"\0")
+
+        def _cabecalhos(self, status, tamanho):
+            self.send_response(status)
+            if self.path == "/pagina.exe":
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+            else:
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Last-Modified", "Wed, 01 Jan 2025 00:00:00 GMT")
+            self.send_header("Content-Length", str(tamanho))
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}", estado
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def sondar(url):
+    return main.sondar_url(main.nova_sessao({}), url, 5)
+
+
+def test_head_informa_tamanho_ranges_e_data(servidor):
+    url, _ = servidor
+    info = sondar(f"{url}/driver.exe")
+    assert info["alcancavel"] and info["problema"] == ""
+    assert info["tamanho"] == TAMANHO
+    assert info["ranges"] is True
+    assert info["modificado"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+    assert info["tipo"] == "application/octet-stream"
+
+
+def test_redirecionamento_guarda_a_url_final(servidor):
+    url, _ = servidor
+    assert sondar(f"{url}/antigo.exe")["url_final"] == f"{url}/novo.exe"
+
+
+def test_head_recusado_cai_para_get_do_primeiro_byte(servidor):
+    url, estado = servidor
+    info = sondar(f"{url}/sem-head.exe")
+    assert ("GET", "/sem-head.exe", "bytes=0-0") in estado["pedidos"]
+    assert info["alcancavel"] and info["tamanho"] == TAMANHO and info["ranges"] is True
+
+
+def test_links_quebrados_sao_sinalizados(servidor):
+    url, _ = servidor
+    pagina = sondar(f"{url}/pagina.exe")
+    assert pagina["alcancavel"] and pagina["problema"] == "Página HTML em vez do arquivo"
+
+    falta = sondar(f"{url}/falta.exe")
+    assert not falta["alcancavel"] and falta["problema"] == "HTTP 404"
+
+    # Porta sem ninguém escutando
+    recusado = sondar("http://127.0.0.1:9/driver.exe")
+    assert not recusado["alcancavel"] and recusado["problema"]
+
+
+def test_worker_respeita_o_limite_de_paralelos(qapp, servidor):
+    url, estado = servidor
+    estado["atraso"] = 0.1
+    urls = [f"{url}/driver{i}.exe" for i in range(8)]
+    worker = main.MetadadosWorker(urls, dict(main.DEFAULT_CONFIG, metadados_paralelos=2))
+    lotes = []
+    worker.metadados_prontos.connect(lotes.append)
+    worker.run()
+
+    recebidos = {}
+    for lote in lotes:
+        recebidos.update(lote)
+    assert set(recebidos) == set(urls)
+    assert all(info["tamanho"] == TAMANHO for info in recebidos.values())
+    assert estado["maximo"] == 2
+
+
+def test_janela_so_consulta_links_vencidos(qapp, dialogos_modais, servidor, tmp_path, monkeypatch):
+    url, estado = servidor
+    monkeypatch.chdir(tmp_path)
+    recente, vencido = f"{url}/recente.exe", f"{url}/vencido.exe"
+    with open(main.DRIVERS_FILE, "w", encoding="utf-8") as f:
+        json.dump([
+            {"nome": "Recente", "url": recente, "grupo": "Fiscal"},
+            {"nome": "Vencido", "url": vencido, "grupo": "Fiscal"},
+            {"nome": "Quebrado", "url": f"{url}/pagina.exe", "grupo": "Fiscal"},
+        ], f)
+    ttl = main.DEFAULT_CONFIG["metadados_ttl"]
+    antigo = {
+        "alcancavel": True, "tamanho": 1, "ranges": False, "modificado": "",
+        "tipo": "application/octet-stream", "problema": ""
+    }
+    with open(main.METADADOS_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            recente: dict(antigo, verificado_em=time.time(), url_final=recente),
+            vencido: dict(antigo, verificado_em=time.time() - ttl - 1, url_final=vencido),
+        }, f)
+
+    janela = main.DriverDownloaderApp()
+    try:
+        fim = time.monotonic() + 20
+        while janela.metadados_thread is not None and time.monotonic() < fim:
+            qapp.processEvents()
+            time.sleep(0.005)
+        assert janela.metadados_thread is None
+
+        assert {pedido[1] for pedido in estado["pedidos"]} == {"/vencido.exe", "/pagina.exe"}
+        colunas = {
+            janela.download_table.item(row, 1).text():
+                (janela.download_table.item(row, 2).text(), janela.download_table.item(row, 3).text())
+            for row in range(janela.download_table.rowCount())
+        }
+        assert colunas["Recente"] == (main.formatar_tamanho(1), "OK (sem retomada)")
+        assert colunas["Vencido"] == (main.formatar_tamanho(TAMANHO), "OK")
+        assert colunas["Quebrado"][1] == "Página HTML em vez do arquivo"
+        # O resultado fica em cache para a próxima abertura
+        with open(main.METADADOS_FILE, encoding="utf-8") as f:
+            assert json.load(f)[vencido]["tamanho"] == TAMANHO
+    finally:
+        janela.close()
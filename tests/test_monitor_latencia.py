@@ -0,0 +1,20 @@
+import pytest
+
+import main
+
+
+def test_medir_repassa_os_argumentos_intactos():
+    monitor = main.MonitorLatencia()
+
+    @monitor.medir
+    def slot(download_id, progresso):
+        return download_id, progresso
+
+    assert slot(1, 50) == (1, 50)
+    # Argumentos a mais não são descartados em silêncio
+    with pytest.raises(TypeError):
+        slot(1, 50, True)
+
+
+def test_monitor_desligado_por_padrao():
+    assert main.DEFAULT_CONFIG["monitor_latencia"] is False
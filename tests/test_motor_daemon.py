@@ -0,0 +1,175 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import http.server
+
+import pytest
+
+import main
+
+METADE = 32 * 1024
+CONTEUDO = os.urandom(2 * METADE)
+
+
+# Motor em uma porta livre, com token, progresso e histórico numa pasta temporária
+@pytest.fixture
+def motor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    servidor = socketserver.ThreadingTCPServer(("127.0.0.1", 0), main._MotorHandler)
+    servidor.daemon_threads = True
+    motor = main.MotorDownloads()
+    servidor.motor = motor
+    with open(main.DAEMON_TOKEN_FILE, "w", encoding="utf-8") as f:
+        f.write(motor.token)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield motor, servidor.server_address[1]
+    servidor.shutdown()
+    servidor.server_close()
+    motor.pool.waitForDone(10000)
+    motor.progresso.close()
+    motor._arquivo_progresso.close()
+    motor.historico.conexao.close()
+
+
+def conectar(porta, token):
+    conexao = socket.create_connection(("127.0.0.1", porta), timeout=10)
+    conexao.sendall((json.dumps({"token": token}) + "\n").encode("utf-8"))
+    return conexao, conexao.makefile("rb")
+
+
+def enviar(conexao, msg):
+    conexao.sendall((json.dumps(msg) + "\n").encode("utf-8"))
+
+
+def proximo_evento(leitor, tipo):
+    for linha in leitor:
+        evento = json.loads(linha)
+        if evento["evento"] == tipo:
+            return evento
+    raise AssertionError(f"conexão encerrada antes do evento '{tipo}'")
+
+
+@pytest.mark.parametrize("primeira_linha", [b'{"token": "errado"}\n', b"nao e json\n", b"{}\n"])
+def test_sem_o_token_o_motor_encerra_a_conexao(motor, primeira_linha):
+    _, porta = motor
+    with socket.create_connection(("127.0.0.1", porta), timeout=10) as conexao:
+        conexao.sendall(primeira_linha + b'{"cmd": "estado"}\n')
+        assert conexao.recv(4096) == b""
+    assert motor[0].clientes == []
+
+
+def test_com_o_token_o_cliente_recebe_o_estado(motor):
+    motor, porta = motor
+    conexao, leitor = conectar(porta, motor.token)
+    with conexao, leitor:
+        enviar(conexao, {"cmd": "estado"})
+        estado = proximo_evento(leitor, "estado")
+        assert estado["jobs"] == [] and estado["concluidos"] == []
+        assert estado["progresso"] == os.path.abspath(main.PROGRESSO_FILE)
+        assert os.path.getsize(estado["progresso"]) == main.SLOT_PROGRESSO.size * main.DAEMON_SLOTS
+
+
+# Servidor que entrega metade do arquivo e espera o teste liberar o resto
+@pytest.fixture
+def servidor_lento():
+    liberar = threading.Event()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self._cabecalhos()
+
+        def do_GET(self):
+            self._cabecalhos()
+            self.wfile.write(CONTEUDO[:METADE])
+            self.wfile.flush()
+            liberar.wait(20)
+            self.wfile.write(CONTEUDO[METADE:])
+
+        def _cabecalhos(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(CONTEUDO)))
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}", liberar
+    liberar.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def ler_slot(caminho, slot):
+    with open(caminho, "rb") as f:
+        return main.SLOT_PROGRESSO.unpack_from(f.read(), slot * main.SLOT_PROGRESSO.size)
+
+
+def test_progresso_do_download_passa_pelo_mmap(motor, servidor_lento, tmp_path):
+    motor, porta = motor
+    url, liberar = servidor_lento
+    destino = tmp_path / "driver.exe"
+    conexao, leitor = conectar(porta, motor.token)
+    with conexao, leitor:
+        enviar(conexao, {"cmd": "estado"})
+        progresso = proximo_evento(leitor, "estado")["progresso"]
+        enviar(conexao, {
+            "cmd": "baixar", "job": 7, "driver": {"nome": "Driver", "url": f"{url}/driver.exe", "grupo": "Fiscal"},
+            "save_path": str(destino), "config": {}
+        })
+        slot = proximo_evento(leitor, "iniciado")["slot"]
+        assert slot == 0
+
+        # Com metade recebida, o slot mostra o job e o progresso parcial
+        fim = time.monotonic() + 10
+        while ler_slot(progresso, slot)[1] < 50 and time.monotonic() < fim:
+            time.sleep(0.01)
+        assert ler_slot(progresso, slot) == (7, 50)
+        liberar.set()
+
+        evento = proximo_evento(leitor, "fim")
+    assert evento["job"] == 7 and evento["sucesso"] is True
+    assert evento["_recebidos"] == len(CONTEUDO)
+    assert destino.read_bytes() == CONTEUDO
+    # O slot é liberado no fim e o motor grava o histórico
+    assert ler_slot(progresso, slot) == (0, 0)
+    assert [item["resultado"] for item in motor.historico.recentes()] == ["baixado"]
+
+
+def aguardar(qapp, condicao, limite=10):
+    fim = time.monotonic() + limite
+    while not condicao() and time.monotonic() < fim:
+        qapp.processEvents()
+        time.sleep(0.005)
+    return condicao()
+
+
+def test_cliente_da_interface_usa_o_token_do_arquivo(qapp, motor):
+    _, porta = motor
+    cliente = main.ClienteDaemon(porta)
+    eventos = []
+    cliente.evento_recebido.connect(eventos.append)
+    cliente.conectado.connect(lambda: cliente.enviar({"cmd": "estado"}))
+    cliente.conectar()
+    assert aguardar(qapp, lambda: eventos)
+    assert eventos[0]["evento"] == "estado"
+    cliente.socket.abort()
+
+
+def test_cliente_com_token_antigo_e_desconectado(qapp, motor):
+    _, porta = motor
+    with open(main.DAEMON_TOKEN_FILE, "w", encoding="utf-8") as f:
+        f.write("token-de-outro-motor")
+    cliente = main.ClienteDaemon(porta)
+    eventos, quedas = [], []
+    cliente.evento_recebido.connect(eventos.append)
+    cliente.desconectado.connect(lambda: quedas.append(True))
+    cliente.conectado.connect(lambda: cliente.enviar({"cmd": "estado"}))
+    cliente.conectar()
+    assert aguardar(qapp, lambda: quedas)
+    assert eventos == [] and not cliente.pronto
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import struct
+import zipfile
+
+import pytest
+
+import main
+
+CONTEUDOS = {"driver_a.exe": os.urandom(40000), "driver_b.msi": os.urandom(30000)}
+
+
+def sha256(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+
+# Cache de origem com os dois arquivos e o catálogo que aponta para eles
+@pytest.fixture
+def origem(tmp_path, monkeypatch):
+    cache = main.CachePares(str(tmp_path / "origem.json"))
+    monkeypatch.setattr(main, "CACHE_PARES", cache)
+    drivers = []
+    for nome, dados in CONTEUDOS.items():
+        caminho = tmp_path / "origem" / nome
+        caminho.parent.mkdir(exist_ok=True)
+        caminho.write_bytes(dados)
+        cache.registrar(sha256(dados), str(caminho))
+        drivers.append({"nome": nome, "url": f"https://fabricante.example/{nome}", "grupo": "Fiscal",
+                        "checksum": sha256(dados)})
+    return drivers
+
+
+# Do outro lado, um cache vazio
+@pytest.fixture
+def importar(tmp_path, monkeypatch):
+    def importar(pacote):
+        monkeypatch.setattr(main, "CACHE_PARES", main.CachePares(str(tmp_path / "destino.json")))
+        return main.importar_pacote(str(pacote), paralelos=2, destino=str(tmp_path / "cache"))
+    return importar
+
+
+def test_exportar_e_importar_ida_e_volta(origem, importar, tmp_path):
+    pacote = tmp_path / "pacote.zip"
+    assert main.exportar_pacote(str(pacote), origem) == (2, 0)
+
+    drivers, importados, recusados, falhas = importar(pacote)
+    assert drivers == origem
+    assert (importados, recusados, falhas) == (2, 0, [])
+    for nome, dados in CONTEUDOS.items():
+        caminho = main.CACHE_PARES.caminho(sha256(dados))
+        assert caminho == str(tmp_path / "cache" / sha256(dados) / nome)
+        with open(caminho, "rb") as f:
+            assert f.read() == dados
+    assert not list((tmp_path / "cache").rglob("*.parcial"))
+
+
+def corromper_entrada(pacote, arquivo):
+    with zipfile.ZipFile(pacote) as z:
+        info = z.getinfo(arquivo)
+    with open(pacote, "r+b") as f:
+        f.seek(info.header_offset + 26)
+        tamanho_nome, tamanho_extra = struct.unpack("<HH", f.read(4))
+        f.seek(info.header_offset + 30 + tamanho_nome + tamanho_extra + info.compress_size // 2)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def test_entrada_corrompida_e_recusada_sem_derrubar_as_outras(origem, importar, tmp_path):
+    pacote = tmp_path / "pacote.zip"
+    main.exportar_pacote(str(pacote), origem)
+    corrompido = sha256(CONTEUDOS["driver_a.exe"])
+    corromper_entrada(pacote, f"arquivos/{corrompido}/driver_a.exe")
+
+    _, importados, recusados, falhas = importar(pacote)
+    assert (importados, recusados, falhas) == (1, 1, [])
+    assert main.CACHE_PARES.caminho(corrompido) is None
+    assert main.CACHE_PARES.caminho(sha256(CONTEUDOS["driver_b.msi"]))
+    assert not list((tmp_path / "cache").rglob("*.parcial"))
+
+
+@pytest.mark.parametrize("nome", ["", ".", "..", "../../fora.exe", "..\\fora.exe", "NUL", "com1.exe",
+                                  "driver.exe.", "driver:fluxo.exe"])
+def test_nomes_que_saem_da_pasta_ou_sao_reservados(importar, tmp_path, nome):
+    dados = b"MZ" + os.urandom(100)
+    arquivo = f"arquivos/{sha256(dados)}/{nome}"
+    pacote = tmp_path / "pacote.zip"
+    with zipfile.ZipFile(pacote, "w") as z:
+        z.writestr("catalogo.json", "[]")
+        z.writestr(arquivo, dados)
+        z.writestr("manifesto.json", json.dumps({"formato": main.PACOTE_FORMATO, "arquivos": [
+            {"arquivo": arquivo, "sha256": sha256(dados), "checksum": sha256(dados), "tamanho": len(dados)}
+        ]}))
+
+    assert importar(pacote)[1:] == (0, 1, [])
+    assert not (tmp_path / "cache").exists()
+    assert not (tmp_path / "fora.exe").exists()
+
+
+def test_nome_arquivo_valido():
+    assert main.nome_arquivo_valido("driver.exe")
+    assert main.nome_arquivo_valido("CONFIG.exe")
+    assert not main.nome_arquivo_valido("a/b.exe")
+    assert not main.nome_arquivo_valido("Aux .txt")
+    assert not main.nome_arquivo_valido("driver\x00.exe")
+
+
+def test_falha_de_gravacao_fica_so_na_entrada(origem, importar, tmp_path):
+    pacote = tmp_path / "pacote.zip"
+    main.exportar_pacote(str(pacote), origem)
+    # Um arquivo no lugar da pasta de destino impede a gravação desta entrada
+    bloqueado = sha256(CONTEUDOS["driver_b.msi"])
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / bloqueado).write_bytes(b"")
+
+    _, importados, recusados, falhas = importar(pacote)
+    assert (importados, recusados) == (1, 0)
+    assert len(falhas) == 1 and falhas[0].startswith("driver_b.msi: ")
+    assert main.CACHE_PARES.caminho(bloqueado) is None
+    assert main.CACHE_PARES.caminho(sha256(CONTEUDOS["driver_a.exe"]))
@@ -0,0 +1,57 @@
+import json
+import threading
+
+import main
+
+
+def test_desligado_nao_registra(tmp_path):
+    rastreador = main.Rastreador()
+    with rastreador.trecho("nada"):
+        pass
+    rastreador.rastrear("nada")(lambda: None)()
+    assert not rastreador.eventos
+
+
+def test_exporta_chrome_trace_com_threads(tmp_path):
+    rastreador = main.Rastreador()
+    rastreador.iniciar()
+
+    @rastreador.rastrear("trabalho", "download")
+    def trabalho():
+        with rastreador.trecho("fase", "download", download_id=7):
+            pass
+
+    trabalho()
+    thread = threading.Thread(target=trabalho, name="Worker")
+    thread.start()
+    thread.join()
+    caminho = tmp_path / "rastreamento.json"
+    rastreador.exportar(caminho)
+
+    with open(caminho, encoding="utf-8") as f:
+        eventos = json.load(f)["traceEvents"]
+    trechos = [evento for evento in eventos if evento["ph"] == "X"]
+    assert [evento["name"] for evento in trechos] == ["fase", "trabalho", "fase", "trabalho"]
+    assert trechos[0]["args"] == {"download_id": 7}
+    assert len({evento["tid"] for evento in trechos}) == 2
+    # O trecho interno fica contido no externo, na mesma thread
+    assert trechos[1]["ts"] <= trechos[0]["ts"]
+    assert trechos[0]["ts"] + trechos[0]["dur"] <= trechos[1]["ts"] + trechos[1]["dur"]
+    nomes = {evento["args"]["name"] for evento in eventos if evento["name"] == "thread_name"}
+    assert nomes == {"Interface", "Worker"}
+
+
+def test_slots_da_janela_rastreados(qapp, pasta_isolada, dialogos_modais, catalogo_sintetico):
+    catalogo_sintetico(10)
+    main.RASTREADOR.zerar()
+    main.RASTREADOR.iniciar()
+    try:
+        janela = main.DriverDownloaderApp()
+        janela.sinais_download.progress_changed.emit(1, 50)
+        janela.filtrar_drivers("driver")
+        main.salvar_drivers(janela.drivers)
+        nomes = {evento[0] for evento in main.RASTREADOR.eventos}
+        janela.close()
+    finally:
+        main.RASTREADOR.parar()
+    assert {"atualizar_table", "sinal progress_changed", "filtrar_drivers", "salvar_drivers"} <= nomes
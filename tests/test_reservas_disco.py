@@ -0,0 +1,91 @@
+import threading
+import collections
+import http.server
+
+import pytest
+
+import main
+
+MB = 2**20
+Uso = collections.namedtuple("Uso", "total used free")
+
+
+@pytest.fixture
+def disco(monkeypatch):
+    livre = {"bytes": 100 * MB}
+    monkeypatch.setattr(main.shutil, "disk_usage", lambda pasta: Uso(0, 0, livre["bytes"]))
+    return livre
+
+
+def test_downloads_simultaneos_nao_contam_o_mesmo_espaco(disco, tmp_path):
+    reservas = main.ReservasDisco()
+    reservas.reservar(1, str(tmp_path), 60 * MB)
+    with pytest.raises(main.EspacoInsuficiente) as erro:
+        reservas.reservar(2, str(tmp_path), 60 * MB)
+    assert erro.value.necessario == 60 * MB
+    assert "disponíveis 40.0 MB" in str(erro.value)
+
+    # Conforme o primeiro avança, o que ele já gravou deixa de estar reservado
+    reservas.atualizar(1, 30 * MB)
+    disco["bytes"] = 70 * MB
+    reservas.reservar(2, str(tmp_path), 40 * MB)
+    assert reservas.restante(2) == 40 * MB
+    # Reservar de novo o mesmo download substitui a reserva anterior
+    reservas.reservar(1, str(tmp_path), 30 * MB)
+
+    reservas.liberar(1)
+    reservas.liberar(2)
+    reservas.reservar(3, str(tmp_path), 70 * MB)
+
+
+def test_reserva_minima_fica_livre(disco, tmp_path):
+    reservas = main.ReservasDisco()
+    with pytest.raises(main.EspacoInsuficiente):
+        reservas.reservar(1, str(tmp_path), 60 * MB, reserva_minima=50 * MB)
+    reservas.reservar(1, str(tmp_path), 50 * MB, reserva_minima=50 * MB)
+
+
+def test_cota_conta_a_pasta_e_as_outras_reservas(disco, tmp_path):
+    (tmp_path / "antigo.exe").write_bytes(b"x" * (3 * MB))
+    reservas = main.ReservasDisco()
+    reservas.reservar(1, str(tmp_path), 4 * MB, cota=10 * MB)
+    with pytest.raises(main.EspacoInsuficiente, match="Cota de downloads excedida: 7.0 MB usados"):
+        reservas.reservar(2, str(tmp_path), 4 * MB, cota=10 * MB)
+    # Outra pasta não divide a cota
+    outra = tmp_path / "outra"
+    outra.mkdir()
+    reservas.reservar(2, str(outra), 4 * MB, cota=10 * MB)
+
+
+def test_download_maior_que_a_cota_nao_comeca(tmp_path):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self._cabecalhos()
+
+        def do_GET(self):
+            self._cabecalhos()
+            self.wfile.write(b"x" * (2 * MB))
+
+        def _cabecalhos(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(2 * MB))
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        driver = main.Driver("Grande", f"http://127.0.0.1:{httpd.server_port}/grande.exe", "Grupo")
+        worker = main.DownloadWorker(7, driver, str(tmp_path / "grande.exe"), config={"cota_mb": 1})
+        fins = []
+        worker.download_finished.connect(lambda download_id, sucesso, mensagem: fins.append((sucesso, mensagem)))
+        worker.run()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert worker.sem_espaco and worker.espaco_necessario == 2 * MB
+    assert not fins[0][0] and fins[0][1].startswith("Cota de downloads excedida")
+    assert not (tmp_path / "grande.exe").exists()
+    assert main.RESERVAS_DISCO.restante(7) == 0
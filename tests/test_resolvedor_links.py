@@ -0,0 +1,154 @@
+import json
+import time
+import threading
+import http.server
+
+import pytest
+
+import main
+
+CONTEUDO = b"MZ" + bytes(range(256)) * 64
+
+
+def test_link_do_dropbox_passa_a_baixar_direto():
+    assert main.reescrever_link_compartilhado("https://www.dropbox.com/s/abc/driver.exe?dl=0") == \
+        "https://www.dropbox.com/s/abc/driver.exe?dl=1"
+    assert main.reescrever_link_compartilhado("https://dropbox.com/scl/fi/x/driver.zip?rlkey=k") == \
+        "https://dropbox.com/scl/fi/x/driver.zip?rlkey=k&dl=1"
+
+
+def test_link_do_google_drive_vira_download():
+    direto = "https://drive.usercontent.google.com/download?id=1AbC-d_9&export=download&confirm=t"
+    assert main.reescrever_link_compartilhado("https://drive.google.com/file/d/1AbC-d_9/view?usp=sharing") == direto
+    assert main.reescrever_link_compartilhado("https://drive.google.com/open?id=1AbC-d_9") == direto
+    # Sem identificador de arquivo não há o que reescrever
+    assert main.reescrever_link_compartilhado("https://drive.google.com/drive/folders") == \
+        "https://drive.google.com/drive/folders"
+
+
+def test_outros_links_ficam_como_estao():
+    url = "https://fabricante.example/drivers/driver.exe?dl=0"
+    assert main.reescrever_link_compartilhado(url) == url
+
+
+def test_link_na_pagina_segue_regras_e_depois_extensoes():
+    html = """
+        <a href="/manual.pdf">Manual</a>
+        <a href="/arquivos/driver.exe">Baixar</a>
+        <a href="https://cdn.example/pacote.bin?v=2">Pacote</a>
+    """
+    pagina = "https://fabricante.example/produto/123"
+    extensoes = main.DEFAULT_CONFIG["extensoes_download"]
+    assert main.localizar_link_download(pagina, html, [], extensoes) == "https://fabricante.example/arquivos/driver.exe"
+    regras = [{"pagina": r"fabricante\.example/produto", "link": r"pacote\.bin"}]
+    assert main.localizar_link_download(pagina, html, regras, extensoes) == "https://cdn.example/pacote.bin?v=2"
+    assert main.localizar_link_download(pagina, '<a href="/manual.pdf">x</a>', [], extensoes) is None
+
+
+# Página de produto que aponta para o arquivo da versão atual
+@pytest.fixture
+def site():
+    estado = {"versao": "v1", "pedidos": []}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self._responder(False)
+
+        def do_GET(self):
+            self._responder(True)
+
+        def _responder(self, corpo):
+            estado["pedidos"].append((self.command, self.path))
+            if self.path == "/produto":
+                dados = f'<html><a href="/arquivos/{estado["versao"]}/driver.exe">Baixar</a></html>'.encode()
+                tipo = "text/html; charset=utf-8"
+            elif self.path == "/vazia":
+                dados, tipo = b"<html>Sem arquivo</html>", "text/html"
+            elif self.path == f"/arquivos/{estado['versao']}/driver.exe":
+                dados, tipo = CONTEUDO, "application/octet-stream"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            if corpo:
+                self.wfile.write(dados)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}", estado
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def resolvedor(tmp_path, monkeypatch):
+    resolvedor = main.ResolvedorLinks(str(tmp_path / "links.json"))
+    monkeypatch.setattr(main, "RESOLVEDOR_LINKS", resolvedor)
+    return resolvedor
+
+
+def resolver(resolvedor, url, **config):
+    return resolvedor.resolver(url, main.nova_sessao({}), 5, dict(main.DEFAULT_CONFIG, **config))
+
+
+def test_link_resolvido_fica_em_cache_e_em_disco(site, resolvedor):
+    url, _ = site
+    direto = f"{url}/arquivos/v1/driver.exe"
+    assert resolver(resolvedor, f"{url}/produto") == direto
+    assert resolvedor.url_direta(f"{url}/produto") == direto
+
+    # Outra instância (próxima execução) lê o arquivo
+    assert main.ResolvedorLinks(resolvedor.arquivo).url_direta(f"{url}/produto") == direto
+
+
+def test_link_vencido_volta_para_a_url_do_catalogo(site, resolvedor, monkeypatch):
+    url, _ = site
+    resolver(resolvedor, f"{url}/produto", links_ttl=60)
+    agora = time.time()
+    monkeypatch.setattr(main.time, "time", lambda: agora + 61)
+    assert resolvedor.url_direta(f"{url}/produto") == f"{url}/produto"
+
+    with open(resolvedor.arquivo, encoding="utf-8") as f:
+        assert json.load(f)[f"{url}/produto"]["expira"] <= agora + 60
+
+
+def test_arquivo_direto_e_pagina_sem_link(site, resolvedor):
+    url, _ = site
+    direto = f"{url}/arquivos/v1/driver.exe"
+    assert resolver(resolvedor, direto) == direto
+    assert not resolvedor.resolvido(direto)
+    with pytest.raises(main.LinkNaoResolvido):
+        resolver(resolvedor, f"{url}/vazia")
+
+
+def executar(url, destino):
+    worker = main.DownloadWorker(1, main.Driver("Driver", url, "Grupo"), str(destino))
+    fins = []
+    worker.download_finished.connect(lambda download_id, sucesso, mensagem: fins.append(sucesso))
+    worker.run()
+    return fins
+
+
+def test_download_pela_pagina_e_link_vencido_no_servidor(site, resolvedor, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "CACHE_PARES", main.CachePares(str(tmp_path / "pares_cache.json")))
+    url, estado = site
+    assert executar(f"{url}/produto", tmp_path / "v1.exe") == [True]
+    assert (tmp_path / "v1.exe").read_bytes() == CONTEUDO
+    assert resolvedor.url_direta(f"{url}/produto") == f"{url}/arquivos/v1/driver.exe"
+
+    # Próximo download vai direto ao arquivo, sem passar pela página
+    estado["pedidos"].clear()
+    assert executar(f"{url}/produto", tmp_path / "v1b.exe") == [True]
+    assert ("GET", "/produto") not in estado["pedidos"]
+
+    # O fabricante publicou outra versão: o link guardado dá 404 e a página é lida de novo
+    estado["versao"] = "v2"
+    assert executar(f"{url}/produto", tmp_path / "v2.exe") == [True]
+    assert (tmp_path / "v2.exe").read_bytes() == CONTEUDO
+    assert resolvedor.url_direta(f"{url}/produto") == f"{url}/arquivos/v2/driver.exe"
@@ -0,0 +1,75 @@
+from PyQt5 import QtGui
+from PyQt5.QtCore import QEvent
+
+import main
+
+
+def abrir_janela(qapp, catalogo_sintetico, n):
+    catalogo_sintetico(n)
+    janela = main.DriverDownloaderApp()
+    janela.show()
+    qapp.processEvents()
+    return janela
+
+
+def fechar_janela(qapp, janela):
+    janela.close()
+    janela.deleteLater()
+    qapp.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def contar_repolimentos(qapp, janela, monkeypatch):
+    repolidos = []
+    original = main.repolir_widget
+    monkeypatch.setattr(main, "repolir_widget", lambda widget: (repolidos.append(widget), original(widget)))
+    for nome in ("escuro", "claro"):
+        janela.aplicar_tema(nome)
+        qapp.processEvents()
+    monkeypatch.setattr(main, "repolir_widget", original)
+    return repolidos
+
+
+def test_troca_de_tema_nao_repole_as_linhas(qapp, dialogos_modais, catalogo_sintetico, monkeypatch):
+    contagens = []
+    for n in (50, 500):
+        janela = abrir_janela(qapp, catalogo_sintetico, n)
+        try:
+            viewport = janela.download_table.viewport()
+            repolidos = contar_repolimentos(qapp, janela, monkeypatch)
+            assert not any(widget is not viewport and viewport.isAncestorOf(widget) for widget in repolidos)
+            contagens.append(len(repolidos))
+        finally:
+            fechar_janela(qapp, janela)
+    # O trabalho da troca é o mesmo com 50 ou 500 linhas
+    assert contagens[0] == contagens[1]
+
+
+def cor_dominante(widget):
+    imagem = widget.grab().toImage()
+    cores = {}
+    for x in range(0, widget.width(), 2):
+        for y in range(0, widget.height(), 2):
+            cor = imagem.pixel(x, y)
+            cores[cor] = cores.get(cor, 0) + 1
+    return QtGui.QColor(max(cores, key=cores.get))
+
+
+def test_linhas_tiram_as_cores_da_paleta(qapp, dialogos_modais, catalogo_sintetico):
+    janela = abrir_janela(qapp, catalogo_sintetico, 20)
+    try:
+        botao = janela.download_table.cellWidget(0, 6)
+        barra = janela.download_table.cellWidget(0, 4)
+        assert isinstance(botao, main.BotaoLinha) and isinstance(barra, main.BarraLinha)
+
+        for nome, escuro in (("escuro", True), ("claro", False), ("escuro", True)):
+            janela.aplicar_tema(nome)
+            qapp.processEvents()
+            cores = main.TEMAS[nome]
+            assert botao.palette().color(QtGui.QPalette.Button) == QtGui.QColor(cores["botao"])
+            assert botao.palette().color(QtGui.QPalette.ButtonText) == QtGui.QColor(cores["texto"])
+            assert barra.palette().color(QtGui.QPalette.Base) == QtGui.QColor(cores["campo"])
+            # E o que é desenhado segue a paleta nova, sem repolir o widget
+            assert (cor_dominante(botao).lightness() < 128) is escuro
+            assert (cor_dominante(barra).lightness() < 128) is escuro
+    finally:
+        fechar_janela(qapp, janela)